@@ -0,0 +1,123 @@
+"""Classification of activity failures into Temporal retry behaviour.
+
+Activities raise ApplicationErrors of the types below, and the workflow's
+retry policies (see workflows/workflow_helpers.py and shared/tool_routing.py)
+only back off gently for whatever is left unclassified:
+
+- INVALID_REQUEST_ERROR: the request itself is wrong (bad arguments, a
+  provider's 4xx). Retrying can't help, so it is non-retryable and the turn
+  fails straight away.
+- TRANSIENT_ERROR: network errors, timeouts and 5xx. Retried quickly with
+  jittered exponential backoff.
+- RATE_LIMITED_ERROR: 429. Retried after the provider's Retry-After, or a
+  longer jittered backoff if it didn't send one. Also raised when the
+  client-side rate limiter would wait past the activity's timeout, retried
+  after that wait.
+"""
+
+import asyncio
+import random
+from datetime import timedelta
+from typing import Optional
+
+import requests
+from temporalio import activity
+from temporalio.exceptions import ApplicationError
+
+from activities.llm_rate_limiter import RateLimitWaitTooLong, retry_after_seconds
+
+INVALID_REQUEST_ERROR = "InvalidRequest"
+TRANSIENT_ERROR = "TransientError"
+RATE_LIMITED_ERROR = "RateLimited"
+
+# Backoff before retry n is drawn from [ceiling / 2, ceiling], with
+# ceiling = base * 2 ** (n - 1) capped at maximum
+TRANSIENT_RETRY_BASE_SECONDS = 0.5
+TRANSIENT_RETRY_MAX_SECONDS = 10.0
+RATE_LIMIT_RETRY_BASE_SECONDS = 5.0
+RATE_LIMIT_RETRY_MAX_SECONDS = 60.0
+
+
+def error_status_code(error: BaseException) -> Optional[int]:
+    """HTTP status of an LLM provider or HTTP client error, if it has one."""
+    status_code = getattr(error, "status_code", None)
+    if status_code is None:
+        # requests' and httpx's HTTP errors carry the response instead
+        status_code = getattr(getattr(error, "response", None), "status_code", None)
+    return status_code if isinstance(status_code, int) else None
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """Whether the same request may succeed if simply sent again."""
+    if isinstance(
+        error,
+        (
+            asyncio.TimeoutError,
+            TimeoutError,
+            ConnectionError,
+            requests.ConnectionError,
+            requests.Timeout,
+        ),
+    ):
+        return True
+    status_code = error_status_code(error)
+    return status_code is not None and (status_code == 408 or status_code >= 500)
+
+
+def jittered_retry_delay(base: float, maximum: float) -> timedelta:
+    """Exponential backoff with jitter for the current activity attempt."""
+    attempt = activity.info().attempt if activity.in_activity() else 1
+    ceiling = min(maximum, base * 2 ** (attempt - 1))
+    return timedelta(seconds=random.uniform(ceiling / 2, ceiling))
+
+
+def classify_error(error: BaseException) -> Optional[ApplicationError]:
+    """The ApplicationError to raise for an error, or None to leave it as is."""
+    if isinstance(error, RateLimitWaitTooLong):
+        return ApplicationError(
+            str(error),
+            type=RATE_LIMITED_ERROR,
+            next_retry_delay=timedelta(seconds=error.wait),
+        )
+    status_code = error_status_code(error)
+    if status_code == 429:
+        retry_after = retry_after_seconds(error)
+        return ApplicationError(
+            str(error),
+            type=RATE_LIMITED_ERROR,
+            next_retry_delay=(
+                timedelta(seconds=retry_after)
+                if retry_after is not None
+                else jittered_retry_delay(
+                    RATE_LIMIT_RETRY_BASE_SECONDS, RATE_LIMIT_RETRY_MAX_SECONDS
+                )
+            ),
+        )
+    if is_transient_error(error):
+        return ApplicationError(
+            str(error),
+            type=TRANSIENT_ERROR,
+            next_retry_delay=jittered_retry_delay(
+                TRANSIENT_RETRY_BASE_SECONDS, TRANSIENT_RETRY_MAX_SECONDS
+            ),
+        )
+    if status_code is not None and 400 <= status_code < 500:
+        return ApplicationError(
+            str(error), type=INVALID_REQUEST_ERROR, non_retryable=True
+        )
+    return None
+
+
+def classify_tool_error(error: BaseException) -> Optional[ApplicationError]:
+    """classify_error for tool handlers, where ValueError, TypeError and
+    KeyError mean the planner passed arguments the tool can't use."""
+    if isinstance(error, ApplicationError):
+        return None
+    classified = classify_error(error)
+    if classified is None and isinstance(error, (ValueError, TypeError, KeyError)):
+        classified = ApplicationError(
+            f"{type(error).__name__}: {error}",
+            type=INVALID_REQUEST_ERROR,
+            non_retryable=True,
+        )
+    return classified
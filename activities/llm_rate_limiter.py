@@ -0,0 +1,259 @@
+"""Client-side requests- and tokens-per-minute limits for LLM providers.
+
+Every worker used to call its provider as fast as sessions asked, and a 429
+became an activity retry that hit the provider again 5 seconds later. The
+limiter instead delays calls until the per-model token buckets configured in
+the LLM profiles (requests_per_minute, tokens_per_minute) have room, and
+pauses all calls to a model for the Retry-After a 429 asked for.
+
+Buckets live in this process unless LLM_RATE_LIMIT_STORE names a SQLite
+file, which every worker process on the host then shares. A wait longer than
+the activity has left raises RateLimitWaitTooLong, which the activity turns
+into a retry after that wait (see activities.activity_errors).
+"""
+
+import asyncio
+import email.utils
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from temporalio import activity
+
+# Pause after a 429 that doesn't say how long to wait
+DEFAULT_RATE_LIMIT_PAUSE_SECONDS = 1.0
+# Longest single sleep, so waiting activities keep heartbeating
+MAX_WAIT_SLICE_SECONDS = 1.0
+
+
+class RateLimitWaitTooLong(Exception):
+    """The limits would hold a request longer than its caller can wait."""
+
+    def __init__(self, model: str, wait: float):
+        super().__init__(f"Rate limits for {model} need a {wait:.1f}s wait")
+        self.wait = wait
+
+
+@dataclass
+class BucketDemand:
+    key: str
+    amount: float
+    per_minute: Optional[float]  # None: no limit, only honour pauses
+
+
+@dataclass
+class BucketState:
+    level: float
+    updated: float
+    paused_until: float = 0.0
+
+
+def take_from_buckets(
+    buckets: Dict[str, BucketState], demands: List[BucketDemand], now: float
+) -> float:
+    """Refill the buckets and take every demand from them, all or nothing.
+
+    Returns 0 if the demands were taken, else how many seconds to wait.
+    """
+    wait = 0.0
+    for demand in demands:
+        capacity = demand.per_minute or 0.0
+        bucket = buckets.get(demand.key) or BucketState(level=capacity, updated=now)
+        if demand.per_minute:
+            refill = (now - bucket.updated) * capacity / 60
+            bucket.level = min(capacity, bucket.level + refill)
+            # A request larger than the whole bucket waits for a full one
+            amount = min(demand.amount, capacity)
+            if bucket.level < amount:
+                wait = max(wait, (amount - bucket.level) * 60 / capacity)
+        bucket.updated = now
+        buckets[demand.key] = bucket
+        if bucket.paused_until > now:
+            wait = max(wait, bucket.paused_until - now)
+
+    if wait == 0:
+        for demand in demands:
+            if demand.per_minute:
+                buckets[demand.key].level -= min(demand.amount, demand.per_minute)
+    return wait
+
+
+class MemoryRateLimitStore:
+    """Buckets shared by the activities of one worker process."""
+
+    def __init__(self):
+        self.buckets: Dict[str, BucketState] = {}
+        self.lock = threading.Lock()
+
+    def try_take(self, demands: List[BucketDemand], now: float) -> float:
+        with self.lock:
+            return take_from_buckets(self.buckets, demands, now)
+
+    def adjust(self, key: str, amount: float) -> None:
+        with self.lock:
+            if key in self.buckets:
+                self.buckets[key].level -= amount
+
+    def pause(self, key: str, until: float) -> None:
+        with self.lock:
+            # A new bucket last updated at the epoch refills fully when taken from
+            bucket = self.buckets.setdefault(key, BucketState(level=0, updated=0))
+            bucket.paused_until = max(bucket.paused_until, until)
+
+
+class SQLiteRateLimitStore:
+    """Buckets shared by the worker processes on one host through a SQLite file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS llm_rate_limit_buckets ("
+                "key TEXT PRIMARY KEY, level REAL, updated REAL, paused_until REAL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=5, isolation_level=None)
+
+    def _transaction(self, keys: List[str], update) -> Any:
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            placeholders = ",".join("?" * len(keys))
+            rows = connection.execute(
+                "SELECT key, level, updated, paused_until FROM llm_rate_limit_buckets "
+                f"WHERE key IN ({placeholders})",
+                keys,
+            ).fetchall()
+            buckets = {row[0]: BucketState(*row[1:]) for row in rows}
+            result = update(buckets)
+            connection.executemany(
+                "INSERT OR REPLACE INTO llm_rate_limit_buckets VALUES (?, ?, ?, ?)",
+                [
+                    (key, bucket.level, bucket.updated, bucket.paused_until)
+                    for key, bucket in buckets.items()
+                ],
+            )
+            connection.execute("COMMIT")
+            return result
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        finally:
+            connection.close()
+
+    def try_take(self, demands: List[BucketDemand], now: float) -> float:
+        return self._transaction(
+            [demand.key for demand in demands],
+            lambda buckets: take_from_buckets(buckets, demands, now),
+        )
+
+    def adjust(self, key: str, amount: float) -> None:
+        def update(buckets):
+            if key in buckets:
+                buckets[key].level -= amount
+
+        self._transaction([key], update)
+
+    def pause(self, key: str, until: float) -> None:
+        def update(buckets):
+            bucket = buckets.setdefault(key, BucketState(level=0, updated=0))
+            bucket.paused_until = max(bucket.paused_until, until)
+
+        self._transaction([key], update)
+
+
+def estimate_tokens(completion_kwargs: Dict[str, Any]) -> int:
+    """Rough token count of a request: about 4 characters per prompt token,
+    plus the most it may generate."""
+    prompt_tokens = len(json.dumps(completion_kwargs.get("messages", []))) // 4
+    return prompt_tokens + (completion_kwargs.get("max_tokens") or 0)
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """The wait a rate-limited provider asked for, if the error carries it."""
+    headers = getattr(error, "litellm_response_headers", None)
+    if headers is None:
+        headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms") is not None:
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            retry_at = email.utils.parsedate_to_datetime(value).timestamp()
+            return max(0.0, retry_at - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMRateLimiter:
+    """Delays LLM requests to stay within per-model RPM and TPM limits."""
+
+    def __init__(self, store: Optional[Any] = None):
+        self.store = store or MemoryRateLimitStore()
+        # SQLite calls block on the file lock, so they run off the event loop
+        self.blocking = isinstance(self.store, SQLiteRateLimitStore)
+
+    async def _call(self, method, *args):
+        if self.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def acquire(
+        self,
+        model: str,
+        tokens: int,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_wait: Optional[float] = None,
+    ) -> float:
+        """Wait until the model's buckets allow this request; return the wait.
+
+        Raises RateLimitWaitTooLong instead if that takes more than max_wait
+        seconds in total.
+        """
+        demands = [BucketDemand(f"{model}:requests", 1, requests_per_minute)]
+        if tokens_per_minute:
+            demands.append(BucketDemand(f"{model}:tokens", tokens, tokens_per_minute))
+
+        started = time.monotonic()
+        waited = 0.0
+        while True:
+            wait = await self._call(self.store.try_take, demands, time.time())
+            if wait <= 0:
+                return waited
+            if max_wait is not None and waited + wait > max_wait:
+                raise RateLimitWaitTooLong(model, wait)
+            await asyncio.sleep(min(wait, MAX_WAIT_SLICE_SECONDS))
+            if activity.in_activity():
+                activity.heartbeat()
+            waited = time.monotonic() - started
+
+    async def record_tokens(
+        self, model: str, estimated: int, actual: Optional[int]
+    ) -> None:
+        """Charge the tokens bucket for the difference from the estimate."""
+        if isinstance(actual, int) and actual != estimated:
+            await self._call(self.store.adjust, f"{model}:tokens", actual - estimated)
+
+    async def pause(self, model: str, seconds: Optional[float]) -> None:
+        """Hold all requests to the model, e.g. for a 429's Retry-After."""
+        if seconds is None:
+            seconds = DEFAULT_RATE_LIMIT_PAUSE_SECONDS
+        await self._call(self.store.pause, f"{model}:requests", time.time() + seconds)
+
+
+def create_rate_limiter(store_path: Optional[str]) -> LLMRateLimiter:
+    """Limiter for this process, shared with others through store_path if set."""
+    if store_path:
+        return LLMRateLimiter(SQLiteRateLimitStore(store_path))
+    return LLMRateLimiter()
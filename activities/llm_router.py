@@ -0,0 +1,166 @@
+"""Routing of one LLM request across several providers.
+
+A profile in shared/llm_profiles.py may list fallback profiles. LLMRouter
+tries them in order (or fastest first with prefer_fastest), moves on straight
+away when a provider answers with 429, 5xx or a timeout rather than waiting
+for the activity to be retried, and with hedge sends a duplicate request to
+the next provider once the first is slower than its own p95 latency.
+"""
+
+import asyncio
+import statistics
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from activities.activity_errors import error_status_code, is_transient_error
+from activities.llm_rate_limiter import RateLimitWaitTooLong
+
+# Latency samples kept per profile for ordering and hedge delays
+LATENCY_WINDOW = 100
+# Hedge after this long until a profile has enough samples for a p95
+DEFAULT_HEDGE_DELAY_SECONDS = 3.0
+MIN_HEDGE_SAMPLES = 20
+# Providers that failed over are tried last for this long
+FAILOVER_COOLDOWN_SECONDS = 30.0
+
+
+@dataclass
+class RouteCandidate:
+    """One provider to try: the profile name and its litellm arguments.
+
+    complete sets limiter_wait to the time the request was held by the rate
+    limiter, which doesn't count towards the provider's latency.
+    """
+
+    profile_name: str
+    completion_kwargs: Dict[str, Any]
+    limiter_wait: float = 0.0
+
+
+def is_failover_error(error: BaseException) -> bool:
+    """Whether another provider may succeed where this one failed.
+
+    Rate limits (the provider's or the client-side limiter's), server errors,
+    timeouts and connection errors fail over; errors in the request itself
+    (bad request, auth) are raised.
+    """
+    return (
+        isinstance(error, RateLimitWaitTooLong)
+        or error_status_code(error) == 429
+        or is_transient_error(error)
+    )
+
+
+class LLMRouter:
+    """Sends LLM requests to the best available candidate provider.
+
+    complete is the coroutine that performs one request for a candidate.
+    Latency and failure state is kept per profile name for the life of the
+    worker.
+    """
+
+    def __init__(
+        self,
+        complete: Callable[[RouteCandidate], Awaitable[Any]],
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.complete = complete
+        self.clock = clock
+        self.latencies: Dict[str, Deque[float]] = {}
+        self.cooldown_until: Dict[str, float] = {}
+
+    def record_latency(self, profile_name: str, seconds: float) -> None:
+        self.latencies.setdefault(profile_name, deque(maxlen=LATENCY_WINDOW)).append(
+            seconds
+        )
+
+    def median_latency(self, profile_name: str) -> float:
+        samples = self.latencies.get(profile_name)
+        # Untried providers sort first so they get measured
+        return statistics.median(samples) if samples else 0.0
+
+    def hedge_delay(self, profile_name: str) -> float:
+        samples = self.latencies.get(profile_name)
+        if not samples or len(samples) < MIN_HEDGE_SAMPLES:
+            return DEFAULT_HEDGE_DELAY_SECONDS
+        return statistics.quantiles(samples, n=20)[-1]
+
+    def order(
+        self, candidates: List[RouteCandidate], prefer_fastest: bool
+    ) -> List[RouteCandidate]:
+        """Candidates in the order to try them: healthy before cooling down,
+        then fastest first or as configured."""
+        now = self.clock()
+
+        def sort_key(item):
+            index, candidate = item
+            cooling_down = self.cooldown_until.get(candidate.profile_name, 0) > now
+            speed = self.median_latency(candidate.profile_name) if prefer_fastest else 0
+            return (cooling_down, speed, index)
+
+        return [
+            candidate for _, candidate in sorted(enumerate(candidates), key=sort_key)
+        ]
+
+    async def route(
+        self,
+        candidates: List[RouteCandidate],
+        prefer_fastest: bool = False,
+        hedge: bool = False,
+    ) -> Any:
+        """Return the first successful response from the candidates."""
+        pending = self.order(candidates, prefer_fastest)
+        running: Dict[asyncio.Task, RouteCandidate] = {}
+        last_error: Optional[BaseException] = None
+        try:
+            while pending or running:
+                if not running:
+                    self._start(pending.pop(0), running)
+                timeout = None
+                if hedge and pending and len(running) == 1:
+                    (candidate,) = running.values()
+                    timeout = self.hedge_delay(candidate.profile_name)
+
+                done, _ = await asyncio.wait(
+                    running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    # The request is slower than usual: race a duplicate
+                    self._start(pending.pop(0), running)
+                    continue
+
+                for task in done:
+                    candidate = running.pop(task)
+                    error = task.exception()
+                    if error is None:
+                        return task.result()
+                    last_error = error
+                    if is_failover_error(error):
+                        self.cooldown_until[candidate.profile_name] = (
+                            self.clock() + FAILOVER_COOLDOWN_SECONDS
+                        )
+                    else:
+                        # Another provider would reject the request too; only
+                        # a hedged request already in flight can still answer
+                        pending.clear()
+            raise last_error
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+
+    def _start(
+        self, candidate: RouteCandidate, running: Dict[asyncio.Task, RouteCandidate]
+    ) -> None:
+        async def timed_request():
+            started = self.clock()
+            response = await self.complete(candidate)
+            self.record_latency(
+                candidate.profile_name,
+                self.clock() - started - candidate.limiter_wait,
+            )
+            return response
+
+        running[asyncio.ensure_future(timed_request())] = candidate
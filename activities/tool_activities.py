@@ -1,16 +1,31 @@
+import asyncio
+import contextvars
 import inspect
 import json
 import os
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Dict, List, Optional, Sequence
 
 from dotenv import load_dotenv
-from litellm import completion
 from temporalio import activity
 from temporalio.common import RawValue
 from temporalio.exceptions import ApplicationError
 
+from activities.activity_errors import (
+    classify_error,
+    classify_tool_error,
+    error_status_code,
+)
+from activities.llm_rate_limiter import (
+    create_rate_limiter,
+    estimate_tokens,
+    retry_after_seconds,
+)
+from activities.llm_router import LLMRouter, RouteCandidate
 from models.data_types import (
     EnvLookupInput,
     EnvLookupOutput,
@@ -18,28 +33,180 @@ from models.data_types import (
     ValidationInput,
     ValidationResult,
 )
+from models.response_schemas import RESPONSE_SCHEMAS, VALIDATION_SCHEMA
 from models.tool_definitions import MCPServerDefinition
+from shared.config import LLM_RATE_LIMIT_STORE, lookup_env_settings
+from shared.json_repair import TruncatedJSONError, parse_llm_json
+from shared.llm_profiles import (
+    DEFAULT_LLM_PROFILE,
+    LLM_PROFILES,
+    PLANNER_PROFILE,
+    SUMMARY_PROFILE,
+    VALIDATION_PROFILE,
+    get_llm_profile,
+    llm_profile_for,
+)
 from shared.mcp_client_manager import MCPClientManager
 
-# Import MCP client libraries
-try:
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-except ImportError:
-    # Fallback if MCP not installed
-    ClientSession = None
-    StdioServerParameters = None
-    stdio_client = None
+# MCP client libraries are slow to import and most workers never talk to an
+# MCP server, so they are loaded on first use by _load_mcp_client_libraries().
+ClientSession = None
+StdioServerParameters = None
+stdio_client = None
 
 load_dotenv(override=True)
 
 
+# How often an in-flight LLM request heartbeats. Cancellation requested by the
+# workflow is only delivered to an activity through its heartbeats.
+LLM_HEARTBEAT_INTERVAL_SECONDS = 1.0
+
+
+async def acompletion(**kwargs):
+    """Call litellm.acompletion, importing litellm (several seconds) on first use."""
+    from litellm import acompletion as litellm_acompletion
+
+    return await litellm_acompletion(**kwargs)
+
+
+async def _cancellable_completion(**kwargs):
+    """Run an LLM request, heartbeating until it finishes.
+
+    When the workflow cancels the activity, the SDK cancels this coroutine
+    and the request task with it, which closes its HTTP connection instead
+    of waiting out (and paying for) the full generation.
+    """
+    request = asyncio.ensure_future(acompletion(**kwargs))
+    try:
+        while True:
+            done, _ = await asyncio.wait(
+                {request}, timeout=LLM_HEARTBEAT_INTERVAL_SECONDS
+            )
+            if done:
+                return request.result()
+            if activity.in_activity():
+                activity.heartbeat()
+    finally:
+        request.cancel()
+
+
+# LLM_RESPONSE_FORMAT values: "json_schema" enforces the reply's schema,
+# "json_object" only guarantees valid JSON, "off" relies on the prompt alone
+# and "auto" picks the strictest one the model supports.
+RESPONSE_FORMAT_MODES = ("auto", "json_schema", "json_object", "off")
+
+
+@lru_cache(maxsize=None)
+def supported_response_format(model: str) -> str:
+    """Strictest structured output mode litellm knows the model supports."""
+    import litellm
+
+    try:
+        if litellm.supports_response_schema(model=model):
+            return "json_schema"
+        if "response_format" in (
+            litellm.get_supported_openai_params(model=model) or []
+        ):
+            return "json_object"
+    except Exception:
+        # Unknown models and providers fall back to prompt-only JSON
+        pass
+    return "off"
+
+
+def build_response_format(schema_name: Optional[str], mode: str) -> Optional[dict]:
+    """litellm response_format for the named schema, or None for prompt-only JSON."""
+    if not schema_name or mode == "off":
+        return None
+    if mode == "json_object":
+        return {"type": "json_object"}
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": schema_name,
+            "schema": RESPONSE_SCHEMAS[schema_name],
+            # ToolData args are free-form, which strict mode doesn't allow
+            "strict": False,
+        },
+    }
+
+
+def _count_json_repair(method: str, succeeded: bool = True) -> None:
+    """Count a repaired LLM reply on the worker's Temporal metric meter.
+
+    method is "local" for replies fixed by shared.json_repair and "llm_call"
+    for replies that needed a follow-up LLM call. Each one saved an activity
+    retry and a full re-send of the prompt.
+    """
+    if not activity.in_activity():
+        return
+    activity.metric_meter().create_counter(
+        "agent_llm_json_repairs", "LLM replies that needed their JSON repaired"
+    ).add(1, {"method": method, "succeeded": succeeded})
+
+
+def _record_rate_limit_wait(model: str, seconds: float) -> None:
+    """Record how long an LLM call waited for the rate limiter, in ms.
+
+    Calls that didn't wait are recorded too, so the histogram shows what
+    share of calls the limits delay.
+    """
+    if not activity.in_activity():
+        return
+    activity.metric_meter().create_histogram(
+        "agent_llm_rate_limit_wait",
+        "Time LLM calls waited for the client-side rate limiter",
+        "ms",
+    ).record(int(seconds * 1000), {"model": model})
+
+
+def _rate_limit_wait_budget(completion_kwargs: Dict[str, Any]) -> Optional[float]:
+    """Seconds an LLM call may wait for the rate limiter and still send its
+    request, with the request's own timeout, before the activity times out."""
+    if not activity.in_activity():
+        return None
+    info = activity.info()
+    if info.start_to_close_timeout is None:
+        return None
+    deadline = (info.started_time + info.start_to_close_timeout).timestamp()
+    return deadline - time.time() - (completion_kwargs.get("timeout") or 0)
+
+
+def _load_mcp_client_libraries() -> None:
+    """Bind the MCP client names above, leaving any already set untouched."""
+    global ClientSession, StdioServerParameters, stdio_client
+    try:
+        import mcp
+        import mcp.client.stdio
+    except ImportError:
+        # Fallback if MCP not installed
+        return
+
+    if ClientSession is None:
+        ClientSession = mcp.ClientSession
+    if StdioServerParameters is None:
+        StdioServerParameters = mcp.StdioServerParameters
+    if stdio_client is None:
+        stdio_client = mcp.client.stdio.stdio_client
+
+
 class ToolActivities:
     def __init__(self, mcp_client_manager: MCPClientManager = None):
         """Initialize LLM client using LiteLLM and optional MCP client manager"""
         self.llm_model = os.environ.get("LLM_MODEL", "openai/gpt-4")
         self.llm_key = os.environ.get("LLM_KEY")
         self.llm_base_url = os.environ.get("LLM_BASE_URL")
+        self.llm_response_format = os.environ.get("LLM_RESPONSE_FORMAT", "auto")
+        if self.llm_response_format not in RESPONSE_FORMAT_MODES:
+            raise ValueError(
+                f"LLM_RESPONSE_FORMAT must be one of {RESPONSE_FORMAT_MODES}, "
+                f"got {self.llm_response_format!r}"
+            )
+        # models whose provider rejected response_format despite litellm's
+        # capability data; they fall back to prompt-only JSON
+        self.response_format_rejected_models = set()
+        self.llm_router = LLMRouter(self._complete)
+        self.llm_rate_limiter = create_rate_limiter(LLM_RATE_LIMIT_STORE)
         self.mcp_client_manager = mcp_client_manager
         print(f"Initializing ToolActivities with LLM model: {self.llm_model}")
         if self.llm_base_url:
@@ -98,7 +265,12 @@ class ToolActivities:
 
         # Call the LLM with the validation prompt
         prompt_input = ToolPromptInput(
-            prompt=validation_prompt, context_instructions=context_instructions
+            prompt=validation_prompt,
+            context_instructions=context_instructions,
+            response_schema=VALIDATION_SCHEMA,
+            llm_profile=llm_profile_for(
+                validation_input.agent_goal, VALIDATION_PROFILE
+            ),
         )
 
         result = await self.agent_toolPlanner(prompt_input)
@@ -124,17 +296,10 @@ class ToolActivities:
         ]
 
         try:
-            completion_kwargs = {
-                "model": self.llm_model,
-                "messages": messages,
-                "api_key": self.llm_key,
-            }
-
-            # Add base_url if configured
-            if self.llm_base_url:
-                completion_kwargs["base_url"] = self.llm_base_url
-
-            response = completion(**completion_kwargs)
+            profile_name = input.llm_profile or PLANNER_PROFILE
+            response = await self.complete_with_profile(
+                profile_name, messages, input.response_schema
+            )
 
             response_content = response.choices[0].message.content
             activity.logger.info(f"Raw LLM response: {repr(response_content)}")
@@ -148,17 +313,212 @@ class ToolActivities:
             response_content = self.sanitize_json_response(response_content)
             activity.logger.info(f"Sanitized response: {repr(response_content)}")
 
-            return self.parse_json_response(response_content)
+            required_keys = (
+                RESPONSE_SCHEMAS[input.response_schema]["required"]
+                if input.response_schema
+                else ()
+            )
+            try:
+                result, repaired = parse_llm_json(response_content, required_keys)
+            except TruncatedJSONError:
+                # Completing a cut off plan could change its arguments; let the
+                # activity retry with the whole prompt instead
+                activity.logger.warning("LLM response was truncated, retrying")
+                raise
+            except ValueError as e:
+                return await self.repair_json_response(
+                    response_content,
+                    e,
+                    profile_name,
+                    input.response_schema,
+                    required_keys,
+                )
+            if repaired:
+                activity.logger.info("Repaired malformed JSON in LLM response")
+                _count_json_repair("local")
+            return result
         except Exception as e:
             print(f"Error in LLM completion: {str(e)}")
+            classified = classify_error(e)
+            if classified is not None:
+                raise classified from e
+            raise
+
+    async def repair_json_response(
+        self,
+        response_content: str,
+        error: ValueError,
+        profile_name: str,
+        response_schema: Optional[str],
+        required_keys: Sequence[str],
+    ) -> dict:
+        """Ask the LLM once to fix a reply that couldn't be repaired locally.
+
+        Only the parse error and the bad reply are sent, not the original
+        prompt. If the fixed reply doesn't parse either, the original error is
+        raised and the activity is retried as before.
+        """
+        activity.logger.warning(f"LLM response is not valid JSON, repairing: {error}")
+        instructions = (
+            f"This reply could not be parsed as JSON ({error}):\n{response_content}"
+        )
+        if required_keys:
+            instructions += "\nIt must be a JSON object with the keys: " + ", ".join(
+                required_keys
+            )
+        repair_messages = [
+            {
+                "role": "system",
+                "content": "You fix malformed JSON. Reply with only the corrected "
+                "JSON object and no other text.",
+            },
+            {"role": "user", "content": instructions},
+        ]
+
+        response = await self.complete_with_profile(
+            profile_name, repair_messages, response_schema
+        )
+        repaired_content = self.sanitize_json_response(
+            response.choices[0].message.content or ""
+        )
+        try:
+            result, _ = parse_llm_json(repaired_content, required_keys)
+        except ValueError:
+            _count_json_repair("llm_call", succeeded=False)
+            raise error
+        _count_json_repair("llm_call")
+        return result
+
+    async def complete_with_profile(
+        self,
+        profile_name: str,
+        messages: List[Dict[str, Any]],
+        response_schema: Optional[str] = None,
+    ) -> Any:
+        """Send messages with the named profile, routing to its fallbacks."""
+        profile = get_llm_profile(profile_name)
+        candidates = []
+        # The profile itself first; fallbacks inherited from "default" may
+        # name it again
+        for candidate_name in dict.fromkeys((profile_name, *profile.fallbacks)):
+            completion_kwargs = self.get_completion_kwargs(candidate_name)
+            completion_kwargs["messages"] = messages
+            response_format = build_response_format(
+                response_schema,
+                self.get_response_format_mode(completion_kwargs["model"]),
+            )
+            if response_format:
+                completion_kwargs["response_format"] = response_format
+            candidates.append(RouteCandidate(candidate_name, completion_kwargs))
+
+        return await self.llm_router.route(
+            candidates, prefer_fastest=profile.prefer_fastest, hedge=profile.hedge
+        )
+
+    async def _complete(self, candidate: RouteCandidate) -> Any:
+        """One LLM request within the profile's rate limits."""
+        profile = get_llm_profile(candidate.profile_name)
+        completion_kwargs = candidate.completion_kwargs
+        model = completion_kwargs["model"]
+        tokens = estimate_tokens(completion_kwargs)
+        waited = await self.llm_rate_limiter.acquire(
+            model,
+            tokens,
+            requests_per_minute=profile.requests_per_minute,
+            tokens_per_minute=profile.tokens_per_minute,
+            max_wait=_rate_limit_wait_budget(completion_kwargs),
+        )
+        candidate.limiter_wait = waited
+        _record_rate_limit_wait(model, waited)
+        try:
+            response = await self._complete_with_fallback_format(completion_kwargs)
+        except Exception as e:
+            if getattr(e, "status_code", None) == 429:
+                # Hold every call to this model, not just this one's retry
+                await self.llm_rate_limiter.pause(model, retry_after_seconds(e))
             raise
+        usage = getattr(response, "usage", None)
+        await self.llm_rate_limiter.record_tokens(
+            model, tokens, getattr(usage, "total_tokens", None)
+        )
+        return response
+
+    async def _complete_with_fallback_format(
+        self, completion_kwargs: Dict[str, Any]
+    ) -> Any:
+        """One LLM request, retried without response_format if it's rejected.
+
+        Only a 400 that names response_format counts as a rejection; other
+        failures that mention it (an outage echoing the request) are raised.
+        """
+        try:
+            return await _cancellable_completion(**completion_kwargs)
+        except Exception as e:
+            if (
+                "response_format" not in completion_kwargs
+                or error_status_code(e) != 400
+                or "response_format" not in str(e)
+            ):
+                raise
+            # The provider rejected structured output after all; fall back to
+            # prompt-only JSON for the rest of this worker's life.
+            model = completion_kwargs["model"]
+            activity.logger.warning(
+                f"{model} rejected response_format, disabling it: {e}"
+            )
+            self.response_format_rejected_models.add(model)
+            completion_kwargs = dict(completion_kwargs)
+            del completion_kwargs["response_format"]
+            return await _cancellable_completion(**completion_kwargs)
+
+    def get_completion_kwargs(self, profile_name: str) -> Dict[str, Any]:
+        """litellm arguments for the named LLM profile (see shared.llm_profiles)."""
+        if profile_name not in LLM_PROFILES and profile_name not in (
+            VALIDATION_PROFILE,
+            PLANNER_PROFILE,
+            SUMMARY_PROFILE,
+        ):
+            activity.logger.warning(
+                f"Unknown LLM profile {profile_name!r}, using {DEFAULT_LLM_PROFILE!r}"
+            )
+        profile = get_llm_profile(profile_name)
+
+        completion_kwargs = {
+            "model": profile.model or self.llm_model,
+            "api_key": (
+                os.environ.get(profile.api_key_env)
+                if profile.api_key_env
+                else self.llm_key
+            ),
+        }
+        # Add base_url if configured
+        base_url = self.llm_base_url if profile.base_url is None else profile.base_url
+        if base_url:
+            completion_kwargs["base_url"] = base_url
+        if profile.max_tokens is not None:
+            completion_kwargs["max_tokens"] = profile.max_tokens
+        if profile.temperature is not None:
+            completion_kwargs["temperature"] = profile.temperature
+        if profile.timeout is not None:
+            completion_kwargs["timeout"] = profile.timeout
+        return completion_kwargs
+
+    def get_response_format_mode(self, model: Optional[str] = None) -> str:
+        """Structured output mode for a model, see LLM_RESPONSE_FORMAT."""
+        model = model or self.llm_model
+        if model in self.response_format_rejected_models:
+            return "off"
+        if self.llm_response_format == "auto":
+            return supported_response_format(model)
+        return self.llm_response_format
 
     def parse_json_response(self, response_content: str) -> dict:
         """
-        Parses the JSON response content and returns it as a dictionary.
+        Parses the JSON response content and returns it as a dictionary,
+        repairing common defects (see shared.json_repair).
         """
         try:
-            data = json.loads(response_content)
+            data, _ = parse_llm_json(response_content)
             return data
         except json.JSONDecodeError as e:
             print(f"Invalid JSON: {e}")
@@ -181,29 +541,7 @@ class ToolActivities:
         """gets env vars for workflow as an activity result so it's deterministic
         handles default/None
         """
-        output: EnvLookupOutput = EnvLookupOutput(
-            show_confirm=input.show_confirm_default, multi_goal_mode=False
-        )
-        show_confirm_value = os.getenv(input.show_confirm_env_var_name)
-        if show_confirm_value is None:
-            output.show_confirm = input.show_confirm_default
-        elif show_confirm_value is not None and show_confirm_value.lower() == "false":
-            output.show_confirm = False
-        else:
-            output.show_confirm = True
-
-        first_goal_value = os.getenv("AGENT_GOAL")
-        if first_goal_value is None:
-            output.multi_goal_mode = False  # default to single agent mode if unset
-        elif (
-            first_goal_value is not None
-            and first_goal_value.lower() == "goal_choose_agent_type"
-        ):
-            output.multi_goal_mode = True
-        else:
-            output.multi_goal_mode = False
-
-        return output
+        return lookup_env_settings(input)
 
     @activity.defn
     async def mcp_tool_activity(
@@ -259,10 +597,78 @@ class ToolActivities:
             }
 
 
+# Synchronous tool handlers run on thread pools so that a blocking HTTP or SDK
+# call never stalls the worker's event loop. The shared pool is normally the
+# worker's activity executor (see set_tool_executor); tools that declare
+# max_concurrency in tools.TOOL_HANDLERS get a dedicated pool of that size.
+DEFAULT_TOOL_EXECUTOR_MAX_WORKERS = 32
+_shared_tool_executor: Optional[Executor] = None
+_dedicated_tool_executors: Dict[str, ThreadPoolExecutor] = {}
+
+
+def set_tool_executor(executor: Executor) -> None:
+    """Use the given executor as the shared pool for synchronous tool handlers."""
+    global _shared_tool_executor
+    _shared_tool_executor = executor
+
+
+def shutdown_tool_executors() -> None:
+    """Shut down the dedicated per-tool pools created by this module."""
+    for executor in _dedicated_tool_executors.values():
+        executor.shutdown(wait=False, cancel_futures=True)
+    _dedicated_tool_executors.clear()
+
+
+def _get_tool_executor(tool_name: str, max_concurrency: Optional[int]) -> Executor:
+    global _shared_tool_executor
+    if max_concurrency:
+        executor = _dedicated_tool_executors.get(tool_name)
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_concurrency, thread_name_prefix=f"tool-{tool_name}"
+            )
+            _dedicated_tool_executors[tool_name] = executor
+        return executor
+
+    if _shared_tool_executor is None:
+        _shared_tool_executor = ThreadPoolExecutor(
+            max_workers=DEFAULT_TOOL_EXECUTOR_MAX_WORKERS, thread_name_prefix="tool"
+        )
+    return _shared_tool_executor
+
+
+async def run_tool_handler(tool_name: str, tool_args: Dict[str, Any]) -> dict:
+    """Run a native tool handler the way its tools.TOOL_HANDLERS entry asks."""
+    from tools import INLINE, TOOL_HANDLERS, get_handler, loaded_handler
+
+    spec = TOOL_HANDLERS.get(tool_name)
+    inline = spec is not None and spec.executor == INLINE
+    loop = asyncio.get_running_loop()
+    handler = loaded_handler(tool_name)
+    if handler is None and spec is not None and not inline:
+        # The first call imports the handler's module and its dependencies,
+        # which blocks, so it runs on the tool's executor too
+        handler = await loop.run_in_executor(
+            _get_tool_executor(tool_name, spec.max_concurrency),
+            get_handler,
+            tool_name,
+        )
+    elif handler is None:
+        handler = get_handler(tool_name)
+
+    if inspect.iscoroutinefunction(handler):
+        return await handler(tool_args)
+    if inline:
+        return handler(tool_args)
+
+    executor = _get_tool_executor(tool_name, spec.max_concurrency if spec else None)
+    # Copy the activity context so handlers can still use activity.logger etc.
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(executor, context.run, handler, tool_args)
+
+
 @activity.defn(dynamic=True)
 async def dynamic_tool_activity(args: Sequence[RawValue]) -> dict:
-    from tools import get_handler
-
     tool_name = activity.info().activity_type  # e.g. "FindEvents"
     tool_args = activity.payload_converter().from_payload(args[0].payload, dict)
     activity.logger.info(f"Running dynamic tool '{tool_name}' with args: {tool_args}")
@@ -276,11 +682,13 @@ async def dynamic_tool_activity(args: Sequence[RawValue]) -> dict:
         return await _execute_mcp_tool(tool_name, tool_args, server_definition)
     else:
         # This is a regular tool - delegate to the relevant function
-        handler = get_handler(tool_name)
-        if inspect.iscoroutinefunction(handler):
-            result = await handler(tool_args)
-        else:
-            result = handler(tool_args)
+        try:
+            result = await run_tool_handler(tool_name, tool_args)
+        except Exception as e:
+            classified = classify_tool_error(e)
+            if classified is not None:
+                raise classified from e
+            raise
 
         # Optionally log or augment the result
         activity.logger.info(f"Tool '{tool_name}' result: {result}")
@@ -365,6 +773,7 @@ async def _execute_mcp_tool(
 ) -> Dict[str, Any]:
     """Execute an MCP tool with the given arguments and server definition"""
     activity.logger.info(f"Executing MCP tool: {tool_name}")
+    _load_mcp_client_libraries()
 
     # Convert argument types for MCP tools
     converted_args = _convert_args_types(tool_args)
@@ -432,6 +841,7 @@ async def _execute_mcp_tool(
 @asynccontextmanager
 async def _stdio_connection(command: str, args: list, env: dict):
     """Create stdio connection to MCP server"""
+    _load_mcp_client_libraries()
     if stdio_client is None:
         raise ApplicationError("MCP client libraries not available")
 
@@ -449,6 +859,7 @@ async def mcp_list_tools(
     """List available MCP tools from the specified server"""
 
     activity.logger.info(f"Listing MCP tools for server: {server_definition.name}")
+    _load_mcp_client_libraries()
 
     connection = _build_connection(server_definition)
 
@@ -1,21 +1,36 @@
 import asyncio
 import os
-from typing import Optional
+from collections import deque
+from typing import Any, Optional
 
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from temporalio.api.enums.v1 import WorkflowExecutionStatus
 from temporalio.client import Client
-from temporalio.exceptions import TemporalError
+from temporalio.exceptions import TemporalError, WorkflowAlreadyStartedError
+from temporalio.service import RPCError, RPCStatusCode
 
 from goals import goal_list
 from models.data_types import AgentGoalWorkflowParams, CombinedInput
-from shared.config import TEMPORAL_TASK_QUEUE, get_temporal_client
-from workflows.agent_goal_workflow import AgentGoalWorkflow
+from shared.config import (
+    TEMPORAL_EAGER_WORKFLOW_START,
+    TEMPORAL_TASK_QUEUE,
+    get_temporal_client,
+    lookup_env_settings,
+)
+
+# The workflow is started by type name so the API process never imports the
+# workflow module (and with it the activity, LLM and tool code).
+AGENT_GOAL_WORKFLOW_TYPE = "AgentGoalWorkflow"
 
 app = FastAPI()
 temporal_client: Optional[Client] = None
+# Set in eager start mode: the worker running inside this process and its
+# resources, see start_embedded_worker()
+embedded_worker: Optional[Any] = None
+embedded_worker_task: Optional[asyncio.Task] = None
+embedded_worker_resources: list = []
 
 # Load environment variables
 load_dotenv()
@@ -35,6 +50,91 @@ def get_initial_agent_goal():
 async def startup_event():
     global temporal_client
     temporal_client = await get_temporal_client()
+    if TEMPORAL_EAGER_WORKFLOW_START:
+        await start_embedded_worker()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if embedded_worker is not None:
+        from activities.tool_activities import shutdown_tool_executors
+
+        await embedded_worker.shutdown()
+        await embedded_worker_task
+        mcp_client_manager, activity_executor = embedded_worker_resources
+        await mcp_client_manager.cleanup()
+        shutdown_tool_executors()
+        activity_executor.shutdown(wait=False)
+
+
+async def start_embedded_worker() -> None:
+    """Run the agent worker in this process, sharing the API's client.
+
+    Eager workflow start hands the first workflow task straight back to the
+    starting client's worker, so it needs one in the same process. The worker
+    modules are imported here so the API stays light when this mode is off.
+    """
+    global embedded_worker, embedded_worker_task, embedded_worker_resources
+    import concurrent.futures
+
+    from activities.tool_activities import ToolActivities
+    from shared.agent_worker import create_agent_worker
+    from shared.mcp_client_manager import MCPClientManager
+
+    mcp_client_manager = MCPClientManager()
+    activity_executor = concurrent.futures.ThreadPoolExecutor(max_workers=100)
+    embedded_worker = create_agent_worker(
+        temporal_client, ToolActivities(mcp_client_manager), activity_executor
+    )
+    embedded_worker_resources = [mcp_client_manager, activity_executor]
+    embedded_worker_task = asyncio.create_task(embedded_worker.run())
+    print(f"Embedded worker polling {TEMPORAL_TASK_QUEUE} for eager workflow start")
+
+
+async def start_agent_workflow(
+    workflow_id: str, combined_input: CombinedInput, prompt: str
+) -> None:
+    """Start the agent workflow with prompt, or signal it if already running."""
+    if not TEMPORAL_EAGER_WORKFLOW_START:
+        await temporal_client.start_workflow(
+            AGENT_GOAL_WORKFLOW_TYPE,
+            combined_input,
+            id=workflow_id,
+            task_queue=TEMPORAL_TASK_QUEUE,
+            start_signal="user_prompt",
+            start_signal_args=[prompt],
+        )
+        return
+
+    # Eager start isn't available for signal-with-start, so the first prompt
+    # goes in the workflow input instead of a start signal.
+    combined_input.tool_params.prompt_queue = deque([prompt])
+    try:
+        await temporal_client.start_workflow(
+            AGENT_GOAL_WORKFLOW_TYPE,
+            combined_input,
+            id=workflow_id,
+            task_queue=TEMPORAL_TASK_QUEUE,
+            request_eager_start=True,
+        )
+    except WorkflowAlreadyStartedError:
+        await temporal_client.get_workflow_handle(workflow_id).signal(
+            "user_prompt", prompt
+        )
+
+
+async def get_resume_input(workflow_id: str) -> Optional[CombinedInput]:
+    """Return the input that resumes the session if its last run hibernated.
+
+    A session idle for longer than its goal's idle_timeout_minutes summarizes
+    itself and completes; the next run starts from that summary.
+    """
+    try:
+        return await temporal_client.get_workflow_handle(workflow_id).query(
+            "get_resume_input", result_type=CombinedInput
+        )
+    except TemporalError:
+        return None
 
 
 app.add_middleware(
@@ -152,19 +252,22 @@ async def send_prompt(prompt: str):
         tool_params=AgentGoalWorkflowParams(None, None),
         agent_goal=get_initial_agent_goal(),
         # change to get from workflow query
+        env_settings=lookup_env_settings(),
     )
 
     workflow_id = "agent-workflow"
 
-    # Start (or signal) the workflow
-    await temporal_client.start_workflow(
-        AgentGoalWorkflow.run,
-        combined_input,
-        id=workflow_id,
-        task_queue=TEMPORAL_TASK_QUEUE,
-        start_signal="user_prompt",
-        start_signal_args=[prompt],
-    )
+    # Prompts usually go to a running session, so try the signal first and
+    # only start a new run (resuming a hibernated session) if there is none.
+    try:
+        await temporal_client.get_workflow_handle(workflow_id).signal(
+            "user_prompt", prompt
+        )
+    except RPCError as e:
+        if e.status != RPCStatusCode.NOT_FOUND:
+            raise
+        resume_input = await get_resume_input(workflow_id)
+        await start_agent_workflow(workflow_id, resume_input or combined_input, prompt)
 
     return {"message": f"Prompt '{prompt}' sent to workflow {workflow_id}."}
 
@@ -174,7 +277,13 @@ async def send_confirm():
     """Sends a 'confirm' signal to the workflow."""
     workflow_id = "agent-workflow"
     handle = temporal_client.get_workflow_handle(workflow_id)
-    await handle.signal("confirm")
+    try:
+        await handle.signal("confirm")
+    except RPCError as e:
+        if e.status != RPCStatusCode.NOT_FOUND:
+            raise
+        # The session ended or hibernated; there is no tool run left to confirm
+        raise HTTPException(status_code=404, detail="No running session to confirm.")
     return {"message": "Confirm signal sent."}
 
 
@@ -201,18 +310,14 @@ async def start_workflow():
     combined_input = CombinedInput(
         tool_params=AgentGoalWorkflowParams(None, None),
         agent_goal=initial_agent_goal,
+        env_settings=lookup_env_settings(),
     )
 
     workflow_id = "agent-workflow"
 
     # Start the workflow with the starter prompt from the goal
-    await temporal_client.start_workflow(
-        AgentGoalWorkflow.run,
-        combined_input,
-        id=workflow_id,
-        task_queue=TEMPORAL_TASK_QUEUE,
-        start_signal="user_prompt",
-        start_signal_args=["### " + initial_agent_goal.starter_prompt],
+    await start_agent_workflow(
+        workflow_id, combined_input, "### " + initial_agent_goal.starter_prompt
     )
 
     return {
@@ -12,6 +12,8 @@ goal_mcp_stripe = AgentGoal(
     agent_friendly_description="Manage Stripe operations via MCP",
     tools=[],  # Will be populated dynamically
     mcp_server_definition=get_stripe_mcp_server_definition(included_tools=[]),
+    # The Stripe server exposes far more tools than one turn needs
+    max_prompt_tools=8,
     description="Help manage Stripe operations for customer and product data by using the customers.read and products.read tools.",
     starter_prompt="Welcome! I can help you read Stripe customer and product information.",
     example_conversation_history="\n ".join(
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Any, Deque, Dict, List, Literal, Optional, Union
+from typing import Any, Deque, Dict, List, Literal, Optional, TypedDict, Union
 
 from models.tool_definitions import AgentGoal
 
@@ -14,6 +14,9 @@ class AgentGoalWorkflowParams:
 class CombinedInput:
     tool_params: AgentGoalWorkflowParams
     agent_goal: AgentGoal
+    # Resolved by the starter (see shared.config.lookup_env_settings) so the
+    # workflow can skip the get_wf_env_vars activity; None falls back to it.
+    env_settings: Optional["EnvLookupOutput"] = None
 
 
 Message = Dict[str, Union[str, Dict[str, Any]]]
@@ -21,10 +24,24 @@ ConversationHistory = Dict[str, List[Message]]
 NextStep = Literal["confirm", "question", "pick-new-goal", "done"]
 
 
+# ToolData as part of the workflow is what's accessible to the UI - see LLMResponse.jsx for example
+class ToolData(TypedDict, total=False):
+    next: NextStep
+    tool: str
+    args: Dict[str, Any]
+    response: str
+    force_confirm: bool = True
+
+
 @dataclass
 class ToolPromptInput:
     prompt: str
     context_instructions: str
+    # Name of the JSON schema in models.response_schemas.RESPONSE_SCHEMAS the
+    # reply must follow, where the LLM provider can enforce one
+    response_schema: Optional[str] = None
+    # Name of the shared.llm_profiles profile to call; None uses "planner"
+    llm_profile: Optional[str] = None
 
 
 @dataclass
@@ -55,3 +72,5 @@ class EnvLookupInput:
 class EnvLookupOutput:
     show_confirm: bool
     multi_goal_mode: bool
+    # GOAL_CATEGORIES, None when unset (all categories)
+    goal_categories: Optional[List[str]] = None
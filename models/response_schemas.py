@@ -0,0 +1,77 @@
+"""JSON schemas for structured LLM replies.
+
+The planner and validator ask providers that support it to enforce these
+schemas (see ToolActivities.agent_toolPlanner), so their replies parse as
+JSON without relying on the prompt alone. The schemas are generated from the
+data types the workflow reads the replies into.
+"""
+
+import dataclasses
+import typing
+from typing import Any, Dict, Iterable, Literal, Optional
+
+from models.data_types import ToolData, ValidationResult
+
+TOOL_DATA_SCHEMA = "tool_data"
+VALIDATION_SCHEMA = "validation"
+
+_JSON_TYPES = {bool: "boolean", int: "integer", float: "number", str: "string"}
+
+
+def json_schema_for_type(hint: Any) -> Dict[str, Any]:
+    """JSON schema for a single field type annotation."""
+    origin = typing.get_origin(hint)
+    if origin is Literal:
+        return {"type": "string", "enum": list(typing.get_args(hint))}
+    if origin is typing.Union:
+        args = [arg for arg in typing.get_args(hint) if arg is not type(None)]
+        return json_schema_for_type(args[0]) if len(args) == 1 else {}
+    if hint in _JSON_TYPES:
+        return {"type": _JSON_TYPES[hint]}
+    if hint is dict or origin is dict:
+        return {"type": "object"}
+    if hint is list or origin is list:
+        return {"type": "array"}
+    return {}
+
+
+def json_schema_for(
+    data_type: type,
+    required: Optional[Iterable[str]] = None,
+    exclude: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """Object schema for a dataclass or TypedDict.
+
+    Required fields default to the dataclass fields without defaults, or the
+    TypedDict's required keys.
+    """
+    hints = typing.get_type_hints(data_type)
+    properties = {
+        name: json_schema_for_type(hint)
+        for name, hint in hints.items()
+        if name not in exclude
+    }
+    if required is None:
+        if dataclasses.is_dataclass(data_type):
+            required = [
+                field.name
+                for field in dataclasses.fields(data_type)
+                if field.default is dataclasses.MISSING
+                and field.default_factory is dataclasses.MISSING
+            ]
+        else:
+            required = getattr(data_type, "__required_keys__", ())
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": [name for name in required if name in properties],
+    }
+
+
+RESPONSE_SCHEMAS: Dict[str, Dict[str, Any]] = {
+    # force_confirm is set by the workflow, not the LLM
+    TOOL_DATA_SCHEMA: json_schema_for(
+        ToolData, required=("next", "response"), exclude=("force_confirm",)
+    ),
+    VALIDATION_SCHEMA: json_schema_for(ValidationResult),
+}
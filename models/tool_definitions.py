@@ -39,3 +39,28 @@ class AgentGoal:
     starter_prompt: str = "Initial prompt to start the conversation"
     example_conversation_history: str = "Example conversation history to help the AI agent understand the context of the conversation"
     mcp_server_definition: Optional[MCPServerDefinition] = None
+    # Answer user messages that queue up while the agent is busy in one
+    # validation and planning pass instead of one pass per message
+    coalesce_user_prompts: bool = True
+    # Fill arguments the agent asked for from the user's reply without LLM
+    # calls when they can be read off it reliably; see shared/slot_extractors.py
+    local_slot_filling: bool = True
+    # Accept short replies to the agent ("yes", an email address...) without
+    # LLM validation; see shared/prompt_prevalidation.py
+    local_prevalidation: bool = True
+    # Describe only this many tools relevant to the recent conversation in
+    # planner prompts, plus the ones it is using; see shared/tool_retrieval.py.
+    # None describes every tool.
+    max_prompt_tools: Optional[int] = None
+    # For agent selection goals: switch straight to the goal a user's request
+    # clearly matches instead of choosing through LLM turns; see
+    # shared/goal_routing.py
+    direct_goal_routing: bool = True
+    # Minutes without input after which the session summarizes itself and
+    # completes; the next prompt resumes it from the summary. None keeps the
+    # session open until the chat ends.
+    idle_timeout_minutes: Optional[int] = None
+    # LLM profile name per kind of call ("validation", "planner", "summary"),
+    # see shared/llm_profiles.py. Unmapped calls use the profile named after
+    # their kind.
+    llm_profiles: Optional[Dict[str, str]] = None
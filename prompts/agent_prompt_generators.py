@@ -2,6 +2,8 @@ import json
 from typing import Optional
 
 from models.tool_definitions import AgentGoal
+from shared.tool_results import project_history, render_tool_result
+from shared.tool_retrieval import select_prompt_tools
 
 MULTI_GOAL_MODE: bool = None
 
@@ -19,6 +21,8 @@ def generate_genai_prompt(
     """
     prompt_lines = []
     set_multi_goal_mode_if_unset(multi_goal_mode)
+    tools = select_prompt_tools(agent_goal, conversation_history, raw_json)
+    tool_names = {tool.name for tool in tools}
 
     # Intro / Role
     prompt_lines.append(
@@ -33,7 +37,7 @@ def generate_genai_prompt(
         "This is the ongoing history to determine which tool and arguments to gather:"
     )
     prompt_lines.append("*BEGIN CONVERSATION HISTORY*")
-    prompt_lines.append(json.dumps(conversation_history, indent=2))
+    prompt_lines.append(json.dumps(project_history(conversation_history), indent=2))
     prompt_lines.append("*END CONVERSATION HISTORY*")
     prompt_lines.append(
         "REMINDER: You can use the conversation history to infer arguments for the tools."
@@ -57,12 +61,24 @@ def generate_genai_prompt(
             f"Connected to MCP Server: {agent_goal.mcp_server_definition.name}"
         )
         if mcp_tools_info and mcp_tools_info.get("success", False):
-            tools = mcp_tools_info.get("tools", {})
+            mcp_tools = mcp_tools_info.get("tools", {})
             server_name = mcp_tools_info.get("server_name", "Unknown")
-            prompt_lines.append(
-                f"MCP Tools loaded from {server_name} ({len(tools)} tools):"
-            )
-            for tool_name, tool_info in tools.items():
+            listed = {
+                tool_name: tool_info
+                for tool_name, tool_info in mcp_tools.items()
+                if tool_name in tool_names
+            }
+            if len(listed) < len(mcp_tools):
+                prompt_lines.append(
+                    f"MCP Tools loaded from {server_name} ({len(listed)} of "
+                    f"{len(mcp_tools)} tools; only those relevant to this "
+                    "conversation are listed):"
+                )
+            else:
+                prompt_lines.append(
+                    f"MCP Tools loaded from {server_name} ({len(listed)} tools):"
+                )
+            for tool_name, tool_info in listed.items():
                 prompt_lines.append(
                     f"  - {tool_name}: {tool_info.get('description', 'No description')}"
                 )
@@ -72,8 +88,8 @@ def generate_genai_prompt(
 
     # Tools Definitions
     prompt_lines.append("=== Tools Definitions ===")
-    prompt_lines.append(f"There are {len(agent_goal.tools)} available tools:")
-    prompt_lines.append(", ".join([t.name for t in agent_goal.tools]))
+    prompt_lines.append(f"There are {len(tools)} available tools:")
+    prompt_lines.append(", ".join([t.name for t in tools]))
     prompt_lines.append(f"Goal: {agent_goal.description}")
     prompt_lines.append(
         "CRITICAL: You MUST follow the complete sequence described in the Goal above. "
@@ -86,7 +102,7 @@ def generate_genai_prompt(
         "Only ask for arguments listed below. Do not add extra arguments."
     )
     prompt_lines.append("")
-    for tool in agent_goal.tools:
+    for tool in tools:
         prompt_lines.append(f"Tool name: {tool.name}")
         prompt_lines.append(f"  Description: {tool.description}")
         prompt_lines.append("  Required args:")
@@ -193,7 +209,7 @@ def generate_tool_completion_prompt(current_tool: str, dynamic_result: dict) ->
         str: A formatted prompt string for the agent to process the tool completion
     """
     return (
-        f"### The '{current_tool}' tool completed successfully with {dynamic_result}. "
+        f"### The '{current_tool}' tool completed successfully with {render_tool_result(current_tool, dynamic_result)}. "
         "INSTRUCTIONS: Parse this tool result as plain text, and use the system prompt containing the list of tools in sequence and the conversation history (and previous tool_results) to figure out next steps, if any. "
         "You will need to use the tool_results to auto-fill arguments for subsequent tools and also to figure out if all tools have been run. "
         '{"next": "<question|confirm|pick-new-goal|done>", "tool": "<tool_name or null>", "args": {"<arg1>": "<value1 or null>", "<arg2>": "<value2 or null>}, "response": "<plain text (can include \\n line breaks)>"}'
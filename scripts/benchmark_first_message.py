@@ -0,0 +1,143 @@
+"""Benchmark time to the first agent message for new sessions.
+
+Usage:
+    uv run scripts/benchmark_first_message.py [--sessions 20]
+
+Needs a Temporal server (e.g. `temporal server start-dev`, or the connection
+settings in .env). An in-process worker serves AgentGoalWorkflow with stub
+LLM activities, so only orchestration latency is measured. Each session is
+started the way api/main.py starts it: signal-with-start, and eager start
+with the prompt in the workflow input (TEMPORAL_EAGER_WORKFLOW_START=true).
+A signal-with-start run without env settings in the input shows the cost of
+the get_wf_env_vars bootstrap activity. The clock stops when the conversation history query returns the first agent
+message.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from collections import deque
+
+from temporalio import activity
+from temporalio.client import Client
+from temporalio.worker import Worker
+
+from goals import goal_list
+from models.data_types import (
+    AgentGoalWorkflowParams,
+    CombinedInput,
+    EnvLookupInput,
+    EnvLookupOutput,
+    ToolPromptInput,
+    ValidationInput,
+    ValidationResult,
+)
+from shared.config import get_temporal_client, lookup_env_settings
+from workflows.agent_goal_workflow import AgentGoalWorkflow
+from workflows.sandbox import create_workflow_runner
+
+
+@activity.defn(name="get_wf_env_vars")
+async def stub_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+    return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+
+@activity.defn(name="agent_validatePrompt")
+async def stub_validate_prompt(input: ValidationInput) -> ValidationResult:
+    return ValidationResult(validationResult=True, validationFailedReason={})
+
+
+@activity.defn(name="agent_toolPlanner")
+async def stub_tool_planner(input: ToolPromptInput) -> dict:
+    return {"next": "question", "response": "Hi! Where would you like to go?"}
+
+
+async def first_message_latency(
+    client: Client, task_queue: str, goal, eager: bool, resolve_env: bool = True
+) -> float:
+    workflow_id = f"benchmark-first-message-{uuid.uuid4()}"
+    prompt = "### " + goal.starter_prompt
+    params = AgentGoalWorkflowParams(None, None)
+    env_settings = lookup_env_settings() if resolve_env else None
+
+    start = time.perf_counter()
+    if eager:
+        params.prompt_queue = deque([prompt])
+        handle = await client.start_workflow(
+            AgentGoalWorkflow.run,
+            CombinedInput(
+                tool_params=params,
+                agent_goal=goal,
+                env_settings=env_settings,
+            ),
+            id=workflow_id,
+            task_queue=task_queue,
+            request_eager_start=True,
+        )
+    else:
+        handle = await client.start_workflow(
+            AgentGoalWorkflow.run,
+            CombinedInput(
+                tool_params=params,
+                agent_goal=goal,
+                env_settings=env_settings,
+            ),
+            id=workflow_id,
+            task_queue=task_queue,
+            start_signal="user_prompt",
+            start_signal_args=[prompt],
+        )
+
+    while True:
+        history = await handle.query(AgentGoalWorkflow.get_conversation_history)
+        if any(message["actor"] == "agent" for message in history["messages"]):
+            break
+        await asyncio.sleep(0.005)
+    elapsed = time.perf_counter() - start
+
+    await handle.signal(AgentGoalWorkflow.end_chat)
+    await handle.result()
+    return elapsed
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=20)
+    args = parser.parse_args()
+
+    client = await get_temporal_client()
+    task_queue = f"benchmark-first-message-{uuid.uuid4()}"
+    goal = goal_list[0]
+
+    async with Worker(
+        client,
+        task_queue=task_queue,
+        workflows=[AgentGoalWorkflow],
+        workflow_runner=create_workflow_runner(),
+        activities=[stub_get_wf_env_vars, stub_validate_prompt, stub_tool_planner],
+    ):
+        # Warm up the worker's pollers and sandbox before measuring
+        await first_message_latency(client, task_queue, goal, eager=False)
+
+        modes = [
+            ("signal-with-start + env activity", False, False),
+            ("signal-with-start", False, True),
+            ("eager start", True, True),
+        ]
+        for name, eager, resolve_env in modes:
+            samples = [
+                await first_message_latency(
+                    client, task_queue, goal, eager, resolve_env
+                )
+                for _ in range(args.sessions)
+            ]
+            print(
+                f"{name:>32}: p50 {statistics.median(samples) * 1000:.1f} ms, "
+                f"max {max(samples) * 1000:.1f} ms to first agent message"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""Benchmark per-turn LLM latency with one model versus tiered LLM profiles.
+
+Usage:
+    uv run scripts/benchmark_llm_profiles.py [--turns 20] [--large-latency 0.8] [--small-latency 0.15]
+
+Starts a local OpenAI-compatible stub server whose response time depends on
+the requested model, then runs agent turns (agent_validatePrompt followed by
+agent_toolPlanner) through litellm against it: first with every call on the
+large model, then with validation on the small model the way a "validation"
+profile in LLM_PROFILES_FILE would route it. No Temporal server or LLM
+provider is needed; the stub latencies stand in for real model speeds.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from temporalio.testing import ActivityEnvironment
+
+from activities.tool_activities import ToolActivities
+from goals import goal_list
+from models.data_types import ToolPromptInput, ValidationInput
+from models.response_schemas import TOOL_DATA_SCHEMA
+from shared import llm_profiles
+from shared.llm_profiles import DEFAULT_LLM_PROFILE, VALIDATION_PROFILE, LLMProfile
+
+LARGE_MODEL = "openai/stub-large"
+SMALL_MODEL = "openai/stub-small"
+
+
+def start_stub_server(latencies: dict) -> ThreadingHTTPServer:
+    """OpenAI-compatible server answering after latencies[model] seconds
+    (a number, or a function returning one per request)."""
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            latency = latencies[request["model"]]
+            time.sleep(latency() if callable(latency) else latency)
+            if "validationResult" in json.dumps(request["messages"]):
+                content = {"validationResult": True, "validationFailedReason": {}}
+            else:
+                content = {"next": "question", "response": "Where to?"}
+            body = json.dumps(
+                {
+                    "id": "stub",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": request["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": json.dumps(content),
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                    "usage": {
+                        "prompt_tokens": 1,
+                        "completion_tokens": 1,
+                        "total_tokens": 2,
+                    },
+                }
+            ).encode()
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up on the request, e.g. a cancelled hedge
+                pass
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def run_turns(activities: ToolActivities, turns: int) -> list:
+    goal = goal_list[0]
+    activity_env = ActivityEnvironment()
+    samples = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        await activity_env.run(
+            activities.agent_validatePrompt,
+            ValidationInput(
+                prompt="I'd like to go to Melbourne",
+                conversation_history={"messages": []},
+                agent_goal=goal,
+            ),
+        )
+        await activity_env.run(
+            activities.agent_toolPlanner,
+            ToolPromptInput(
+                prompt="I'd like to go to Melbourne",
+                context_instructions="You are a travel agent.",
+                response_schema=TOOL_DATA_SCHEMA,
+            ),
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--large-latency", type=float, default=0.8)
+    parser.add_argument("--small-latency", type=float, default=0.15)
+    args = parser.parse_args()
+
+    server = start_stub_server(
+        {
+            LARGE_MODEL.split("/", 1)[1]: args.large_latency,
+            SMALL_MODEL.split("/", 1)[1]: args.small_latency,
+        }
+    )
+    base_url = f"http://127.0.0.1:{server.server_port}/v1"
+    default = LLMProfile(model=LARGE_MODEL, base_url=base_url)
+    activities = ToolActivities()
+    activities.llm_key = "stub"
+    activities.llm_response_format = "off"
+
+    modes = [
+        ("single model", {DEFAULT_LLM_PROFILE: default}),
+        (
+            "tiered profiles",
+            {
+                DEFAULT_LLM_PROFILE: default,
+                VALIDATION_PROFILE: LLMProfile(
+                    model=SMALL_MODEL, base_url=base_url, max_tokens=300
+                ),
+            },
+        ),
+    ]
+    # Warm up litellm's import and HTTP client before measuring
+    llm_profiles.LLM_PROFILES.update(modes[0][1])
+    await run_turns(activities, 1)
+
+    for name, profiles in modes:
+        llm_profiles.LLM_PROFILES.clear()
+        llm_profiles.LLM_PROFILES.update(profiles)
+        samples = await run_turns(activities, args.turns)
+        print(
+            f"{name:>16}: p50 {statistics.median(samples) * 1000:.0f} ms, "
+            f"max {max(samples) * 1000:.0f} ms per turn (validation + planning)"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,100 @@
+"""Benchmark LLM tail latency with one provider versus hedged routing.
+
+Usage:
+    uv run scripts/benchmark_llm_router.py [--requests 200] [--slow-fraction 0.04]
+
+Starts two local OpenAI-compatible stub servers (see
+benchmark_llm_profiles.py). The primary usually answers in 0.2 s but
+--slow-fraction of its requests take 3 s; the secondary steadily takes
+0.45 s. Planner requests go through agent_toolPlanner first with the
+primary profile alone, then with the secondary as a hedged fallback
+(fallbacks: [secondary], hedge: true), which races a duplicate once a request
+outlasts the primary's p95. No Temporal server or LLM provider is needed.
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from temporalio.testing import ActivityEnvironment
+
+from activities.tool_activities import ToolActivities
+from models.data_types import ToolPromptInput
+from scripts.benchmark_llm_profiles import start_stub_server
+from shared import llm_profiles
+from shared.llm_profiles import DEFAULT_LLM_PROFILE, PLANNER_PROFILE, LLMProfile
+
+
+async def run_requests(activities: ToolActivities, requests: int) -> list:
+    activity_env = ActivityEnvironment()
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        await activity_env.run(
+            activities.agent_toolPlanner,
+            ToolPromptInput(
+                prompt="I'd like to go to Melbourne",
+                context_instructions="You are a travel agent.",
+            ),
+        )
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--slow-fraction", type=float, default=0.04)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    primary_server = start_stub_server(
+        {"primary": lambda: 3.0 if rng.random() < args.slow_fraction else 0.2}
+    )
+    secondary_server = start_stub_server({"secondary": 0.45})
+    primary = LLMProfile(
+        model="openai/primary",
+        base_url=f"http://127.0.0.1:{primary_server.server_port}/v1",
+    )
+    secondary = LLMProfile(
+        model="openai/secondary",
+        base_url=f"http://127.0.0.1:{secondary_server.server_port}/v1",
+    )
+    activities = ToolActivities()
+    activities.llm_key = "stub"
+    activities.llm_response_format = "off"
+
+    modes = [
+        ("primary only", {DEFAULT_LLM_PROFILE: primary, PLANNER_PROFILE: primary}),
+        (
+            "hedged fallback",
+            {
+                DEFAULT_LLM_PROFILE: primary,
+                PLANNER_PROFILE: LLMProfile(
+                    model=primary.model,
+                    base_url=primary.base_url,
+                    fallbacks=("secondary",),
+                    hedge=True,
+                ),
+                "secondary": secondary,
+            },
+        ),
+    ]
+    for name, profiles in modes:
+        llm_profiles.LLM_PROFILES.clear()
+        llm_profiles.LLM_PROFILES.update(profiles)
+        samples = await run_requests(activities, args.requests)
+        p95 = statistics.quantiles(samples, n=20)[-1]
+        print(
+            f"{name:>16}: p50 {statistics.median(samples) * 1000:.0f} ms, "
+            f"p95 {p95 * 1000:.0f} ms, max {max(samples) * 1000:.0f} ms per request"
+        )
+
+    primary_server.shutdown()
+    secondary_server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,89 @@
+"""Benchmark cheap tools as regular activities versus local activities.
+
+Usage:
+    uv run scripts/benchmark_local_tool_activities.py [--turns 50] [--tool GiveHint]
+
+Needs a Temporal server (e.g. `temporal server start-dev`, or the connection
+settings in .env). A small workflow runs the same in-memory tool --turns
+times through dynamic_tool_activity, first as regular activities and then as
+local activities (how handle_tool_execution runs tools routed with
+local=True). It reports the time per tool call and the history events each
+run produced.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import timedelta
+
+from temporalio import workflow
+from temporalio.worker import UnsandboxedWorkflowRunner, Worker
+
+from activities.tool_activities import dynamic_tool_activity
+from shared.config import get_temporal_client
+from shared.tool_routing import DEFAULT_TOOL_ROUTE
+
+TOOL_ARGS = {
+    "GiveHint": {"hint_total": 0},
+    "GuessLocation": {"address": "1 Main St", "city": "Austin", "state": "TX"},
+}
+
+
+@workflow.defn
+class ToolLoopWorkflow:
+    @workflow.run
+    async def run(self, tool_name: str, turns: int, local: bool) -> None:
+        for _ in range(turns):
+            if local:
+                await workflow.execute_local_activity(
+                    tool_name,
+                    TOOL_ARGS.get(tool_name, {}),
+                    start_to_close_timeout=DEFAULT_TOOL_ROUTE.start_to_close_timeout,
+                )
+            else:
+                await workflow.execute_activity(
+                    tool_name,
+                    TOOL_ARGS.get(tool_name, {}),
+                    start_to_close_timeout=DEFAULT_TOOL_ROUTE.start_to_close_timeout,
+                )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=50)
+    parser.add_argument("--tool", default="GiveHint")
+    args = parser.parse_args()
+
+    client = await get_temporal_client()
+    task_queue = f"benchmark-local-tools-{uuid.uuid4()}"
+
+    async with Worker(
+        client,
+        task_queue=task_queue,
+        workflows=[ToolLoopWorkflow],
+        activities=[dynamic_tool_activity],
+        workflow_runner=UnsandboxedWorkflowRunner(),
+    ):
+        for local in (False, True):
+            start = time.perf_counter()
+            handle = await client.start_workflow(
+                ToolLoopWorkflow.run,
+                args=[args.tool, args.turns, local],
+                id=f"benchmark-local-tools-{uuid.uuid4()}",
+                task_queue=task_queue,
+                execution_timeout=timedelta(minutes=5),
+            )
+            await handle.result()
+            elapsed = time.perf_counter() - start
+            events = len((await handle.fetch_history()).events)
+
+            name = "local activity" if local else "activity"
+            print(
+                f"{name:>14}: {elapsed / args.turns * 1000:.1f} ms per {args.tool} "
+                f"call, {events} history events for {args.turns} calls"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
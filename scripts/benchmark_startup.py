@@ -0,0 +1,83 @@
+"""Report `python -X importtime` totals for the API and worker entry points.
+
+Usage:
+    uv run scripts/benchmark_startup.py [--runs 3] [--top 10]
+
+Each entry point is imported in a fresh interpreter without being run, so the
+numbers reflect what an autoscaled pod pays before it can serve traffic.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ENTRY_POINTS = {
+    "api": "import api.main",
+    "worker": (
+        "import runpy; "
+        "runpy.run_path('scripts/run_worker.py', run_name='startup_benchmark')"
+    ),
+}
+
+# Modules that should only be loaded when they are actually needed.
+HEAVY_MODULES = ["litellm", "mcp", "pandas", "stripe", "requests"]
+
+
+def parse_importtime(stderr: str) -> dict[str, tuple[int, int]]:
+    """Map module name -> (self us, cumulative us) from -X importtime output."""
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return modules
+
+
+def profile(statement: str) -> dict[str, tuple[int, int]]:
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return parse_importtime(result.stderr)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    for name, statement in ENTRY_POINTS.items():
+        totals = []
+        modules: dict[str, tuple[int, int]] = {}
+        for _ in range(args.runs):
+            modules = profile(statement)
+            totals.append(sum(self_us for self_us, _ in modules.values()))
+
+        print(f"== {name}")
+        print(
+            f"total import time: median {statistics.median(totals) / 1000:.0f} ms "
+            f"over {args.runs} runs, {len(modules)} modules"
+        )
+        loaded = [m for m in HEAVY_MODULES if m in modules]
+        print(f"heavy modules loaded: {', '.join(loaded) or 'none'}")
+        print(f"top {args.top} by cumulative time:")
+        top = sorted(modules.items(), key=lambda item: item[1][1], reverse=True)
+        for module, (_, cumulative_us) in top[: args.top]:
+            print(f"  {cumulative_us / 1000:8.1f} ms  {module}")
+        print()
+
+
+if __name__ == "__main__":
+    main()
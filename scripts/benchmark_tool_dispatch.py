@@ -0,0 +1,79 @@
+"""Measure tool module import time and per-call tool dispatch overhead.
+
+Usage:
+    uv run scripts/benchmark_tool_dispatch.py [--iterations 200000]
+
+Import time is measured in a fresh interpreter so that nothing is cached.
+Dispatch overhead covers both ``tools.get_handler`` and the MCP-vs-native
+check that the workflow performs on every tool execution.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import timeit
+
+IMPORT_SNIPPET = (
+    "import time; t = time.perf_counter(); import tools; "
+    "print(time.perf_counter() - t)"
+)
+
+
+def measure_import_seconds(runs: int) -> list[float]:
+    samples = []
+    for _ in range(runs):
+        output = subprocess.check_output([sys.executable, "-c", IMPORT_SNIPPET])
+        samples.append(float(output.decode().strip().splitlines()[-1]))
+    return samples
+
+
+def measure_dispatch_ns(iterations: int) -> dict:
+    from models.tool_definitions import AgentGoal, MCPServerDefinition
+    from tools import get_handler
+    from workflows.workflow_helpers import is_mcp_tool
+
+    goal = AgentGoal(
+        id="bench",
+        category_tag="bench",
+        agent_name="bench",
+        agent_friendly_description="",
+        tools=[],
+        mcp_server_definition=MCPServerDefinition(
+            name="bench", command="python", args=["server.py"]
+        ),
+    )
+
+    # Warm up so lazily imported handler modules are loaded before timing.
+    get_handler("SearchFixtures")
+    get_handler("AddToCart")
+
+    def per_call_ns(fn) -> float:
+        return timeit.timeit(fn, number=iterations) / iterations * 1e9
+
+    return {
+        "get_handler (first entry)": per_call_ns(lambda: get_handler("SearchFixtures")),
+        "get_handler (last entry)": per_call_ns(lambda: get_handler("AddToCart")),
+        "is_mcp_tool (native)": per_call_ns(lambda: is_mcp_tool("AddToCart", goal)),
+        "is_mcp_tool (mcp)": per_call_ns(lambda: is_mcp_tool("list_products", goal)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200_000)
+    parser.add_argument("--import-runs", type=int, default=5)
+    args = parser.parse_args()
+
+    import_samples = measure_import_seconds(args.import_runs)
+    print(
+        f"import tools: median {statistics.median(import_samples) * 1000:.1f} ms "
+        f"over {args.import_runs} runs"
+    )
+
+    for name, ns in measure_dispatch_ns(args.iterations).items():
+        print(f"{name}: {ns:.0f} ns/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Benchmark tool latency and event-loop stalls while slow blocking tools run.
+
+Usage:
+    uv run scripts/benchmark_tool_executor.py [--slow-calls 20] [--slow-seconds 0.2]
+
+A blocking "slow" tool (time.sleep, standing in for requests/http.client/Stripe
+calls) is started --slow-calls times concurrently while a fast in-memory tool
+is called repeatedly and a ticker measures event-loop lag. This is run once
+with the slow tool executed inline on the event loop (how dynamic_tool_activity
+used to run every sync handler) and once on the worker thread pools.
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import tools
+from activities.tool_activities import run_tool_handler, shutdown_tool_executors
+from tools import INLINE, THREAD, ToolHandlerSpec
+
+
+def percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def measure(slow_executor: str, slow_calls: int, slow_seconds: float) -> None:
+    def slow_tool(args: dict) -> dict:
+        time.sleep(slow_seconds)
+        return {"slow": True}
+
+    def fast_tool(args: dict) -> dict:
+        return {"fast": True}
+
+    tools.TOOL_HANDLERS["BenchSlow"] = ToolHandlerSpec(
+        "bench", "slow_tool", executor=slow_executor, max_concurrency=slow_calls
+    )
+    tools.TOOL_HANDLERS["BenchFast"] = ToolHandlerSpec(
+        "bench", "fast_tool", executor=INLINE
+    )
+    tools._loaded_handlers["BenchSlow"] = slow_tool
+    tools._loaded_handlers["BenchFast"] = fast_tool
+
+    lags: list[float] = []
+    fast_latencies: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker() -> None:
+        interval = 0.005
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            lags.append(time.perf_counter() - start - interval)
+
+    async def fast_caller() -> None:
+        while not done.is_set():
+            start = time.perf_counter()
+            await run_tool_handler("BenchFast", {})
+            fast_latencies.append(time.perf_counter() - start)
+            await asyncio.sleep(0.01)
+
+    async def slow_callers() -> None:
+        await asyncio.sleep(0.02)
+        await asyncio.gather(
+            *(run_tool_handler("BenchSlow", {}) for _ in range(slow_calls))
+        )
+        done.set()
+
+    start = time.perf_counter()
+    await asyncio.gather(ticker(), fast_caller(), slow_callers())
+    elapsed = time.perf_counter() - start
+
+    # A fast call issued while the loop is blocked waits for the loop first, so
+    # loop lag is what the other activities and workflow tasks experience.
+    print(f"== slow tool executor: {slow_executor}")
+    print(f"  wall time for {slow_calls} slow calls: {elapsed:.2f}s")
+    print(
+        f"  event-loop lag: p50 {statistics.median(lags) * 1000:.1f} ms, "
+        f"p99 {percentile(lags, 0.99) * 1000:.1f} ms, max {max(lags) * 1000:.1f} ms"
+    )
+    print(
+        f"  fast tool calls completed during the run: {len(fast_latencies)} "
+        f"(p99 {percentile(fast_latencies, 0.99) * 1e6:.0f} us)"
+    )
+
+    shutdown_tool_executors()
+    for name in ("BenchSlow", "BenchFast"):
+        del tools.TOOL_HANDLERS[name]
+        del tools._loaded_handlers[name]
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--slow-calls", type=int, default=20)
+    parser.add_argument("--slow-seconds", type=float, default=0.2)
+    args = parser.parse_args()
+
+    await measure(INLINE, args.slow_calls, args.slow_seconds)
+    await measure(THREAD, args.slow_calls, args.slow_seconds)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,87 @@
+"""Benchmark workflow task throughput with 1 versus N worker processes.
+
+Usage:
+    uv run scripts/benchmark_worker_processes.py [--sessions 2000] [--processes N]
+
+Workflow tasks are CPU bound inside a worker: history and payload
+deserialization, prompt construction and sandboxed workflow code. This
+replays synthetic first-turn histories (see benchmark_workflow_sandbox.py)
+split across 1 process and then across --processes processes (default: one
+per CPU), the same way scripts/run_worker.py --processes spreads workflow
+tasks. Each process imports and builds its histories before a shared start
+barrier, so only replay time is measured. No Temporal server is needed.
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+from scripts.benchmark_workflow_sandbox import first_turn_history, replay_chunk
+
+
+def replay_sessions(sessions: int, start, results) -> None:
+    from goals import goal_list
+    from models.data_types import AgentGoalWorkflowParams, CombinedInput
+    from workflows.sandbox import create_workflow_runner
+
+    combined_input = CombinedInput(
+        tool_params=AgentGoalWorkflowParams(None, None), agent_goal=goal_list[0]
+    )
+    histories = [
+        first_turn_history(f"session-{os.getpid()}-{i}", combined_input)
+        for i in range(sessions)
+    ]
+    runner = create_workflow_runner()
+    # Warm up the sandbox so import costs don't count towards throughput
+    asyncio.run(replay_chunk(runner, histories[:1]))
+
+    start.wait()
+    asyncio.run(replay_chunk(runner, histories))
+    results.put(sessions)
+
+
+def run(processes: int, sessions: int) -> float:
+    ctx = multiprocessing.get_context("spawn")
+    start = ctx.Barrier(processes + 1)
+    results = ctx.Queue()
+    per_process = [sessions // processes] * processes
+    per_process[0] += sessions % processes
+
+    workers = [
+        ctx.Process(target=replay_sessions, args=(count, start, results))
+        for count in per_process
+    ]
+    for worker in workers:
+        worker.start()
+
+    start.wait()
+    began = time.perf_counter()
+    completed = sum(results.get() for _ in workers)
+    elapsed = time.perf_counter() - began
+    for worker in workers:
+        worker.join()
+
+    throughput = completed / elapsed
+    print(
+        f"{processes} process(es): {completed} workflow tasks in {elapsed:.2f}s "
+        f"({throughput:.0f}/s)"
+    )
+    return throughput
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=2000)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"CPUs available: {os.cpu_count()}")
+    single = run(1, args.sessions)
+    multi = run(args.processes, args.sessions)
+    print(f"speedup: {multi / single:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
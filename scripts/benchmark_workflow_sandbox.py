@@ -0,0 +1,123 @@
+"""Benchmark workflow instantiation and replay cost under the workflow sandbox.
+
+Usage:
+    uv run scripts/benchmark_workflow_sandbox.py [--sessions 1000] [--concurrency 10]
+
+Builds a synthetic first-turn history for each session (workflow started,
+first workflow task started) and replays all of them with the SDK's default
+sandbox runner and with the curated runner from workflows/sandbox.py. Each
+replay instantiates AgentGoalWorkflow in a fresh sandbox and runs its first
+workflow task, which is the per-session cost a worker pays on cache misses.
+No Temporal server is needed.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+
+from temporalio.api.common.v1 import Payloads, WorkflowType
+from temporalio.api.enums.v1 import EventType
+from temporalio.api.history.v1 import (
+    HistoryEvent,
+    WorkflowExecutionStartedEventAttributes,
+    WorkflowTaskScheduledEventAttributes,
+    WorkflowTaskStartedEventAttributes,
+)
+from temporalio.api.taskqueue.v1 import TaskQueue
+from temporalio.client import WorkflowHistory
+from temporalio.converter import DataConverter
+from temporalio.worker import Replayer
+from temporalio.worker.workflow_sandbox import SandboxedWorkflowRunner
+
+from goals import goal_list
+from models.data_types import AgentGoalWorkflowParams, CombinedInput
+from workflows.agent_goal_workflow import AgentGoalWorkflow
+from workflows.sandbox import create_workflow_runner
+
+
+def first_turn_history(workflow_id: str, combined_input: CombinedInput):
+    task_queue = TaskQueue(name="benchmark")
+    payloads = DataConverter.default.payload_converter.to_payloads([combined_input])
+    events = [
+        HistoryEvent(
+            event_id=1,
+            event_type=EventType.EVENT_TYPE_WORKFLOW_EXECUTION_STARTED,
+            workflow_execution_started_event_attributes=WorkflowExecutionStartedEventAttributes(
+                workflow_type=WorkflowType(name="AgentGoalWorkflow"),
+                task_queue=task_queue,
+                input=Payloads(payloads=payloads),
+                original_execution_run_id=str(uuid.uuid4()),
+            ),
+        ),
+        HistoryEvent(
+            event_id=2,
+            event_type=EventType.EVENT_TYPE_WORKFLOW_TASK_SCHEDULED,
+            workflow_task_scheduled_event_attributes=WorkflowTaskScheduledEventAttributes(
+                task_queue=task_queue
+            ),
+        ),
+        HistoryEvent(
+            event_id=3,
+            event_type=EventType.EVENT_TYPE_WORKFLOW_TASK_STARTED,
+            workflow_task_started_event_attributes=WorkflowTaskStartedEventAttributes(
+                scheduled_event_id=2
+            ),
+        ),
+    ]
+    for event in events:
+        event.event_time.GetCurrentTime()
+    return WorkflowHistory(workflow_id, events)
+
+
+async def replay_chunk(runner: SandboxedWorkflowRunner, histories: list) -> None:
+    async def history_iter():
+        for history in histories:
+            yield history
+
+    replayer = Replayer(workflows=[AgentGoalWorkflow], workflow_runner=runner)
+    async with replayer.workflow_replay_iterator(history_iter()) as results:
+        async for result in results:
+            if result.replay_failure:
+                raise result.replay_failure
+
+
+async def run(
+    name: str, runner: SandboxedWorkflowRunner, sessions: int, concurrency: int
+) -> None:
+    combined_input = CombinedInput(
+        tool_params=AgentGoalWorkflowParams(None, None), agent_goal=goal_list[0]
+    )
+    histories = [
+        first_turn_history(f"session-{i}", combined_input) for i in range(sessions)
+    ]
+    chunks = [histories[i::concurrency] for i in range(concurrency)]
+
+    start = time.perf_counter()
+    await asyncio.gather(*(replay_chunk(runner, chunk) for chunk in chunks))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{name}: {sessions} sessions in {elapsed:.2f}s "
+        f"({elapsed / sessions * 1000:.2f} ms/session, {sessions / elapsed:.0f}/s)"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+
+    await run("default sandbox", SandboxedWorkflowRunner(), args.sessions, 1)
+    await run("curated sandbox", create_workflow_runner(), args.sessions, 1)
+    await run(
+        f"curated sandbox x{args.concurrency} replayers",
+        create_workflow_runner(),
+        args.sessions,
+        args.concurrency,
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
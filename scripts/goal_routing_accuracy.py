@@ -0,0 +1,59 @@
+"""Report how the local goal router (shared/goal_routing.py) handles the
+opening requests of the goals' example conversations.
+
+Usage:
+    uv run scripts/goal_routing_accuracy.py [--verbose]
+
+Routes the first user message of every routable goal's example conversation,
+plus a few messages that name no goal and must fall back to the agent
+selection flow. Routed messages skip the ListAgents and ChangeGoal LLM turns;
+misrouted ones would put the user in front of the wrong agent.
+"""
+
+import argparse
+
+from goals import goal_list
+from shared.goal_routing import routable_goals, route_goal
+
+NO_GOAL_MESSAGES = [
+    "hi",
+    "what can you do?",
+    "which agents are there?",
+    "I need some help",
+    "yes",
+]
+
+
+def opening_request(goal) -> str:
+    lines = [line.strip() for line in goal.example_conversation_history.split("\n")]
+    user_messages = [
+        line.split(":", 1)[1].strip() for line in lines if line.startswith("user:")
+    ]
+    return user_messages[0] if user_messages else ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    goals = routable_goals(goal_list)
+    cases = [(opening_request(goal), goal.id) for goal in goals]
+    cases += [(message, None) for message in NO_GOAL_MESSAGES]
+
+    routed = wrong = 0
+    for message, expected in cases:
+        goal = route_goal(message, goals)
+        goal_id = goal.id if goal else None
+        routed += goal_id is not None and goal_id == expected
+        wrong += goal_id is not None and goal_id != expected
+        if args.verbose:
+            print(f"{str(goal_id):50} {message}")
+    print(
+        f"{routed} of {len(goals)} opening requests routed directly, "
+        f"{wrong} of {len(cases)} messages misrouted"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Report how many user replies skip LLM validation through the local
+pre-validator (shared/prompt_prevalidation.py).
+
+Usage:
+    uv run scripts/prevalidation_hit_rate.py [--verbose]
+
+Replays the user turns of every goal's example conversation. The first
+message of each conversation is left out, because the workflow always
+validates a prompt that isn't a reply to the agent. Running workers report
+the same figure as the agent_prompt_prevalidations metric.
+"""
+
+import argparse
+
+from goals import goal_list
+from shared.prompt_prevalidation import is_trivially_valid
+
+
+def example_replies(goal) -> list:
+    lines = [line.strip() for line in goal.example_conversation_history.split("\n")]
+    user_messages = [
+        line.split(":", 1)[1].strip() for line in lines if line.startswith("user:")
+    ]
+    return user_messages[1:]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    replies = [reply for goal in goal_list for reply in example_replies(goal)]
+    accepted = [reply for reply in replies if is_trivially_valid(reply)]
+    if args.verbose:
+        for reply in replies:
+            verdict = "local" if reply in accepted else "llm  "
+            print(f"{verdict} {reply}")
+    print(
+        f"{len(accepted)} of {len(replies)} replies accepted locally "
+        f"({len(accepted) / len(replies):.0%}), "
+        f"{len(replies) - len(accepted)} sent to LLM validation"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -3,7 +3,11 @@ import concurrent.futures
 
 from temporalio.worker import Worker
 
-from activities.tool_activities import dynamic_tool_activity
+from activities.tool_activities import (
+    dynamic_tool_activity,
+    set_tool_executor,
+    shutdown_tool_executors,
+)
 from shared.config import TEMPORAL_LEGACY_TASK_QUEUE, get_temporal_client
 
 
@@ -13,6 +17,7 @@ async def main():
 
     # Run the worker
     with concurrent.futures.ThreadPoolExecutor(max_workers=100) as activity_executor:
+        set_tool_executor(activity_executor)
         worker = Worker(
             client,
             task_queue=TEMPORAL_LEGACY_TASK_QUEUE,
@@ -25,7 +30,10 @@ async def main():
         print(
             f"Starting legacy worker, connecting to task queue: {TEMPORAL_LEGACY_TASK_QUEUE}"
         )
-        await worker.run()
+        try:
+            await worker.run()
+        finally:
+            shutdown_tool_executors()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+import os
+import sys
+from typing import Optional
+
+from dotenv import load_dotenv
+from temporalio.worker import Worker
+
+from activities.tool_activities import ToolActivities
+from shared.config import TEMPORAL_LLM_TASK_QUEUE, get_temporal_client
+
+
+def _optional_float(name: str) -> Optional[float]:
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+async def main():
+    # Load environment variables
+    load_dotenv(override=True)
+
+    if not TEMPORAL_LLM_TASK_QUEUE:
+        print(
+            "TEMPORAL_LLM_TASK_QUEUE is not set, so LLM activities run on the main "
+            "worker (scripts/run_worker.py). Set it for both workers to use a "
+            "dedicated LLM worker pool."
+        )
+        sys.exit(1)
+
+    # Concurrency for this process; scale out by running more LLM workers.
+    max_concurrent_activities = int(os.getenv("LLM_WORKER_MAX_CONCURRENT", "50"))
+    # Optional per-worker and task-queue-wide (enforced by the server) limits,
+    # in activities per second, to stay under provider rate limits.
+    max_activities_per_second = _optional_float("LLM_WORKER_ACTIVITIES_PER_SECOND")
+    max_task_queue_activities_per_second = _optional_float(
+        "LLM_TASK_QUEUE_ACTIVITIES_PER_SECOND"
+    )
+
+    llm_model = os.environ.get("LLM_MODEL", "openai/gpt-4")
+    print(f"LLM worker will use LLM model: {llm_model}")
+
+    client = await get_temporal_client()
+    activities = ToolActivities()
+
+    logging.basicConfig(level=logging.INFO)
+
+    worker = Worker(
+        client,
+        task_queue=TEMPORAL_LLM_TASK_QUEUE,
+        activities=[
+            activities.agent_validatePrompt,
+            activities.agent_toolPlanner,
+        ],
+        max_concurrent_activities=max_concurrent_activities,
+        max_activities_per_second=max_activities_per_second,
+        max_task_queue_activities_per_second=max_task_queue_activities_per_second,
+    )
+
+    print(
+        f"Starting LLM worker, connecting to task queue: {TEMPORAL_LLM_TASK_QUEUE} "
+        f"(max concurrent activities: {max_concurrent_activities})"
+    )
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
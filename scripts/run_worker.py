@@ -1,22 +1,132 @@
+import argparse
 import asyncio
 import concurrent.futures
 import logging
+import multiprocessing
+import multiprocessing.connection
 import os
+import signal
+import sys
+import time
+from dataclasses import dataclass, replace
+from typing import Any, Callable, Dict, List, Optional
 
 from dotenv import load_dotenv
-from temporalio.worker import Worker
+from temporalio.worker import ResourceBasedSlotConfig, WorkerTuner
 
-from activities.tool_activities import (
-    ToolActivities,
-    dynamic_tool_activity,
-    mcp_list_tools,
-)
+from activities.tool_activities import ToolActivities, shutdown_tool_executors
+from shared.agent_worker import WORKER_GRACEFUL_SHUTDOWN_TIMEOUT, create_agent_worker
 from shared.config import TEMPORAL_TASK_QUEUE, get_temporal_client
 from shared.mcp_client_manager import MCPClientManager
-from workflows.agent_goal_workflow import AgentGoalWorkflow
 
+# The supervisor waits a little longer than a worker's graceful shutdown.
+SUPERVISOR_SHUTDOWN_GRACE_SECONDS = WORKER_GRACEFUL_SHUTDOWN_TIMEOUT.total_seconds() + 5
 
-async def main():
+
+@dataclass(frozen=True)
+class WorkerTuningProfile:
+    """Worker slot, cache and poller settings; None keeps the SDK default."""
+
+    description: str
+    max_cached_workflows: Optional[int] = None
+    max_concurrent_workflow_task_polls: Optional[int] = None
+    max_concurrent_activity_task_polls: Optional[int] = None
+    tuner: Optional[Callable[[], WorkerTuner]] = None
+
+    def worker_options(self) -> Dict[str, Any]:
+        options: Dict[str, Any] = {
+            name: value
+            for name, value in (
+                ("max_cached_workflows", self.max_cached_workflows),
+                (
+                    "max_concurrent_workflow_task_polls",
+                    self.max_concurrent_workflow_task_polls,
+                ),
+                (
+                    "max_concurrent_activity_task_polls",
+                    self.max_concurrent_activity_task_polls,
+                ),
+            )
+            if value is not None
+        }
+        if self.tuner:
+            options["tuner"] = self.tuner()
+        return options
+
+
+# See docs/setup.md for when to pick each profile.
+WORKER_TUNING_PROFILES: Dict[str, WorkerTuningProfile] = {
+    "default": WorkerTuningProfile("SDK defaults"),
+    # Slots are always available and every session stays cached, so a new
+    # prompt never waits for a slot, a poller or a history replay.
+    "latency": WorkerTuningProfile(
+        "fixed slots, large workflow cache, extra pollers",
+        max_cached_workflows=2000,
+        max_concurrent_workflow_task_polls=10,
+        max_concurrent_activity_task_polls=10,
+        tuner=lambda: WorkerTuner.create_fixed(
+            workflow_slots=100, activity_slots=200, local_activity_slots=200
+        ),
+    ),
+    # Slots grow while CPU and memory allow, to pack as many sessions as
+    # possible onto each host.
+    "throughput": WorkerTuningProfile(
+        "resource-based slots up to 80% memory / 90% CPU, many pollers",
+        max_cached_workflows=5000,
+        max_concurrent_workflow_task_polls=20,
+        max_concurrent_activity_task_polls=20,
+        tuner=lambda: WorkerTuner.create_resource_based(
+            target_memory_usage=0.8,
+            target_cpu_usage=0.9,
+            workflow_config=ResourceBasedSlotConfig(minimum_slots=5, maximum_slots=500),
+            activity_config=ResourceBasedSlotConfig(
+                minimum_slots=10, maximum_slots=500
+            ),
+        ),
+    ),
+    # Small cache and few slots for constrained containers; evicted sessions
+    # are replayed from history on their next prompt.
+    "low-memory": WorkerTuningProfile(
+        "few fixed slots, small workflow cache, minimal pollers",
+        max_cached_workflows=50,
+        max_concurrent_workflow_task_polls=2,
+        max_concurrent_activity_task_polls=2,
+        tuner=lambda: WorkerTuner.create_fixed(
+            workflow_slots=5, activity_slots=20, local_activity_slots=20
+        ),
+    ),
+}
+
+
+def _optional_int(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+
+def get_tuning_profile(name: str) -> WorkerTuningProfile:
+    """Look up a profile and apply WORKER_* environment overrides to it."""
+    if name not in WORKER_TUNING_PROFILES:
+        raise ValueError(
+            f"Unknown worker profile {name!r}; "
+            f"choose one of {', '.join(sorted(WORKER_TUNING_PROFILES))}"
+        )
+    profile = WORKER_TUNING_PROFILES[name]
+    overrides = {
+        "max_cached_workflows": _optional_int("WORKER_MAX_CACHED_WORKFLOWS"),
+        "max_concurrent_workflow_task_polls": _optional_int(
+            "WORKER_WORKFLOW_TASK_POLLS"
+        ),
+        "max_concurrent_activity_task_polls": _optional_int(
+            "WORKER_ACTIVITY_TASK_POLLS"
+        ),
+    }
+    return replace(
+        profile,
+        **{field: value for field, value in overrides.items() if value is not None},
+    )
+
+
+async def main(profile_name: str = "default"):
     # Load environment variables
     load_dotenv(override=True)
 
@@ -55,6 +165,9 @@ async def main():
             print("the model is loaded on-demand.")
             print("===========================================================\n")
 
+    tuning_profile = get_tuning_profile(profile_name)
+    print(f"Worker tuning profile: {profile_name} ({tuning_profile.description})")
+
     print("Worker ready to process tasks!")
     logging.basicConfig(level=logging.INFO)
 
@@ -63,27 +176,121 @@ async def main():
         with concurrent.futures.ThreadPoolExecutor(
             max_workers=100
         ) as activity_executor:
-            worker = Worker(
+            worker = create_agent_worker(
                 client,
-                task_queue=TEMPORAL_TASK_QUEUE,
-                workflows=[AgentGoalWorkflow],
-                activities=[
-                    activities.agent_validatePrompt,
-                    activities.agent_toolPlanner,
-                    activities.get_wf_env_vars,
-                    activities.mcp_tool_activity,
-                    dynamic_tool_activity,
-                    mcp_list_tools,
-                ],
-                activity_executor=activity_executor,
+                activities,
+                activity_executor,
+                **tuning_profile.worker_options(),
             )
 
+            # Stop polling and drain in-flight tasks on SIGTERM/SIGINT, which
+            # is also how the supervisor stops its worker processes.
+            stop = asyncio.Event()
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, stop.set)
+
             print(f"Starting worker, connecting to task queue: {TEMPORAL_TASK_QUEUE}")
-            await worker.run()
+            async with worker:
+                await stop.wait()
+                print("Shutting down worker...")
     finally:
         # Cleanup MCP connections when worker shuts down
         await mcp_client_manager.cleanup()
+        shutdown_tool_executors()
+
+
+def _run_worker_process(profile_name: str) -> None:
+    asyncio.run(main(profile_name))
+
+
+def supervise(processes: int, profile_name: str = "default") -> int:
+    """Run processes worker processes and stop them all together.
+
+    Each process is spawned fresh, so it has its own Temporal client, MCP
+    client pool and tool executors. SIGTERM/SIGINT to the supervisor is
+    forwarded to every worker for a graceful shutdown. If a worker exits on
+    its own the rest are stopped too, leaving restarts to the process manager
+    (Docker, systemd, ...).
+    """
+    ctx = multiprocessing.get_context("spawn")
+    workers: List[multiprocessing.Process] = []
+    stopping = False
+
+    def stop_workers(*_args) -> None:
+        nonlocal stopping
+        stopping = True
+        for process in workers:
+            if process.is_alive():
+                process.terminate()  # SIGTERM
+
+    signal.signal(signal.SIGTERM, stop_workers)
+    signal.signal(signal.SIGINT, stop_workers)
+
+    for index in range(processes):
+        process = ctx.Process(
+            target=_run_worker_process,
+            args=(profile_name,),
+            name=f"agent-worker-{index}",
+            daemon=False,
+        )
+        process.start()
+        workers.append(process)
+    print(f"Supervisor started {processes} worker processes")
+
+    exit_code = 0
+    while not stopping:
+        multiprocessing.connection.wait(
+            [process.sentinel for process in workers], timeout=0.5
+        )
+        for process in workers:
+            if process.exitcode is not None and not stopping:
+                print(
+                    f"{process.name} exited with code {process.exitcode}; "
+                    "stopping the remaining workers"
+                )
+                exit_code = process.exitcode or 1
+                stop_workers()
+
+    deadline = time.monotonic() + SUPERVISOR_SHUTDOWN_GRACE_SECONDS
+    for process in workers:
+        process.join(timeout=max(0.0, deadline - time.monotonic()))
+        if process.is_alive():
+            print(f"{process.name} did not stop in time; killing it")
+            process.kill()
+            process.join()
+    return exit_code
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run the agent Temporal worker.")
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="?",
+        const=os.cpu_count() or 1,
+        default=int(os.getenv("WORKER_PROCESSES", "1")),
+        help="Number of worker processes to supervise; without a value, one per "
+        "CPU (default: WORKER_PROCESSES or 1)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(WORKER_TUNING_PROFILES),
+        default=os.getenv("WORKER_PROFILE", "default"),
+        help="Worker tuning profile (default: WORKER_PROFILE or default)",
+    )
+    args = parser.parse_args(argv)
+    # argparse only checks choices against the command line, not the default
+    if args.profile not in WORKER_TUNING_PROFILES:
+        parser.error(
+            f"WORKER_PROFILE must be one of {', '.join(sorted(WORKER_TUNING_PROFILES))}"
+            f", not {args.profile!r}"
+        )
+    return args
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.processes > 1:
+        sys.exit(supervise(args.processes, args.profile))
+    asyncio.run(main(args.profile))
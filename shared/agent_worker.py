@@ -0,0 +1,63 @@
+import concurrent.futures
+from datetime import timedelta
+from typing import Any
+
+from temporalio.client import Client
+from temporalio.worker import Worker
+
+from activities.tool_activities import (
+    ToolActivities,
+    dynamic_tool_activity,
+    mcp_list_tools,
+    set_tool_executor,
+)
+from shared.config import TEMPORAL_LLM_TASK_QUEUE, TEMPORAL_TASK_QUEUE
+from workflows.agent_goal_workflow import AgentGoalWorkflow
+from workflows.sandbox import create_workflow_runner
+
+# How long a stopping worker lets in-flight activities finish before they are
+# cancelled.
+WORKER_GRACEFUL_SHUTDOWN_TIMEOUT = timedelta(seconds=10)
+
+
+def create_agent_worker(
+    client: Client,
+    activities: ToolActivities,
+    activity_executor: concurrent.futures.ThreadPoolExecutor,
+    **worker_options: Any,
+) -> Worker:
+    """Create the worker serving AgentGoalWorkflow and its activities.
+
+    Used by scripts/run_worker.py and by the API process when it runs an
+    embedded worker for eager workflow start.
+    """
+    worker_activities = [
+        activities.get_wf_env_vars,
+        activities.mcp_tool_activity,
+        dynamic_tool_activity,
+        mcp_list_tools,
+    ]
+    if TEMPORAL_LLM_TASK_QUEUE:
+        print(
+            f"LLM activities are routed to {TEMPORAL_LLM_TASK_QUEUE}; "
+            "run scripts/run_llm_worker.py to serve them."
+        )
+    else:
+        worker_activities += [
+            activities.agent_validatePrompt,
+            activities.agent_toolPlanner,
+        ]
+
+    # Synchronous tool handlers share this pool instead of blocking the event
+    # loop; see tools.TOOL_HANDLERS for per-tool limits.
+    set_tool_executor(activity_executor)
+    return Worker(
+        client,
+        task_queue=TEMPORAL_TASK_QUEUE,
+        workflows=[AgentGoalWorkflow],
+        workflow_runner=create_workflow_runner(),
+        activities=worker_activities,
+        activity_executor=activity_executor,
+        graceful_shutdown_timeout=WORKER_GRACEFUL_SHUTDOWN_TIMEOUT,
+        **worker_options,
+    )
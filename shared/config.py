@@ -1,9 +1,13 @@
 import os
+from typing import Optional
 
 from dotenv import load_dotenv
 from temporalio.client import Client
+from temporalio.runtime import PrometheusConfig, Runtime, TelemetryConfig
 from temporalio.service import TLSConfig
 
+from models.data_types import EnvLookupInput, EnvLookupOutput
+
 load_dotenv(override=True)
 
 # Temporal connection settings
@@ -13,6 +17,28 @@ TEMPORAL_TASK_QUEUE = os.getenv("TEMPORAL_TASK_QUEUE", "agent-task-queue")
 TEMPORAL_LEGACY_TASK_QUEUE = os.getenv(
     "TEMPORAL_LEGACY_TASK_QUEUE", "agent-task-queue-legacy"
 )
+# When set, LLM activities are routed to this queue and served by
+# scripts/run_llm_worker.py; when empty they run on TEMPORAL_TASK_QUEUE.
+TEMPORAL_LLM_TASK_QUEUE = os.getenv("TEMPORAL_LLM_TASK_QUEUE", "")
+# Optional YAML file with per-tool task queue, timeout and retry routing; see
+# shared/tool_routing.py
+TOOL_ROUTING_FILE = os.getenv("TOOL_ROUTING_FILE", "")
+# Optional YAML file with named LLM profiles (model, max_tokens, timeout...)
+# for validation, planning and summaries; see shared/llm_profiles.py
+LLM_PROFILES_FILE = os.getenv("LLM_PROFILES_FILE", "")
+# Optional SQLite file through which the worker processes on a host share the
+# profiles' requests_per_minute / tokens_per_minute buckets; each process
+# keeps its own when empty. See activities/llm_rate_limiter.py
+LLM_RATE_LIMIT_STORE = os.getenv("LLM_RATE_LIMIT_STORE", "")
+# Run a worker inside the API process and start new sessions with eager
+# workflow start, so their first workflow task skips the matching service.
+TEMPORAL_EAGER_WORKFLOW_START = (
+    os.getenv("TEMPORAL_EAGER_WORKFLOW_START", "false").lower() == "true"
+)
+
+# Serve SDK and agent metrics (e.g. agent_llm_json_repairs) for Prometheus on
+# this host:port. Each worker process needs its own address.
+TEMPORAL_METRICS_BIND_ADDRESS = os.getenv("TEMPORAL_METRICS_BIND_ADDRESS", "")
 
 # Authentication settings
 TEMPORAL_TLS_CERT = os.getenv("TEMPORAL_TLS_CERT", "")
@@ -20,6 +46,64 @@ TEMPORAL_TLS_KEY = os.getenv("TEMPORAL_TLS_KEY", "")
 TEMPORAL_API_KEY = os.getenv("TEMPORAL_API_KEY", "")
 
 
+def lookup_env_settings(
+    input: EnvLookupInput = EnvLookupInput(
+        show_confirm_env_var_name="SHOW_CONFIRM", show_confirm_default=True
+    ),
+) -> EnvLookupOutput:
+    """Read the workflow's env settings (confirm prompts, multi-goal mode,
+    goal categories).
+
+    Used by the API to pass them in CombinedInput, and by the get_wf_env_vars
+    activity for starters that don't.
+    """
+    show_confirm_value = os.getenv(input.show_confirm_env_var_name)
+    if show_confirm_value is None:
+        show_confirm = input.show_confirm_default
+    else:
+        show_confirm = show_confirm_value.lower() != "false"
+
+    # default to single agent mode if unset
+    first_goal_value = os.getenv("AGENT_GOAL")
+    multi_goal_mode = (
+        first_goal_value is not None
+        and first_goal_value.lower() == "goal_choose_agent_type"
+    )
+
+    goal_categories_value = os.getenv("GOAL_CATEGORIES")
+    goal_categories = (
+        [
+            category.strip().lower()
+            for category in goal_categories_value.split(",")
+            if category.strip()
+        ]
+        if goal_categories_value
+        else None
+    )
+
+    return EnvLookupOutput(
+        show_confirm=show_confirm,
+        multi_goal_mode=multi_goal_mode,
+        goal_categories=goal_categories,
+    )
+
+
+_metrics_runtime: Optional[Runtime] = None
+
+
+def get_temporal_runtime() -> Optional[Runtime]:
+    """Runtime exporting metrics to Prometheus if configured, else the default."""
+    global _metrics_runtime
+    if TEMPORAL_METRICS_BIND_ADDRESS and _metrics_runtime is None:
+        print(f"Serving metrics on {TEMPORAL_METRICS_BIND_ADDRESS}")
+        _metrics_runtime = Runtime(
+            telemetry=TelemetryConfig(
+                metrics=PrometheusConfig(bind_address=TEMPORAL_METRICS_BIND_ADDRESS)
+            )
+        )
+    return _metrics_runtime
+
+
 async def get_temporal_client() -> Client:
     """
     Creates a Temporal client based on environment configuration.
@@ -51,6 +135,7 @@ async def get_temporal_client() -> Client:
             namespace=TEMPORAL_NAMESPACE,
             api_key=TEMPORAL_API_KEY,
             tls=True,  # Always use TLS with API key
+            runtime=get_temporal_runtime(),
         )
 
     # Use mTLS or local connection
@@ -58,4 +143,5 @@ async def get_temporal_client() -> Client:
         TEMPORAL_ADDRESS,
         namespace=TEMPORAL_NAMESPACE,
         tls=tls_config,
+        runtime=get_temporal_runtime(),
     )
@@ -0,0 +1,69 @@
+"""Local routing of a user's request to the goal that serves it.
+
+In multi-goal mode sessions start with the agent-selection goal, which takes
+several LLM turns (ListAgents, picking an agent, ChangeGoal) before the user
+reaches the agent they wanted. The workflow first scores the user's message
+against every goal on offer with route_goal, and switches straight to the
+best one if it is a clear winner; otherwise the usual selection flow runs.
+
+Goals are indexed with the BM25 index of shared.tool_retrieval over their
+agent name, descriptions and tool names. This module runs inside workflows,
+so routing must stay deterministic: no clock, no I/O.
+"""
+
+from typing import List, Optional
+
+from models.tool_definitions import AgentGoal
+from shared.tool_retrieval import NAME_WEIGHT, BM25Index, tokenize
+
+AGENT_SELECTION_CATEGORY = "agent_selection"
+# Categories list_agents always offers in multi-goal mode
+ALWAYS_OFFERED_CATEGORIES = ("system",)
+
+# A message is routed only if the best goal scores at least this much, and
+# at least MIN_ROUTE_MARGIN times the runner-up. See
+# scripts/goal_routing_accuracy.py for how these perform on the goals'
+# example conversations.
+MIN_ROUTE_SCORE = 4.0
+MIN_ROUTE_MARGIN = 1.5
+
+
+def goal_terms(goal: AgentGoal) -> List[str]:
+    terms = tokenize(goal.agent_name) * NAME_WEIGHT
+    terms += tokenize(goal.agent_friendly_description)
+    terms += tokenize(goal.description)
+    for tool in goal.tools:
+        terms += tokenize(tool.name)
+    return terms
+
+
+def routable_goals(
+    goals: List[AgentGoal], categories: Optional[List[str]] = None
+) -> List[AgentGoal]:
+    """The goals ListAgents offers for the GOAL_CATEGORIES setting (None for
+    all), less agent selection itself and MCP goals, whose tools are only
+    loaded when a session starts with them."""
+    return [
+        goal
+        for goal in goals
+        if goal.category_tag != AGENT_SELECTION_CATEGORY
+        and goal.mcp_server_definition is None
+        and (
+            categories is None
+            or "all" in categories
+            or goal.category_tag in categories
+            or goal.category_tag in ALWAYS_OFFERED_CATEGORIES
+        )
+    ]
+
+
+def route_goal(prompt: str, goals: List[AgentGoal]) -> Optional[AgentGoal]:
+    """The goal the prompt clearly asks for, or None if no goal stands out."""
+    ranked = BM25Index([goal_terms(goal) for goal in goals]).ranked(prompt)
+    if not ranked:
+        return None
+    best_score, best = ranked[0]
+    runner_up = ranked[1][0] if len(ranked) > 1 else 0.0
+    if best_score < MIN_ROUTE_SCORE or best_score < runner_up * MIN_ROUTE_MARGIN:
+        return None
+    return goals[best]
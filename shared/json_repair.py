@@ -0,0 +1,101 @@
+"""Tolerant parsing of JSON objects in LLM replies.
+
+LLMs asked for "JSON only" still wrap it in prose, leave trailing commas or
+write Python literals. parse_llm_json() fixes those locally so a slightly
+malformed reply doesn't cost an activity retry and a full re-send of the
+prompt.
+
+Replies that stop mid-object (at the token limit) are not completed: the
+missing part could change their meaning, e.g. an amount of 10 cut from 1000.
+They raise TruncatedJSONError so the request is sent again.
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, Tuple
+
+# JSON string literals, so fixes are only applied to the text between them
+_STRING_LITERAL = re.compile(r'"(?:[^"\\]|\\.)*"', re.DOTALL)
+_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+_PYTHON_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_PYTHON_LITERAL = re.compile(r"\b(True|False|None)\b")
+
+
+class TruncatedJSONError(json.JSONDecodeError):
+    """The reply's JSON object was cut off before it was closed."""
+
+
+def extract_json_object(text: str) -> str:
+    """Return the outermost JSON object in text.
+
+    Raises TruncatedJSONError if the object is never closed and
+    json.JSONDecodeError if text contains no object.
+    """
+    start = text.find("{")
+    if start == -1:
+        raise json.JSONDecodeError("No JSON object found", text, 0)
+
+    closers = []
+    in_string = False
+    escaped = False
+    for index in range(start, len(text)):
+        char = text[index]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            closers.append("}" if char == "{" else "]")
+        elif char in "}]":
+            if closers:
+                closers.pop()
+            if not closers:
+                return text[start : index + 1]
+
+    raise TruncatedJSONError("JSON object is truncated", text, len(text))
+
+
+def repair_json(text: str) -> str:
+    """Fix trailing commas and Python literals outside of string literals."""
+    repaired = []
+    position = 0
+    for match in _STRING_LITERAL.finditer(text):
+        repaired.append(_repair_segment(text[position : match.start()]))
+        repaired.append(match.group())
+        position = match.end()
+    repaired.append(_repair_segment(text[position:]))
+    return "".join(repaired)
+
+
+def _repair_segment(segment: str) -> str:
+    segment = _TRAILING_COMMA.sub(r"\1", segment)
+    return _PYTHON_LITERAL.sub(lambda match: _PYTHON_LITERALS[match.group()], segment)
+
+
+def parse_llm_json(
+    text: str, required_keys: Iterable[str] = ()
+) -> Tuple[Dict[str, Any], bool]:
+    """Parse the JSON object in an LLM reply, repairing common defects.
+
+    Returns the object and whether it needed repairing. Raises ValueError
+    (json.JSONDecodeError for unparseable text, TruncatedJSONError for a cut
+    off object) if no object can be recovered or a required key is missing.
+    """
+    try:
+        data = json.loads(text)
+        repaired = False
+    except json.JSONDecodeError:
+        data = json.loads(repair_json(extract_json_object(text)))
+        repaired = True
+
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    missing = [key for key in required_keys if key not in data]
+    if missing:
+        raise ValueError(f"JSON object is missing required keys: {missing}")
+    return data, repaired
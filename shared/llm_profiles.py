@@ -0,0 +1,142 @@
+from dataclasses import dataclass, fields, replace
+from typing import Any, Dict, Optional, Tuple
+
+import yaml
+
+from models.tool_definitions import AgentGoal
+from shared.config import LLM_PROFILES_FILE
+
+# The kinds of LLM call the agent makes. Each uses the profile of the same
+# name unless its goal maps it to another one (AgentGoal.llm_profiles).
+VALIDATION_PROFILE = "validation"
+PLANNER_PROFILE = "planner"
+SUMMARY_PROFILE = "summary"
+# Base for every other profile; unknown profile names fall back to it
+DEFAULT_LLM_PROFILE = "default"
+
+
+@dataclass(frozen=True)
+class LLMProfile:
+    """Model and request settings for one kind of LLM call.
+
+    None fields fall back to the worker's LLM_MODEL, LLM_KEY and LLM_BASE_URL
+    settings, or to the provider's defaults for max_tokens, temperature and
+    timeout. api_key_env names the environment variable holding the key, so
+    keys stay out of the profiles file. An empty base_url clears LLM_BASE_URL
+    for profiles that use another provider.
+
+    fallbacks names the profiles to fail over to when this one's provider
+    is rate limited, erroring or timing out; prefer_fastest tries the fastest
+    of them first, and hedge races a duplicate request on the next one when a
+    request is slower than the provider's p95 (see activities/llm_router.py).
+
+    requests_per_minute and tokens_per_minute cap the calls each worker (or
+    every worker sharing LLM_RATE_LIMIT_STORE) makes to the profile's model;
+    calls over the limit wait rather than fail (see
+    activities/llm_rate_limiter.py). The limits belong to the model, so
+    profiles on the same model must set the same ones.
+    """
+
+    model: Optional[str] = None
+    base_url: Optional[str] = None
+    api_key_env: Optional[str] = None
+    max_tokens: Optional[int] = None
+    temperature: Optional[float] = None
+    timeout: Optional[float] = None  # seconds
+    fallbacks: Tuple[str, ...] = ()
+    prefer_fastest: bool = False
+    hedge: bool = False
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+
+_PROFILE_SETTINGS = {profile_field.name for profile_field in fields(LLMProfile)}
+
+
+def parse_llm_profile(config: Dict[str, Any], base: LLMProfile) -> LLMProfile:
+    """Build a profile from one profiles-file entry, defaulting fields to base.
+
+    For example, a small fast model for prompt validation:
+
+        validation:
+          model: openai/gpt-4o-mini
+          max_tokens: 300
+          temperature: 0
+          timeout: 5
+          fallbacks: [claude-haiku]
+          requests_per_minute: 500
+    """
+    unknown = set(config) - _PROFILE_SETTINGS
+    if unknown:
+        raise ValueError(f"Unknown LLM profile settings: {sorted(unknown)}")
+
+    profile = replace(base, **config)
+    if profile.max_tokens is not None:
+        profile = replace(profile, max_tokens=int(profile.max_tokens))
+    if profile.temperature is not None:
+        profile = replace(profile, temperature=float(profile.temperature))
+    if profile.timeout is not None:
+        profile = replace(profile, timeout=float(profile.timeout))
+    for limit in ("requests_per_minute", "tokens_per_minute"):
+        if getattr(profile, limit) is not None:
+            profile = replace(profile, **{limit: int(getattr(profile, limit))})
+    return replace(
+        profile,
+        fallbacks=tuple(profile.fallbacks or ()),
+        prefer_fastest=bool(profile.prefer_fastest),
+        hedge=bool(profile.hedge),
+    )
+
+
+def load_llm_profiles(
+    path: Optional[str] = LLM_PROFILES_FILE,
+) -> Dict[str, LLMProfile]:
+    """Return the profiles in the YAML file at path, each based on "default"."""
+    profiles = {DEFAULT_LLM_PROFILE: LLMProfile()}
+    if not path:
+        return profiles
+
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    default = parse_llm_profile(
+        config.pop(DEFAULT_LLM_PROFILE, None) or {}, LLMProfile()
+    )
+    profiles[DEFAULT_LLM_PROFILE] = default
+    for name, profile_config in config.items():
+        profiles[name] = parse_llm_profile(profile_config or {}, default)
+    check_rate_limits(profiles)
+    return profiles
+
+
+def check_rate_limits(profiles: Dict[str, LLMProfile]) -> None:
+    """Raise ValueError if profiles on the same model set different limits.
+
+    The rate limiter keeps one set of buckets per model, which can only have
+    one capacity.
+    """
+    limits_by_model: Dict[Optional[str], Tuple[str, Tuple]] = {}
+    for name, profile in profiles.items():
+        limits = (profile.requests_per_minute, profile.tokens_per_minute)
+        first_name, first_limits = limits_by_model.setdefault(
+            profile.model, (name, limits)
+        )
+        if limits != first_limits:
+            raise ValueError(
+                f"LLM profiles {first_name!r} and {name!r} use the same model "
+                "but set different requests_per_minute or tokens_per_minute"
+            )
+
+
+# Loaded once at worker start. This module is passed through the workflow
+# sandbox (see workflows/sandbox.py), so workflows read it without file I/O.
+LLM_PROFILES: Dict[str, LLMProfile] = load_llm_profiles()
+
+
+def get_llm_profile(name: Optional[str]) -> LLMProfile:
+    """Profile by name; names without a configured profile use "default"."""
+    return LLM_PROFILES.get(name or "", LLM_PROFILES[DEFAULT_LLM_PROFILE])
+
+
+def llm_profile_for(goal: AgentGoal, role: str) -> str:
+    """Name of the profile the goal uses for a kind of LLM call."""
+    return (goal.llm_profiles or {}).get(role, role)
@@ -1,24 +1,13 @@
 import asyncio
 from contextlib import asynccontextmanager
-from typing import TYPE_CHECKING, Any, Dict, Tuple
+from typing import Any, Dict, Tuple
 
 from temporalio import activity
 
 from models.tool_definitions import MCPServerDefinition
 
-# Import MCP client libraries
-if TYPE_CHECKING:
-    from mcp import ClientSession, StdioServerParameters
-    from mcp.client.stdio import stdio_client
-else:
-    try:
-        from mcp import ClientSession, StdioServerParameters
-        from mcp.client.stdio import stdio_client
-    except ImportError:
-        # Fallback if MCP not installed
-        ClientSession = None
-        StdioServerParameters = None
-        stdio_client = None
+# MCP client libraries are imported on first connection (see _create_client)
+# because they add most of a second to worker startup.
 
 
 class MCPClientManager:
@@ -109,7 +98,10 @@ class MCPClientManager:
     @asynccontextmanager
     async def _stdio_connection(self, command: str, args: list, env: dict):
         """Create stdio connection to MCP server"""
-        if stdio_client is None:
+        try:
+            from mcp import StdioServerParameters
+            from mcp.client.stdio import stdio_client
+        except ImportError:
             raise Exception("MCP client libraries not available")
 
         # Create server parameters
@@ -136,6 +128,8 @@ class MCPClientManager:
             read, write = await connection_manager.__aenter__()
 
             # Create and initialize client session
+            from mcp import ClientSession
+
             session = ClientSession(read, write)
             await session.initialize()
 
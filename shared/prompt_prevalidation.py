@@ -0,0 +1,101 @@
+"""Local pre-validation of user prompts.
+
+agent_validatePrompt spends an LLM call checking that a prompt fits the
+goal, but replies to the agent's own questions such as "yes", "ok" or a bare
+email address always do. The workflow accepts those with
+is_trivially_valid and sends everything else to the LLM validator.
+
+Replies are accepted by the rules below, then by the optional classifiers in
+PREVALIDATION_CLASSIFIERS. A classifier takes the prompt and returns True to
+accept it, False to send it to the LLM, or None to leave it to the next one.
+This module runs inside workflows, so rules and classifiers must be
+deterministic: no clock, no I/O, no model loaded from a file that may differ
+between workers.
+"""
+
+import re
+from typing import Callable, List, Optional
+
+from shared.slot_extractors import (
+    FILLER_WORDS,
+    extract_dates,
+    extract_emails,
+    extract_identifiers,
+    extract_numbers,
+    leftover_words,
+)
+
+# Dates without a year ("Dec 1"), which are fine as a reply but too vague for
+# shared.slot_extractors to fill a date argument with
+MONTH_DAY_PATTERN = re.compile(
+    r"\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?\s+"
+    r"\d{1,2}(?:st|nd|rd|th)?\b",
+    re.IGNORECASE,
+)
+
+# Longer replies that aren't just data carry enough meaning to be worth
+# validating
+MAX_TRIVIAL_REPLY_WORDS = 6
+
+SHORT_REPLIES = frozenset(
+    reply.strip()
+    for reply in """
+    yes|y|yeah|yep|yup|sure|ok|okay|k|confirm|confirmed|correct|right|
+    that's right|that is right|that's correct|sounds good|looks good|great|
+    perfect|go ahead|go for it|do it|please do|yes please|ok please|proceed|
+    please|no|nope|no thanks|no thank you|nothing|thanks|thank you|done|that's all|
+    that's it|all good
+    """.split(
+        "|"
+    )
+)
+
+PrevalidationClassifier = Callable[[str], Optional[bool]]
+PREVALIDATION_CLASSIFIERS: List[PrevalidationClassifier] = []
+
+
+def _normalize(prompt: str) -> str:
+    text = re.sub(r"[^\w@.'\s-]", " ", prompt.lower().replace("’", "'"))
+    return " ".join(text.split()).strip(" .")
+
+
+def is_short_reply(prompt: str) -> bool:
+    """Whether the prompt is made of stock replies, e.g. "Yes, go ahead!"."""
+    parts = re.split(r"[,;!]|\band\b", prompt.lower().replace("’", "'"))
+    parts = [_normalize(part) for part in parts]
+    return all(part in SHORT_REPLIES for part in parts if part) and any(parts)
+
+
+def is_data_reply(prompt: str) -> bool:
+    """Whether the prompt is just values such as an email, date, amount or
+    ID, with at most a few filler words ("my email is ...")."""
+    spans = [
+        span
+        for extractor in (
+            extract_emails,
+            extract_dates,
+            extract_numbers,
+            extract_identifiers,
+        )
+        for _, span in extractor(prompt)
+    ]
+    spans.extend(match.span() for match in MONTH_DAY_PATTERN.finditer(prompt))
+    return bool(spans) and all(
+        word in FILLER_WORDS for word in leftover_words(prompt, spans)
+    )
+
+
+def is_trivially_valid(prompt: str) -> bool:
+    """Whether a reply to the agent can skip LLM validation."""
+    if is_data_reply(prompt):
+        return True
+    text = _normalize(prompt)
+    if not text or len(text.split()) > MAX_TRIVIAL_REPLY_WORDS:
+        return False
+    if is_short_reply(prompt):
+        return True
+    for classifier in PREVALIDATION_CLASSIFIERS:
+        verdict = classifier(prompt)
+        if verdict is not None:
+            return verdict
+    return False
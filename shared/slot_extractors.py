@@ -0,0 +1,231 @@
+"""Local extraction of tool arguments from a user's reply.
+
+When the planner has asked the user for a tool's missing arguments, the
+workflow first tries to read them straight from the reply (see
+workflows.workflow_helpers.fill_missing_args_locally). If every missing
+argument is found, the turn goes to confirmation without validation or
+planning LLM calls; otherwise it takes the usual LLM path.
+
+Extractors are looked up by ToolArgument.name, then by ToolArgument.type. An
+extractor returns every candidate value in the reply, with its position.
+Add entries to EXTRACTORS_BY_NAME or EXTRACTORS_BY_TYPE for new kinds of
+argument. This module runs inside workflows, so extractors must be
+deterministic: no clock, no I/O.
+"""
+
+import re
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models.tool_definitions import ToolArgument, ToolDefinition
+
+# A candidate value and its (start, end) span in the reply
+Candidate = Tuple[Any, Tuple[int, int]]
+Extractor = Callable[[str], List[Candidate]]
+
+EMAIL_PATTERN = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+ISO_DATE_PATTERN = re.compile(r"\b\d{4}-\d{2}-\d{2}\b")
+MONTH_NAMES = (
+    "january|february|march|april|may|june|july|august|september|october|"
+    "november|december"
+)
+WRITTEN_DATE_PATTERN = re.compile(
+    rf"\b(?:({MONTH_NAMES})\s+(\d{{1,2}}),?\s+(\d{{4}})"
+    rf"|(\d{{1,2}})\s+({MONTH_NAMES}),?\s+(\d{{4}}))\b",
+    re.IGNORECASE,
+)
+NUMBER_PATTERN = re.compile(r"\$?\s?(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?\b")
+IDENTIFIER_PATTERN = re.compile(r"\b[A-Za-z]{0,4}-?\d[\w-]*\b")
+
+# Words a reply may contain besides the values, e.g. "my email is ...".
+# Anything else could change the request, so it goes to the LLM instead.
+FILLER_WORDS = frozenset(
+    """
+    a account an and address amount dollars email for from i i'm id is it it's its
+    my number ok okay on order please sure that's the thanks thank through
+    to until usd yes you
+    """.split()
+)
+# Words that say which end of a range the value after them is. Values that
+# share an extractor are filled in order, so a reply whose cues contradict
+# that order ("until 2025-03-18 from 2025-03-14") goes to the LLM.
+RANGE_START_WORDS = frozenset({"from"})
+RANGE_END_WORDS = frozenset({"through", "to", "until"})
+# Arguments (start, end) whose values may not be in reverse order
+DATE_RANGES = (("start_date", "end_date"),)
+# Characters the reply may contain outside the values and words. Anything
+# else, such as the minus of "-500", could change what a value means.
+PLAIN_PUNCTUATION = frozenset(".,!?;:'\"()")
+
+
+def extract_emails(text: str) -> List[Candidate]:
+    return [(match.group(), match.span()) for match in EMAIL_PATTERN.finditer(text)]
+
+
+def extract_dates(text: str) -> List[Candidate]:
+    """ISO dates (2025-03-14) and written ones (March 14, 2025 / 14 March
+    2025), as ISO date strings."""
+    candidates = []
+    for match in ISO_DATE_PATTERN.finditer(text):
+        try:
+            candidates.append(
+                (date.fromisoformat(match.group()).isoformat(), match.span())
+            )
+        except ValueError:
+            continue
+    for match in WRITTEN_DATE_PATTERN.finditer(text):
+        month, day, year = (
+            match.group(1, 2, 3) if match.group(1) else match.group(5, 4, 6)
+        )
+        try:
+            parsed = datetime.strptime(f"{day} {month} {year}", "%d %B %Y").date()
+        except ValueError:
+            continue
+        candidates.append((parsed.isoformat(), match.span()))
+    return sorted(candidates, key=lambda candidate: candidate[1])
+
+
+def extract_numbers(text: str) -> List[Candidate]:
+    """Numbers and dollar amounts such as 3, 14.99 or $1,250.00."""
+    candidates = []
+    for match in NUMBER_PATTERN.finditer(text):
+        value = float(match.group(1).replace(",", "") + (match.group(2) or ""))
+        candidates.append((int(value) if value.is_integer() else value, match.span()))
+    return candidates
+
+
+def extract_identifiers(text: str) -> List[Candidate]:
+    """IDs containing a digit, such as 102 or ORD-2291."""
+    return [
+        (match.group(), match.span()) for match in IDENTIFIER_PATTERN.finditer(text)
+    ]
+
+
+EXTRACTORS_BY_NAME: Dict[str, Extractor] = {
+    "email": extract_emails,
+    "email_address": extract_emails,
+    "customer_email": extract_emails,
+    "start_date": extract_dates,
+    "end_date": extract_dates,
+    "order_id": extract_identifiers,
+    "amount": extract_numbers,
+}
+
+EXTRACTORS_BY_TYPE: Dict[str, Extractor] = {
+    "ISO8601": extract_dates,
+    "number": extract_numbers,
+    "float": extract_numbers,
+}
+
+
+def get_extractor(argument: ToolArgument) -> Optional[Extractor]:
+    return EXTRACTORS_BY_NAME.get(argument.name) or EXTRACTORS_BY_TYPE.get(
+        argument.type
+    )
+
+
+def _argument_words(argument: ToolArgument) -> List[str]:
+    """Words of an argument's name, e.g. start_date -> start, date."""
+    spaced = re.sub(r"([a-z])([A-Z])", r"\1 \2", argument.name).replace("_", " ")
+    return spaced.lower().split()
+
+
+def leftover_text(text: str, spans: List[Tuple[int, int]]) -> str:
+    """Lowercase text with the given (possibly overlapping) spans blanked out."""
+    keep = [True] * len(text)
+    for start, end in spans:
+        keep[start:end] = [False] * (end - start)
+    return "".join(char if kept else " " for char, kept in zip(text, keep)).lower()
+
+
+def leftover_words(text: str, spans: List[Tuple[int, int]]) -> List[str]:
+    """Lowercase words of text outside the given (possibly overlapping) spans."""
+    return re.findall(r"[a-z']+", leftover_text(text, spans))
+
+
+def _has_stray_characters(remainder: str) -> bool:
+    return any(
+        not (char.isspace() or "a" <= char <= "z" or char in PLAIN_PUNCTUATION)
+        for char in remainder
+    )
+
+
+def _word_before(text: str, position: int) -> Optional[str]:
+    match = re.search(r"([a-z']+)\W*$", text[:position].lower())
+    return match.group(1) if match else None
+
+
+def _contradicts_order(reply: str, candidates: List[Candidate]) -> bool:
+    """Whether the range words before the candidates disagree with the order
+    they are assigned in."""
+    for position, (_, (start, _)) in enumerate(candidates):
+        word = _word_before(reply, start)
+        if word in RANGE_START_WORDS and position != 0:
+            return True
+        if word in RANGE_END_WORDS and position == 0:
+            return True
+    return False
+
+
+def _reversed_range(args: Dict[str, Any]) -> bool:
+    for start_name, end_name in DATE_RANGES:
+        try:
+            start = date.fromisoformat(str(args.get(start_name)))
+            end = date.fromisoformat(str(args.get(end_name)))
+        except ValueError:
+            continue
+        if start > end:
+            return True
+    return False
+
+
+def fill_missing_args(
+    tool: ToolDefinition, args: Dict[str, Any], reply: str
+) -> Optional[Dict[str, Any]]:
+    """Return args with every missing (None) argument filled from the reply,
+    or None unless all of them are found unambiguously.
+
+    Missing arguments that share an extractor are filled in the order the
+    tool defines them ("from 2025-03-14 to 2025-03-18" gives start_date,
+    end_date), and only if the reply has exactly one candidate for each
+    and no range word contradicts that order. Start dates may not come
+    after their end dates. The rest of the reply may only contain filler
+    words and plain punctuation.
+    """
+    missing = [
+        argument for argument in tool.arguments if args.get(argument.name) is None
+    ]
+    if not missing:
+        return None
+
+    groups: Dict[Extractor, List[ToolArgument]] = {}
+    for argument in missing:
+        extractor = get_extractor(argument)
+        if extractor is None:
+            return None
+        groups.setdefault(extractor, []).append(argument)
+
+    filled = dict(args)
+    spans = []
+    for extractor, arguments in groups.items():
+        candidates = extractor(reply)
+        if len(candidates) != len(arguments):
+            return None
+        if len(arguments) > 1 and _contradicts_order(reply, candidates):
+            return None
+        for argument, (value, span) in zip(arguments, candidates):
+            filled[argument.name] = (
+                value if argument.type in EXTRACTORS_BY_TYPE else str(value)
+            )
+            spans.append(span)
+
+    if _reversed_range(filled):
+        return None
+
+    remainder = leftover_text(reply, spans)
+    if _has_stray_characters(remainder):
+        return None
+    allowed = FILLER_WORDS.union(*(_argument_words(argument) for argument in missing))
+    if any(word not in allowed for word in re.findall(r"[a-z']+", remainder)):
+        return None
+    return filled
@@ -0,0 +1,148 @@
+"""What the LLM sees of a tool's result.
+
+Tool results are kept whole in the conversation history, which the UI
+shows, but every planner, validation and summary prompt re-sends that
+history. Tools with large results (order lists, flight searches, MCP list
+calls) declare a ResultProjection here: the fields to keep, how many list
+items to show, how long strings may get, and optionally a compact text
+rendering for the prompt that reports the tool's completion. Prompts then use
+project_history and render_tool_result instead of the raw results. Tools
+without a projection are shown as before.
+
+This module runs inside workflows, so projections and renderers must be
+deterministic: no clock, no I/O.
+"""
+
+import json
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from models.data_types import ConversationHistory
+
+# Keys kept whatever the projection says: which tool produced the result and
+# whether it failed
+ALWAYS_KEPT_FIELDS = ("tool", "error", "success")
+
+
+@dataclass(frozen=True)
+class ResultProjection:
+    """How to shrink a tool result before it goes into a prompt.
+
+    fields keeps only those top-level keys of the result, item_fields only
+    those keys of the objects in its lists that have any of them (None keeps
+    all). Lists longer than max_items and strings longer than
+    max_string_length are cut short with a note of what was left out. render
+    turns the projected result into the text of the tool completion prompt;
+    compact JSON by default. MCP results arrive as JSON text and are parsed
+    before projecting.
+    """
+
+    fields: Optional[Tuple[str, ...]] = None
+    item_fields: Optional[Tuple[str, ...]] = None
+    max_items: Optional[int] = None
+    max_string_length: Optional[int] = None
+    render: Optional[Callable[[Any], str]] = None
+
+
+RESULT_PROJECTIONS: Dict[str, ResultProjection] = {
+    "ListOrders": ResultProjection(
+        item_fields=("id", "summary", "status", "order_date", "tracking_id"),
+        max_items=20,
+    ),
+    # The real API returns its whole response when it finds no itineraries
+    "SearchFlights": ResultProjection(
+        fields=("origin", "destination", "currency", "results"), max_items=5
+    ),
+    "FindEvents": ResultProjection(max_items=10, max_string_length=160),
+    "SearchFixtures": ResultProjection(max_items=10),
+    # Stripe MCP list calls return full Stripe objects
+    "list_customers": ResultProjection(
+        item_fields=("id", "name", "email"), max_items=25
+    ),
+    "list_products": ResultProjection(
+        item_fields=("id", "name", "description", "default_price"),
+        max_items=25,
+        max_string_length=160,
+    ),
+    "list_prices": ResultProjection(
+        item_fields=("id", "product", "unit_amount", "currency", "recurring"),
+        max_items=25,
+    ),
+}
+
+
+def get_result_projection(tool_name: Optional[str]) -> Optional[ResultProjection]:
+    return RESULT_PROJECTIONS.get(tool_name) if tool_name else None
+
+
+def _parse_json_text(value: str) -> Any:
+    if value[:1] not in ("{", "["):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _project_value(value: Any, projection: ResultProjection, in_list: bool) -> Any:
+    if isinstance(value, str):
+        value = _parse_json_text(value)
+        if isinstance(value, str):
+            limit = projection.max_string_length
+            if limit is not None and len(value) > limit:
+                return f"{value[:limit]}... ({len(value) - limit} more characters)"
+            return value
+    if isinstance(value, dict):
+        fields = projection.item_fields
+        if in_list and fields is not None and any(key in value for key in fields):
+            value = {key: item for key, item in value.items() if key in fields}
+        return {
+            key: _project_value(item, projection, in_list)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        items = [_project_value(item, projection, True) for item in value]
+        limit = projection.max_items
+        if limit is not None and len(items) > limit:
+            items = items[:limit] + [f"... {len(items) - limit} more not shown"]
+        return items
+    return value
+
+
+def project_tool_result(tool_name: Optional[str], result: Any) -> Any:
+    """The part of a tool's result to show the LLM."""
+    projection = get_result_projection(tool_name)
+    if projection is None or not isinstance(result, dict):
+        return result
+    if projection.fields is not None:
+        result = {
+            key: value
+            for key, value in result.items()
+            if key in projection.fields or key in ALWAYS_KEPT_FIELDS
+        }
+    return _project_value(result, projection, in_list=False)
+
+
+def render_tool_result(tool_name: Optional[str], result: Any) -> str:
+    """Text of a tool's result for the tool completion prompt."""
+    projection = get_result_projection(tool_name)
+    if projection is None:
+        return f"{result}"
+    projected = project_tool_result(tool_name, result)
+    if projection.render is not None:
+        return projection.render(projected)
+    return json.dumps(projected, separators=(",", ":"), default=str)
+
+
+def project_history(conversation_history: ConversationHistory) -> ConversationHistory:
+    """The conversation history with tool results projected for prompts."""
+    messages = []
+    for message in conversation_history.get("messages", []):
+        response = message.get("response")
+        if message.get("actor") == "tool_result" and isinstance(response, dict):
+            message = {
+                **message,
+                "response": project_tool_result(response.get("tool"), response),
+            }
+        messages.append(message)
+    return {**conversation_history, "messages": messages}
@@ -0,0 +1,177 @@
+"""Local lexical retrieval of the tools relevant to a planner turn.
+
+The planner prompt describes every tool of the goal with all its arguments,
+which adds up for MCP goals that load dozens of tools. Goals that set
+AgentGoal.max_prompt_tools only get the tools most relevant to the recent
+conversation, ranked with BM25 over each tool's name, description and
+arguments, plus the tools the conversation has been using (see
+select_prompt_tools).
+
+The index is built in-process from the tool definitions, with no model or
+network access. This module runs inside workflows, so ranking must stay
+deterministic: no clock, no I/O.
+"""
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from models.tool_definitions import AgentGoal, ToolDefinition
+
+# Okapi BM25 term frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Tool names are short and the best signal, so they count this many times
+NAME_WEIGHT = 3
+# Conversation messages, from the end, that make up the query and whose tools
+# are always kept
+RECENT_MESSAGES = 4
+# Tools that move between goals, kept whatever the conversation is about;
+# goals/__init__.py adds ListAgents to every goal in multi-goal mode
+STRUCTURAL_TOOLS = frozenset({"ListAgents", "ChangeGoal"})
+
+STOP_WORDS = frozenset(
+    """
+    a about an and are as at be by can d do for from get have i if in is it its
+    like ll m me my of on or please re s t that the this to ve want we what
+    when which will with would you your
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase terms of text, with camelCase and snake_case names split and
+    plurals folded ("listCustomers" -> list, customer)."""
+    spaced = re.sub(r"([a-z0-9])([A-Z])", r"\1 \2", text)
+    terms = []
+    for word in re.findall(r"[a-z0-9]+", spaced.lower()):
+        if word in STOP_WORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+def tool_terms(tool: ToolDefinition) -> List[str]:
+    terms = tokenize(tool.name) * NAME_WEIGHT + tokenize(tool.description)
+    for argument in tool.arguments:
+        terms.extend(tokenize(f"{argument.name} {argument.description}"))
+    return terms
+
+
+class BM25Index:
+    """BM25 index over documents given as lists of terms."""
+
+    def __init__(self, documents: List[List[str]]):
+        self.documents = [Counter(terms) for terms in documents]
+        self.lengths = [sum(document.values()) for document in self.documents]
+        self.average_length = sum(self.lengths) / len(documents) if documents else 0.0
+        document_frequency = Counter(
+            term for document in self.documents for term in document
+        )
+        self.idf = {
+            term: math.log(1 + (len(documents) - count + 0.5) / (count + 0.5))
+            for term, count in document_frequency.items()
+        }
+
+    def scores(self, query: str) -> List[float]:
+        """BM25 score of every document for the query, in index order."""
+        query_terms = [term for term in set(tokenize(query)) if term in self.idf]
+        scores = []
+        for document, length in zip(self.documents, self.lengths):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * length / self.average_length)
+            scores.append(
+                sum(
+                    self.idf[term]
+                    * document[term]
+                    * (BM25_K1 + 1)
+                    / (document[term] + norm)
+                    for term in query_terms
+                    if term in document
+                )
+            )
+        return scores
+
+    def ranked(self, query: str) -> List[Tuple[float, int]]:
+        """(score, position) of the documents matching the query, best first;
+        ties keep index order."""
+        matches = sorted(
+            (-score, position)
+            for position, score in enumerate(self.scores(query))
+            if score > 0
+        )
+        return [(-score, position) for score, position in matches]
+
+
+class ToolIndex(BM25Index):
+    """BM25 index over a list of tool definitions."""
+
+    def __init__(self, tools: List[ToolDefinition]):
+        super().__init__([tool_terms(tool) for tool in tools])
+        self.tools = tools
+
+    def top(self, query: str, k: int) -> List[ToolDefinition]:
+        """Up to k tools matching the query, best first."""
+        return [self.tools[position] for _, position in self.ranked(query)[:k]]
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    response = message.get("response")
+    if isinstance(response, dict):
+        return str(response.get("response") or "")
+    return response if isinstance(response, str) else ""
+
+
+def _message_tool(message: Dict[str, Any]) -> Optional[str]:
+    response = message.get("response")
+    return response.get("tool") if isinstance(response, dict) else None
+
+
+def select_prompt_tools(
+    goal: AgentGoal,
+    conversation_history: Dict[str, Any],
+    tool_data: Optional[Dict[str, Any]] = None,
+) -> List[ToolDefinition]:
+    """The tools to describe in the planner prompt, in the goal's order.
+
+    All of them unless goal.max_prompt_tools is set. Otherwise the top
+    max_prompt_tools for the last RECENT_MESSAGES messages, plus the tools
+    those messages and tool_data name, plus the tool that follows the last
+    one used in the goal's tool list. The STRUCTURAL_TOOLS and every tool the
+    goal's description names are always kept, since the planner must follow
+    the sequence that description lays out. If nothing matches, all tools
+    are kept.
+    """
+    if goal.max_prompt_tools is None or len(goal.tools) <= goal.max_prompt_tools:
+        return goal.tools
+
+    recent = conversation_history.get("messages", [])[-RECENT_MESSAGES:]
+    query = " ".join(_message_text(message) for message in recent)
+    selected: Set[str] = {
+        tool.name for tool in ToolIndex(goal.tools).top(query, goal.max_prompt_tools)
+    }
+
+    named = [_message_tool(message) for message in recent]
+    if tool_data:
+        named.append(tool_data.get("tool"))
+    named = [name for name in named if name]
+    selected.update(named)
+
+    names = [tool.name for tool in goal.tools]
+    if named and named[-1] in names[:-1]:
+        selected.add(names[names.index(named[-1]) + 1])
+    if not selected.intersection(names):
+        return goal.tools
+
+    selected.update(STRUCTURAL_TOOLS)
+    selected.update(
+        name
+        for name in names
+        if re.search(rf"(?<!\w){re.escape(name)}(?![\w])", goal.description)
+    )
+
+    return [tool for tool in goal.tools if tool.name in selected]
@@ -0,0 +1,159 @@
+from dataclasses import dataclass, field, replace
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+import yaml
+from temporalio.common import RetryPolicy
+
+from shared.config import TEMPORAL_LEGACY_TASK_QUEUE, TOOL_ROUTING_FILE
+
+
+@dataclass(frozen=True)
+class ToolRetry:
+    """Retry policy for errors a tool activity leaves unclassified.
+
+    Bad arguments fail without retrying, and network errors and rate limits
+    set their own jittered delays (see activities/activity_errors.py).
+    """
+
+    initial_interval: timedelta = timedelta(seconds=1)
+    backoff_coefficient: float = 2.0
+    maximum_interval: Optional[timedelta] = timedelta(seconds=30)
+    maximum_attempts: int = 0  # 0 means unlimited
+
+    def to_retry_policy(self) -> RetryPolicy:
+        return RetryPolicy(
+            initial_interval=self.initial_interval,
+            backoff_coefficient=self.backoff_coefficient,
+            maximum_interval=self.maximum_interval,
+            maximum_attempts=self.maximum_attempts,
+        )
+
+
+@dataclass(frozen=True)
+class ToolRoute:
+    """Where and how the workflow schedules a tool activity (native or MCP).
+
+    task_queue None means the workflow's own task queue. local runs a native
+    tool as a local activity on the workflow's worker, for cheap in-process
+    tools where a task queue round trip costs more than the tool itself.
+    """
+
+    task_queue: Optional[str] = None
+    start_to_close_timeout: timedelta = timedelta(seconds=12)
+    schedule_to_close_timeout: timedelta = timedelta(minutes=30)
+    retry: ToolRetry = field(default_factory=ToolRetry)
+    local: bool = False
+
+
+DEFAULT_TOOL_ROUTE = ToolRoute()
+
+# Built-in routes; TOOL_ROUTING_FILE entries are applied on top of these.
+DEFAULT_TOOL_ROUTES: Dict[str, ToolRoute] = {
+    # Served by the .NET/legacy worker (scripts/run_legacy_worker.py)
+    "SearchTrains": ToolRoute(task_queue=TEMPORAL_LEGACY_TASK_QUEUE),
+    "BookTrains": ToolRoute(task_queue=TEMPORAL_LEGACY_TASK_QUEUE),
+    # Pure in-memory tools (executor=INLINE in tools.TOOL_HANDLERS)
+    "ListAgents": ToolRoute(local=True),
+    "ChangeGoal": ToolRoute(local=True),
+    "TransferControl": ToolRoute(local=True),
+    "BookPTO": ToolRoute(local=True),
+    "CheckPayBankStatus": ToolRoute(local=True),
+    "GiveHint": ToolRoute(local=True),
+    "GuessLocation": ToolRoute(local=True),
+    "AddToCart": ToolRoute(local=True),
+}
+
+
+def _seconds(value: Any) -> Optional[timedelta]:
+    return None if value is None else timedelta(seconds=float(value))
+
+
+def parse_tool_route(config: Dict[str, Any], base: ToolRoute) -> ToolRoute:
+    """Build a route from one routing-file entry, defaulting fields to base.
+
+    Durations are given in seconds, e.g.:
+
+        FinMoveMoney:
+          task_queue: agent-task-queue-money
+          start_to_close_timeout: 30
+          retry:
+            initial_interval: 1
+            backoff_coefficient: 2
+            maximum_attempts: 5
+        GiveHint:
+          local: true
+    """
+    unknown = set(config) - {
+        "task_queue",
+        "start_to_close_timeout",
+        "schedule_to_close_timeout",
+        "retry",
+        "local",
+    }
+    if unknown:
+        raise ValueError(f"Unknown tool route settings: {sorted(unknown)}")
+
+    route = base
+    if "task_queue" in config:
+        route = replace(route, task_queue=config["task_queue"] or None)
+    if "start_to_close_timeout" in config:
+        route = replace(
+            route, start_to_close_timeout=_seconds(config["start_to_close_timeout"])
+        )
+    if "schedule_to_close_timeout" in config:
+        route = replace(
+            route,
+            schedule_to_close_timeout=_seconds(config["schedule_to_close_timeout"]),
+        )
+    if "retry" in config:
+        retry_config = config["retry"] or {}
+        retry = route.retry
+        if "initial_interval" in retry_config:
+            retry = replace(
+                retry, initial_interval=_seconds(retry_config["initial_interval"])
+            )
+        if "backoff_coefficient" in retry_config:
+            retry = replace(
+                retry, backoff_coefficient=float(retry_config["backoff_coefficient"])
+            )
+        if "maximum_interval" in retry_config:
+            retry = replace(
+                retry, maximum_interval=_seconds(retry_config["maximum_interval"])
+            )
+        if "maximum_attempts" in retry_config:
+            retry = replace(
+                retry, maximum_attempts=int(retry_config["maximum_attempts"])
+            )
+        route = replace(route, retry=retry)
+    if "local" in config:
+        route = replace(route, local=bool(config["local"]))
+    if route.local and route.task_queue:
+        raise ValueError(
+            "A tool route cannot set both local and task_queue: local activities "
+            "run on the workflow's own worker"
+        )
+    return route
+
+
+def load_tool_routes(path: Optional[str] = TOOL_ROUTING_FILE) -> Dict[str, ToolRoute]:
+    """Return the built-in routes overlaid with those in the YAML file at path."""
+    routes = dict(DEFAULT_TOOL_ROUTES)
+    if not path:
+        return routes
+
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    for tool_name, tool_config in config.items():
+        base = routes.get(tool_name, DEFAULT_TOOL_ROUTE)
+        routes[tool_name] = parse_tool_route(tool_config or {}, base)
+    return routes
+
+
+# Loaded once at worker start. This module is passed through the workflow
+# sandbox (see workflows/sandbox.py), so workflows read it without file I/O.
+TOOL_ROUTES: Dict[str, ToolRoute] = load_tool_routes()
+
+
+def get_tool_route(tool_name: str) -> ToolRoute:
+    return TOOL_ROUTES.get(tool_name, DEFAULT_TOOL_ROUTE)
@@ -0,0 +1,67 @@
+from datetime import timedelta
+
+import requests
+
+from activities.activity_errors import (
+    INVALID_REQUEST_ERROR,
+    RATE_LIMITED_ERROR,
+    TRANSIENT_ERROR,
+    TRANSIENT_RETRY_BASE_SECONDS,
+    classify_error,
+    classify_tool_error,
+)
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.litellm_response_headers = headers
+
+
+def test_bad_requests_are_not_retried():
+    error = classify_error(ProviderError(401))
+
+    assert error.type == INVALID_REQUEST_ERROR
+    assert error.non_retryable
+
+
+def test_transient_errors_retry_quickly_with_jitter():
+    for cause in (ProviderError(503), TimeoutError(), requests.ConnectionError()):
+        error = classify_error(cause)
+
+        assert error.type == TRANSIENT_ERROR
+        assert not error.non_retryable
+        assert (
+            timedelta(seconds=TRANSIENT_RETRY_BASE_SECONDS / 2)
+            <= error.next_retry_delay
+            <= timedelta(seconds=TRANSIENT_RETRY_BASE_SECONDS)
+        )
+
+
+def test_rate_limits_retry_after_the_provider_asks():
+    error = classify_error(ProviderError(429, {"retry-after": "12"}))
+
+    assert error.type == RATE_LIMITED_ERROR
+    assert error.next_retry_delay == timedelta(seconds=12)
+
+
+def test_http_client_errors_are_classified_by_response_status():
+    response = requests.Response()
+    response.status_code = 404
+
+    error = classify_error(requests.HTTPError("Not found", response=response))
+
+    assert error.non_retryable
+
+
+def test_unclassified_errors_keep_the_retry_policy():
+    assert classify_error(ValueError("Expecting value")) is None
+
+
+def test_tool_argument_errors_are_not_retried():
+    error = classify_tool_error(KeyError("origin"))
+
+    assert error.type == INVALID_REQUEST_ERROR
+    assert error.non_retryable
+    assert classify_tool_error(NotImplementedError()) is None
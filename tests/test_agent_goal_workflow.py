@@ -1,7 +1,10 @@
 import uuid
 
+import pytest
 from temporalio import activity
 from temporalio.client import Client
+from temporalio.exceptions import ApplicationError
+from temporalio.testing import WorkflowEnvironment
 from temporalio.worker import Worker
 
 from models.data_types import (
@@ -13,7 +16,7 @@ from models.data_types import (
     ValidationInput,
     ValidationResult,
 )
-from workflows.agent_goal_workflow import AgentGoalWorkflow
+from workflows.agent_goal_workflow import FAILED_LLM_TURN_MESSAGE, AgentGoalWorkflow
 
 
 class TestAgentGoalWorkflow:
@@ -541,3 +544,684 @@ class TestAgentGoalWorkflow:
             # Verify at least the first message was processed
             message_texts = [str(msg["response"]) for msg in user_messages]
             assert any("First message" in text for text in message_texts)
+
+    async def test_llm_activities_routed_to_llm_task_queue(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test LLM activities run on the dedicated LLM worker when configured."""
+        from unittest.mock import patch
+
+        from temporalio.worker import UnsandboxedWorkflowRunner
+
+        task_queue_name = str(uuid.uuid4())
+        llm_task_queue_name = str(uuid.uuid4())
+        llm_queues_seen = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            llm_queues_seen.append(activity.info().task_queue)
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            llm_queues_seen.append(activity.info().task_queue)
+            return {"next": "done", "response": "Test response from LLM"}
+
+        # The module constant is read at schedule time, so run unsandboxed to
+        # let the patch apply to the workflow code.
+        with patch("workflows.agent_goal_workflow.LLM_TASK_QUEUE", llm_task_queue_name):
+            async with Worker(
+                client,
+                task_queue=task_queue_name,
+                workflows=[AgentGoalWorkflow],
+                activities=[mock_get_wf_env_vars],
+                workflow_runner=UnsandboxedWorkflowRunner(),
+            ), Worker(
+                client,
+                task_queue=llm_task_queue_name,
+                activities=[mock_agent_validatePrompt, mock_agent_toolPlanner],
+            ):
+                handle = await client.start_workflow(
+                    AgentGoalWorkflow.run,
+                    sample_combined_input,
+                    id=str(uuid.uuid4()),
+                    task_queue=task_queue_name,
+                )
+                await handle.signal(AgentGoalWorkflow.user_prompt, "Hello")
+                await handle.result()
+
+        assert llm_queues_seen == [llm_task_queue_name, llm_task_queue_name]
+
+    async def test_tool_activities_follow_routing_table(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test a routed tool runs on its own worker pool and others stay local."""
+        import asyncio
+        from datetime import timedelta
+        from unittest.mock import patch
+
+        from shared.tool_routing import ToolRoute
+        from workflows.sandbox import create_workflow_runner
+
+        task_queue_name = str(uuid.uuid4())
+        tool_task_queue_name = str(uuid.uuid4())
+        planner_calls = []
+        tool_queues_seen = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            planner_calls.append(input)
+            if len(planner_calls) == 1:
+                return {
+                    "next": "confirm",
+                    "tool": "TestTool",
+                    "args": {"test_arg": "test_value"},
+                    "response": "Ready to execute tool",
+                }
+            return {"next": "done", "response": "All done"}
+
+        @activity.defn(name="TestTool")
+        async def mock_test_tool(args: dict) -> dict:
+            tool_queues_seen.append(
+                (activity.info().task_queue, activity.info().start_to_close_timeout)
+            )
+            return {"result": "Test tool executed successfully"}
+
+        # shared.tool_routing is passed through the sandbox, so patching its
+        # table is visible to the workflow.
+        routes = {
+            "TestTool": ToolRoute(
+                task_queue=tool_task_queue_name,
+                start_to_close_timeout=timedelta(seconds=42),
+            )
+        }
+        with patch.dict("shared.tool_routing.TOOL_ROUTES", routes):
+            async with Worker(
+                client,
+                task_queue=task_queue_name,
+                workflows=[AgentGoalWorkflow],
+                activities=[
+                    mock_get_wf_env_vars,
+                    mock_agent_validatePrompt,
+                    mock_agent_toolPlanner,
+                ],
+                workflow_runner=create_workflow_runner(),
+            ), Worker(
+                client,
+                task_queue=tool_task_queue_name,
+                activities=[mock_test_tool],
+            ):
+                handle = await client.start_workflow(
+                    AgentGoalWorkflow.run,
+                    sample_combined_input,
+                    id=str(uuid.uuid4()),
+                    task_queue=task_queue_name,
+                )
+                await handle.signal(AgentGoalWorkflow.user_prompt, "Run the tool")
+                while not await handle.query(AgentGoalWorkflow.get_latest_tool_data):
+                    await asyncio.sleep(0.1)
+                await handle.signal(AgentGoalWorkflow.confirm)
+                await handle.result()
+
+        assert tool_queues_seen == [(tool_task_queue_name, timedelta(seconds=42))]
+
+    async def test_local_tool_runs_as_local_activity(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test tools routed as local run as local activities on the worker."""
+        import asyncio
+        from unittest.mock import patch
+
+        from shared.tool_routing import ToolRoute
+        from workflows.sandbox import create_workflow_runner
+
+        task_queue_name = str(uuid.uuid4())
+        planner_calls = []
+        tool_runs_local = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            planner_calls.append(input)
+            if len(planner_calls) == 1:
+                return {
+                    "next": "confirm",
+                    "tool": "TestTool",
+                    "args": {"test_arg": "test_value"},
+                    "response": "Ready to execute tool",
+                }
+            return {"next": "done", "response": "All done"}
+
+        @activity.defn(name="TestTool")
+        async def mock_test_tool(args: dict) -> dict:
+            tool_runs_local.append(activity.info().is_local)
+            return {"result": "Test tool executed successfully"}
+
+        with patch.dict(
+            "shared.tool_routing.TOOL_ROUTES", {"TestTool": ToolRoute(local=True)}
+        ):
+            async with Worker(
+                client,
+                task_queue=task_queue_name,
+                workflows=[AgentGoalWorkflow],
+                activities=[
+                    mock_get_wf_env_vars,
+                    mock_agent_validatePrompt,
+                    mock_agent_toolPlanner,
+                    mock_test_tool,
+                ],
+                workflow_runner=create_workflow_runner(),
+            ):
+                handle = await client.start_workflow(
+                    AgentGoalWorkflow.run,
+                    sample_combined_input,
+                    id=str(uuid.uuid4()),
+                    task_queue=task_queue_name,
+                )
+                await handle.signal(AgentGoalWorkflow.user_prompt, "Run the tool")
+                while not await handle.query(AgentGoalWorkflow.get_latest_tool_data):
+                    await asyncio.sleep(0.1)
+                await handle.signal(AgentGoalWorkflow.confirm)
+                await handle.result()
+
+        assert tool_runs_local == [True]
+
+    async def test_env_settings_in_input_skip_env_lookup_activity(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test env settings passed by the starter replace get_wf_env_vars."""
+        task_queue_name = str(uuid.uuid4())
+        env_lookups = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            env_lookups.append(input)
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            return {"next": "done", "response": "Test response from LLM"}
+
+        sample_combined_input.env_settings = EnvLookupOutput(
+            show_confirm=False, multi_goal_mode=False
+        )
+
+        async with Worker(
+            client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            handle = await client.start_workflow(
+                AgentGoalWorkflow.run,
+                sample_combined_input,
+                id=str(uuid.uuid4()),
+                task_queue=task_queue_name,
+            )
+            await handle.signal(AgentGoalWorkflow.user_prompt, "Hello")
+            await handle.result()
+
+            tool_data = await handle.query(AgentGoalWorkflow.get_latest_tool_data)
+
+        assert env_lookups == []
+        assert tool_data["force_confirm"] is False
+
+    async def test_queued_user_prompts_are_coalesced(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test user prompts queued together get one validation and plan."""
+        task_queue_name = str(uuid.uuid4())
+        validated_prompts = []
+        planned_prompts = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            validated_prompts.append(validation_input.prompt)
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            planned_prompts.append(input.prompt)
+            return {"next": "done", "response": "Test response from LLM"}
+
+        # Queue three prompts before any worker picks up the workflow
+        handle = await client.start_workflow(
+            AgentGoalWorkflow.run,
+            sample_combined_input,
+            id=str(uuid.uuid4()),
+            task_queue=task_queue_name,
+            start_signal="user_prompt",
+            start_signal_args=["First"],
+        )
+        await handle.signal(AgentGoalWorkflow.user_prompt, "Second")
+        await handle.signal(AgentGoalWorkflow.user_prompt, "Third")
+
+        async with Worker(
+            client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            await handle.result()
+            history = await handle.query(AgentGoalWorkflow.get_conversation_history)
+
+        assert validated_prompts == ["First\nSecond\nThird"]
+        assert planned_prompts == ["First\nSecond\nThird"]
+        user_messages = [
+            m["response"] for m in history["messages"] if m["actor"] == "user"
+        ]
+        assert user_messages == ["First", "Second", "Third"]
+
+    async def test_newer_prompt_cancels_in_flight_planner(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test a newer user prompt cancels the running planner activity."""
+        import asyncio
+
+        task_queue_name = str(uuid.uuid4())
+        planner_started = asyncio.Event()
+        planned_prompts = []
+        cancelled_prompts = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            planned_prompts.append(input.prompt)
+            if len(planned_prompts) == 1:
+                planner_started.set()
+                try:
+                    while True:
+                        activity.heartbeat()
+                        await asyncio.sleep(0.1)
+                except asyncio.CancelledError:
+                    cancelled_prompts.append(input.prompt)
+                    raise
+            return {"next": "done", "response": "Test response from LLM"}
+
+        async with Worker(
+            client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            handle = await client.start_workflow(
+                AgentGoalWorkflow.run,
+                sample_combined_input,
+                id=str(uuid.uuid4()),
+                task_queue=task_queue_name,
+            )
+            await handle.signal(AgentGoalWorkflow.user_prompt, "First")
+            await asyncio.wait_for(planner_started.wait(), timeout=10)
+            await handle.signal(AgentGoalWorkflow.user_prompt, "Second")
+            await asyncio.wait_for(handle.result(), timeout=30)
+
+        assert cancelled_prompts == ["First"]
+        assert planned_prompts == ["First", "First\nSecond"]
+
+    async def test_non_retryable_planner_failure_fails_only_the_turn(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test a planner request the provider rejects is reported to the user
+        without retrying, and the session carries on."""
+        import asyncio
+
+        task_queue_name = str(uuid.uuid4())
+        planned_prompts = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            planned_prompts.append(input.prompt)
+            if input.prompt == "First":
+                raise ApplicationError(
+                    "Context window exceeded", type="InvalidRequest", non_retryable=True
+                )
+            return {"next": "done", "response": "Test response from LLM"}
+
+        async with Worker(
+            client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            handle = await client.start_workflow(
+                AgentGoalWorkflow.run,
+                sample_combined_input,
+                id=str(uuid.uuid4()),
+                task_queue=task_queue_name,
+            )
+            await handle.signal(AgentGoalWorkflow.user_prompt, "First")
+
+            async def agent_messages():
+                history = await handle.query(AgentGoalWorkflow.get_conversation_history)
+                return [
+                    message["response"]
+                    for message in history["messages"]
+                    if message["actor"] == "agent"
+                ]
+
+            for _ in range(100):
+                if await agent_messages():
+                    break
+                await asyncio.sleep(0.1)
+            assert await agent_messages() == [FAILED_LLM_TURN_MESSAGE]
+
+            await handle.signal(AgentGoalWorkflow.user_prompt, "Second")
+            await asyncio.wait_for(handle.result(), timeout=30)
+
+        assert planned_prompts == ["First", "Second"]
+
+    async def test_reply_with_missing_args_skips_llm_calls(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test a reply that just supplies the asked-for argument goes straight
+        to confirmation without validation or planning."""
+        import asyncio
+
+        task_queue_name = str(uuid.uuid4())
+        llm_calls = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            llm_calls.append(validation_input.prompt)
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            llm_calls.append(input.prompt)
+            return {
+                "next": "question",
+                "tool": "TestTool",
+                "args": {"test_arg": None},
+                "response": "What's your order number?",
+            }
+
+        sample_combined_input.agent_goal.tools[0].arguments[0].type = "number"
+
+        async with Worker(
+            client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            handle = await client.start_workflow(
+                AgentGoalWorkflow.run,
+                sample_combined_input,
+                id=str(uuid.uuid4()),
+                task_queue=task_queue_name,
+            )
+            await handle.signal(AgentGoalWorkflow.user_prompt, "Check my order")
+
+            async def wait_for_tool_data(expected_next: str) -> dict:
+                for _ in range(100):
+                    tool_data = await handle.query(
+                        AgentGoalWorkflow.get_latest_tool_data
+                    )
+                    if tool_data and tool_data.get("next") == expected_next:
+                        return tool_data
+                    await asyncio.sleep(0.1)
+
+            await wait_for_tool_data("question")
+            await handle.signal(AgentGoalWorkflow.user_prompt, "It's 102")
+            tool_data = await wait_for_tool_data("confirm")
+            await handle.signal(AgentGoalWorkflow.end_chat)
+            await asyncio.wait_for(handle.result(), timeout=30)
+
+        assert tool_data["args"] == {"test_arg": 102}
+        assert llm_calls == ["Check my order", "Check my order"]
+
+    async def test_idle_session_hibernates_with_summary(
+        self, env: WorkflowEnvironment, sample_combined_input: CombinedInput
+    ):
+        """Test an idle session summarizes itself and completes."""
+        if not env.supports_time_skipping:
+            pytest.skip("Needs --workflow-environment time-skipping")
+
+        task_queue_name = str(uuid.uuid4())
+        sample_combined_input.agent_goal.idle_timeout_minutes = 30
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            if "summary" in input.prompt:
+                return {"summary": "User asked about trains."}
+            return {"next": "question", "response": "Where to?"}
+
+        async with Worker(
+            env.client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            handle = await env.client.start_workflow(
+                AgentGoalWorkflow.run,
+                sample_combined_input,
+                id=str(uuid.uuid4()),
+                task_queue=task_queue_name,
+            )
+            await handle.signal(AgentGoalWorkflow.user_prompt, "Book a train")
+            await handle.result()
+
+            resume_input = await handle.query(AgentGoalWorkflow.get_resume_input)
+            assert (
+                resume_input.tool_params.conversation_summary
+                == "User asked about trains."
+            )
+            assert resume_input.agent_goal.id == sample_combined_input.agent_goal.id
+
+    async def test_pending_confirmation_keeps_idle_session_open(
+        self, env: WorkflowEnvironment, sample_combined_input: CombinedInput
+    ):
+        """Test a session waiting for a tool confirmation doesn't hibernate."""
+        if not env.supports_time_skipping:
+            pytest.skip("Needs --workflow-environment time-skipping")
+
+        from datetime import timedelta
+
+        from temporalio.client import WorkflowExecutionStatus
+
+        task_queue_name = str(uuid.uuid4())
+        sample_combined_input.agent_goal.idle_timeout_minutes = 30
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            return {
+                "next": "confirm",
+                "tool": "TestTool",
+                "args": {"test_arg": "value"},
+                "response": "Ready to run TestTool",
+            }
+
+        async with Worker(
+            env.client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            handle = await env.client.start_workflow(
+                AgentGoalWorkflow.run,
+                sample_combined_input,
+                id=str(uuid.uuid4()),
+                task_queue=task_queue_name,
+            )
+            await handle.signal(AgentGoalWorkflow.user_prompt, "Run the test tool")
+            await env.sleep(timedelta(hours=2))
+
+            description = await handle.describe()
+            tool_data = await handle.query(AgentGoalWorkflow.get_latest_tool_data)
+            await handle.signal(AgentGoalWorkflow.end_chat)
+            await handle.result()
+
+        assert description.status == WorkflowExecutionStatus.RUNNING
+        assert tool_data["next"] == "confirm"
+
+    async def test_clear_request_routes_straight_to_its_goal(
+        self, client: Client, sample_combined_input: CombinedInput
+    ):
+        """Test a request that clearly names a goal skips agent selection and
+        validation, and is planned by that goal."""
+        import asyncio
+
+        from goals.agent_selection import goal_choose_agent_type
+
+        task_queue_name = str(uuid.uuid4())
+        validated = []
+        planner_goals = []
+
+        @activity.defn(name="get_wf_env_vars")
+        async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+            return EnvLookupOutput(show_confirm=True, multi_goal_mode=True)
+
+        @activity.defn(name="agent_validatePrompt")
+        async def mock_agent_validatePrompt(
+            validation_input: ValidationInput,
+        ) -> ValidationResult:
+            validated.append(validation_input.prompt)
+            return ValidationResult(validationResult=True, validationFailedReason={})
+
+        @activity.defn(name="agent_toolPlanner")
+        async def mock_agent_toolPlanner(input: ToolPromptInput) -> dict:
+            planner_goals.append(input.context_instructions)
+            return {"next": "question", "response": "How much would you like?"}
+
+        sample_combined_input.agent_goal = goal_choose_agent_type
+
+        async with Worker(
+            client,
+            task_queue=task_queue_name,
+            workflows=[AgentGoalWorkflow],
+            activities=[
+                mock_get_wf_env_vars,
+                mock_agent_validatePrompt,
+                mock_agent_toolPlanner,
+            ],
+        ):
+            handle = await client.start_workflow(
+                AgentGoalWorkflow.run,
+                sample_combined_input,
+                id=str(uuid.uuid4()),
+                task_queue=task_queue_name,
+            )
+            await handle.signal(
+                AgentGoalWorkflow.user_prompt, "I'd like to apply for a loan"
+            )
+            for _ in range(100):
+                if planner_goals:
+                    break
+                await asyncio.sleep(0.1)
+            goal = await handle.query(AgentGoalWorkflow.get_agent_goal)
+            await handle.signal(AgentGoalWorkflow.end_chat)
+            await asyncio.wait_for(handle.result(), timeout=30)
+
+        assert goal.id == "goal_fin_loan_application"
+        assert validated == []
+        assert len(planner_goals) == 1
+        assert "FinCheckAccountSubmitLoanApproval" in planner_goals[0]
@@ -0,0 +1,100 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from fastapi import HTTPException
+from temporalio.exceptions import WorkflowAlreadyStartedError
+from temporalio.service import RPCError, RPCStatusCode
+
+import api.main
+from models.data_types import AgentGoalWorkflowParams, CombinedInput
+
+
+@pytest.fixture
+def combined_input(sample_agent_goal):
+    return CombinedInput(
+        tool_params=AgentGoalWorkflowParams(None, None), agent_goal=sample_agent_goal
+    )
+
+
+@pytest.fixture
+def temporal_client():
+    client = MagicMock()
+    client.start_workflow = AsyncMock()
+    handle = MagicMock()
+    handle.signal = AsyncMock()
+    client.get_workflow_handle.return_value = handle
+    with patch.object(api.main, "temporal_client", client):
+        yield client
+
+
+async def test_start_uses_signal_with_start_by_default(temporal_client, combined_input):
+    with patch.object(api.main, "TEMPORAL_EAGER_WORKFLOW_START", False):
+        await api.main.start_agent_workflow("wf", combined_input, "hello")
+
+    kwargs = temporal_client.start_workflow.call_args.kwargs
+    assert kwargs["start_signal"] == "user_prompt"
+    assert kwargs["start_signal_args"] == ["hello"]
+    assert "request_eager_start" not in kwargs
+
+
+async def test_eager_start_puts_prompt_in_workflow_input(
+    temporal_client, combined_input
+):
+    with patch.object(api.main, "TEMPORAL_EAGER_WORKFLOW_START", True):
+        await api.main.start_agent_workflow("wf", combined_input, "hello")
+
+    args, kwargs = temporal_client.start_workflow.call_args
+    assert kwargs["request_eager_start"] is True
+    assert "start_signal" not in kwargs
+    assert list(args[1].tool_params.prompt_queue) == ["hello"]
+    temporal_client.get_workflow_handle.return_value.signal.assert_not_called()
+
+
+async def test_eager_start_signals_running_workflow(temporal_client, combined_input):
+    temporal_client.start_workflow.side_effect = WorkflowAlreadyStartedError(
+        "wf", "AgentGoalWorkflow"
+    )
+    with patch.object(api.main, "TEMPORAL_EAGER_WORKFLOW_START", True):
+        await api.main.start_agent_workflow("wf", combined_input, "hello")
+
+    temporal_client.get_workflow_handle.assert_called_once_with("wf")
+    temporal_client.get_workflow_handle.return_value.signal.assert_awaited_once_with(
+        "user_prompt", "hello"
+    )
+
+
+async def test_send_prompt_signals_running_workflow(temporal_client):
+    await api.main.send_prompt("hello")
+
+    temporal_client.get_workflow_handle.return_value.signal.assert_awaited_once_with(
+        "user_prompt", "hello"
+    )
+    temporal_client.start_workflow.assert_not_called()
+
+
+async def test_send_prompt_resumes_hibernated_session(temporal_client, combined_input):
+    handle = temporal_client.get_workflow_handle.return_value
+    handle.signal.side_effect = RPCError(
+        "workflow execution already completed", RPCStatusCode.NOT_FOUND, b""
+    )
+    combined_input.tool_params.conversation_summary = "User asked about trains."
+    handle.query = AsyncMock(return_value=combined_input)
+
+    with patch.object(api.main, "TEMPORAL_EAGER_WORKFLOW_START", False):
+        await api.main.send_prompt("hello")
+
+    args, kwargs = temporal_client.start_workflow.call_args
+    assert args[1] is combined_input
+    assert kwargs["start_signal_args"] == ["hello"]
+
+
+async def test_confirm_without_running_session_is_not_found(temporal_client):
+    handle = temporal_client.get_workflow_handle.return_value
+    handle.signal.side_effect = RPCError(
+        "workflow execution already completed", RPCStatusCode.NOT_FOUND, b""
+    )
+
+    with pytest.raises(HTTPException) as error:
+        await api.main.send_confirm()
+
+    assert error.value.status_code == 404
@@ -0,0 +1,45 @@
+import pytest
+
+from goals import goal_list
+from shared.goal_routing import routable_goals, route_goal
+
+GOALS = routable_goals(goal_list)
+
+
+@pytest.mark.parametrize(
+    "prompt, goal_id",
+    [
+        ("I'd like to apply for a loan", "goal_fin_loan_application"),
+        ("I want to transfer some money to savings", "goal_fin_move_money"),
+        ("I'd like to schedule some time off", "goal_hr_schedule_pto"),
+        ("Take me to a premier league match", "goal_match_train_invoice"),
+    ],
+)
+def test_clear_requests_route_to_their_goal(prompt, goal_id):
+    assert route_goal(prompt, GOALS).id == goal_id
+
+
+@pytest.mark.parametrize(
+    "prompt", ["hi", "what can you do?", "which agents are there?", "yes"]
+)
+def test_requests_naming_no_goal_fall_back_to_agent_selection(prompt):
+    assert route_goal(prompt, GOALS) is None
+
+
+def test_ambiguous_requests_fall_back_to_agent_selection():
+    # Both travel goals book trips
+    assert route_goal("I'd like to travel", GOALS) is None
+
+
+def test_routable_goals_follow_goal_categories():
+    goals = routable_goals(goal_list, ["hr"])
+
+    assert {goal.category_tag for goal in goals} <= {"hr", "system"}
+    assert route_goal("I'd like to apply for a loan", goals) is None
+
+
+def test_agent_selection_and_mcp_goals_are_not_routable():
+    categories = {goal.category_tag for goal in GOALS}
+
+    assert "agent_selection" not in categories
+    assert all(goal.mcp_server_definition is None for goal in GOALS)
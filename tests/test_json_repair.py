@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from shared.json_repair import TruncatedJSONError, parse_llm_json, repair_json
+
+
+def test_valid_json_is_not_marked_repaired():
+    assert parse_llm_json('{"next": "done"}') == ({"next": "done"}, False)
+
+
+def test_extracts_object_wrapped_in_prose():
+    reply = 'Sure! {"next": "question", "response": "Hi {there}"} Hope that helps.'
+
+    data, repaired = parse_llm_json(reply)
+
+    assert data == {"next": "question", "response": "Hi {there}"}
+    assert repaired
+
+
+def test_repairs_trailing_commas_and_python_literals():
+    reply = '{"validationResult": True, "args": {"a": None,}, "note": "True, ]",}'
+
+    data, _ = parse_llm_json(reply)
+
+    assert data == {"validationResult": True, "args": {"a": None}, "note": "True, ]"}
+
+
+@pytest.mark.parametrize(
+    "truncated",
+    [
+        '{"next": "question", "response": "Where to',
+        '{"next": "question", "response": "Where to?", "to',
+        '{"next": "question", "response": "Where to?", "args": ',
+        '{"a": ["x", "y',
+        '{"next": "confirm", "tool": "FinMoveMoney", "args": {"amount": 10',
+    ],
+)
+def test_truncated_object_is_not_completed(truncated):
+    with pytest.raises(TruncatedJSONError):
+        parse_llm_json(truncated)
+
+
+def test_repair_leaves_strings_alone():
+    assert repair_json('{"a": "None,}"}') == '{"a": "None,}"}'
+
+
+def test_missing_required_keys_raise():
+    with pytest.raises(ValueError, match="response"):
+        parse_llm_json('{"next": "done"}', required_keys=["next", "response"])
+
+
+def test_text_without_object_raises_decode_error():
+    with pytest.raises(json.JSONDecodeError):
+        parse_llm_json("I can't help with that.")
@@ -0,0 +1,72 @@
+import pytest
+
+from models.tool_definitions import AgentGoal
+from shared.llm_profiles import (
+    DEFAULT_LLM_PROFILE,
+    PLANNER_PROFILE,
+    VALIDATION_PROFILE,
+    LLMProfile,
+    llm_profile_for,
+    load_llm_profiles,
+    parse_llm_profile,
+)
+
+
+def test_no_profiles_file_uses_worker_llm_settings():
+    assert load_llm_profiles(None) == {DEFAULT_LLM_PROFILE: LLMProfile()}
+
+
+def test_load_llm_profiles_bases_profiles_on_default(tmp_path):
+    profiles_file = tmp_path / "llm_profiles.yaml"
+    profiles_file.write_text(
+        """
+default:
+  timeout: 15
+validation:
+  model: openai/gpt-4o-mini
+  max_tokens: 300
+  temperature: 0
+claude:
+  model: anthropic/claude-3-5-sonnet-20240620
+  api_key_env: ANTHROPIC_API_KEY
+  base_url: ""
+"""
+    )
+
+    profiles = load_llm_profiles(str(profiles_file))
+
+    assert profiles[DEFAULT_LLM_PROFILE] == LLMProfile(timeout=15.0)
+    assert profiles[VALIDATION_PROFILE] == LLMProfile(
+        model="openai/gpt-4o-mini", max_tokens=300, temperature=0.0, timeout=15.0
+    )
+    assert profiles["claude"].api_key_env == "ANTHROPIC_API_KEY"
+    assert profiles["claude"].base_url == ""
+
+
+def test_profiles_on_one_model_must_share_rate_limits(tmp_path):
+    profiles_file = tmp_path / "llm_profiles.yaml"
+    profiles_file.write_text(
+        """
+validation:
+  model: openai/gpt-4o-mini
+  requests_per_minute: 500
+planner:
+  model: openai/gpt-4o-mini
+  requests_per_minute: 100
+"""
+    )
+
+    with pytest.raises(ValueError, match="'validation' and 'planner'"):
+        load_llm_profiles(str(profiles_file))
+
+
+def test_unknown_profile_setting_raises():
+    with pytest.raises(ValueError, match="max_token"):
+        parse_llm_profile({"max_token": 300}, LLMProfile())
+
+
+def test_goal_maps_calls_to_profiles(sample_agent_goal: AgentGoal):
+    sample_agent_goal.llm_profiles = {VALIDATION_PROFILE: "claude"}
+
+    assert llm_profile_for(sample_agent_goal, VALIDATION_PROFILE) == "claude"
+    assert llm_profile_for(sample_agent_goal, PLANNER_PROFILE) == PLANNER_PROFILE
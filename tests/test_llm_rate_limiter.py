@@ -0,0 +1,98 @@
+from unittest.mock import patch
+
+import pytest
+
+from activities.llm_rate_limiter import (
+    BucketDemand,
+    LLMRateLimiter,
+    RateLimitWaitTooLong,
+    SQLiteRateLimitStore,
+    retry_after_seconds,
+    take_from_buckets,
+)
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    def __init__(self, headers):
+        super().__init__("Rate limit reached")
+        self.litellm_response_headers = headers
+
+
+def test_buckets_refill_at_the_per_minute_rate():
+    buckets = {}
+    demands = [BucketDemand("gpt:requests", 1, 60)]
+
+    for _ in range(60):
+        assert take_from_buckets(buckets, demands, now=0) == 0
+    assert take_from_buckets(buckets, demands, now=0) == 1.0
+    assert take_from_buckets(buckets, demands, now=1) == 0
+
+
+def test_demands_are_taken_all_or_nothing():
+    buckets = {}
+    demands = [
+        BucketDemand("gpt:requests", 1, 60),
+        BucketDemand("gpt:tokens", 600, 1000),
+    ]
+
+    assert take_from_buckets(buckets, demands, now=0) == 0
+    # Room for the request but not the tokens: wait for 200 more tokens
+    assert take_from_buckets(buckets, demands, now=0) == 12.0
+    assert buckets["gpt:requests"].level == 59
+
+
+def test_oversized_request_waits_for_a_full_bucket_only():
+    buckets = {}
+    demands = [BucketDemand("gpt:tokens", 5000, 1000)]
+
+    assert take_from_buckets(buckets, demands, now=0) == 0
+    assert take_from_buckets(buckets, demands, now=30) == 30.0
+
+
+def test_sqlite_store_shares_buckets_between_processes(tmp_path):
+    path = str(tmp_path / "limits.db")
+    first, second = SQLiteRateLimitStore(path), SQLiteRateLimitStore(path)
+    demands = [BucketDemand("gpt:requests", 1, 2)]
+
+    assert first.try_take(demands, now=0) == 0
+    assert second.try_take(demands, now=0) == 0
+    assert first.try_take(demands, now=0) == 30.0
+
+
+def test_retry_after_from_response_headers():
+    assert retry_after_seconds(RateLimitError({"retry-after": "7"})) == 7.0
+    assert retry_after_seconds(RateLimitError({"retry-after-ms": "250"})) == 0.25
+    assert retry_after_seconds(RateLimitError({})) is None
+    assert retry_after_seconds(Exception("no headers")) is None
+
+
+async def test_acquire_waits_out_a_pause_instead_of_failing():
+    limiter = LLMRateLimiter()
+    await limiter.pause("gpt", 0.05)
+
+    with patch("activities.llm_rate_limiter.MAX_WAIT_SLICE_SECONDS", 0.01):
+        waited = await limiter.acquire("gpt", 10, requests_per_minute=600)
+
+    assert waited >= 0.04
+    assert await limiter.acquire("other-model", 10) == 0
+
+
+async def test_acquire_raises_when_the_wait_exceeds_max_wait():
+    limiter = LLMRateLimiter()
+    await limiter.pause("gpt", 30)
+
+    with pytest.raises(RateLimitWaitTooLong) as error:
+        await limiter.acquire("gpt", 10, max_wait=5)
+
+    assert 29 < error.value.wait <= 30
+
+
+async def test_usage_above_the_estimate_is_charged_to_the_tokens_bucket():
+    limiter = LLMRateLimiter()
+    await limiter.acquire("gpt", 100, tokens_per_minute=1000)
+
+    await limiter.record_tokens("gpt", estimated=100, actual=400)
+
+    assert limiter.store.buckets["gpt:tokens"].level == 600
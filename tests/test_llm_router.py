@@ -0,0 +1,88 @@
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from activities.llm_router import LLMRouter, RouteCandidate
+
+
+class ProviderError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+def make_router(providers):
+    """Router over fake providers: name -> (delay seconds, error or None)."""
+    calls = []
+
+    async def complete(candidate):
+        name = candidate.completion_kwargs["model"]
+        calls.append(name)
+        delay, error = providers[name]
+        await asyncio.sleep(delay)
+        if error:
+            raise error
+        return name
+
+    return LLMRouter(complete), calls
+
+
+def candidates(*names):
+    return [RouteCandidate(name, {"model": name}) for name in names]
+
+
+async def test_fails_over_on_rate_limit_and_tries_provider_last_afterwards():
+    router, calls = make_router(
+        {"primary": (0, ProviderError(429)), "secondary": (0, None)}
+    )
+
+    assert await router.route(candidates("primary", "secondary")) == "secondary"
+    assert await router.route(candidates("primary", "secondary")) == "secondary"
+    assert calls == ["primary", "secondary", "secondary"]
+
+
+async def test_request_errors_do_not_fail_over():
+    router, calls = make_router(
+        {"primary": (0, ProviderError(400)), "secondary": (0, None)}
+    )
+
+    with pytest.raises(ProviderError):
+        await router.route(candidates("primary", "secondary"))
+    assert calls == ["primary"]
+
+
+async def test_hedged_request_answers_when_primary_is_slow():
+    router, calls = make_router({"slow": (5, None), "fast": (0.01, None)})
+
+    with patch("activities.llm_router.DEFAULT_HEDGE_DELAY_SECONDS", 0.05):
+        result = await asyncio.wait_for(
+            router.route(candidates("slow", "fast"), hedge=True), timeout=2
+        )
+
+    assert result == "fast"
+    assert calls == ["slow", "fast"]
+
+
+async def test_prefer_fastest_orders_by_measured_latency():
+    router, calls = make_router({"a": (0, None), "b": (0, None)})
+    for _ in range(3):
+        router.record_latency("a", 2.0)
+        router.record_latency("b", 0.5)
+
+    assert await router.route(candidates("a", "b"), prefer_fastest=True) == "b"
+    assert await router.route(candidates("a", "b")) == "a"
+
+
+async def test_latency_excludes_the_rate_limiter_wait():
+    clock = [0.0]
+
+    async def complete(candidate):
+        candidate.limiter_wait = 4.0
+        clock[0] += 5.0
+        return "ok"
+
+    router = LLMRouter(complete, clock=lambda: clock[0])
+    await router.route(candidates("a"))
+
+    assert list(router.latencies["a"]) == [1.0]
@@ -211,6 +211,90 @@ async def test_workflow_loads_mcp_tools_dynamically(client: Client):
         await handle.result()
 
 
+@pytest.mark.asyncio
+async def test_first_prompt_is_validated_with_mcp_tools(client: Client):
+    """A run that starts with a user prompt validates it against the MCP
+    tools, even when they load slower than the prompt arrives."""
+    task_queue_name = str(uuid.uuid4())
+    server_def = MCPServerDefinition(name="test", command="python", args=["srv.py"])
+    goal = AgentGoal(
+        id="g_mcp_validate",
+        category_tag="food",
+        agent_name="agent",
+        agent_friendly_description="",
+        description="",
+        tools=[],
+        starter_prompt="",
+        example_conversation_history="",
+        mcp_server_definition=server_def,
+    )
+    combined_input = CombinedInput(
+        agent_goal=goal,
+        tool_params=AgentGoalWorkflowParams(
+            conversation_summary=None, prompt_queue=deque(["show me the products"])
+        ),
+    )
+    validated_tools = []
+
+    @activity.defn(name="get_wf_env_vars")
+    async def mock_get_wf_env_vars(input: EnvLookupInput) -> EnvLookupOutput:
+        return EnvLookupOutput(show_confirm=True, multi_goal_mode=False)
+
+    @activity.defn(name="agent_validatePrompt")
+    async def mock_validate(input: ValidationInput) -> ValidationResult:
+        validated_tools.append([tool.name for tool in input.agent_goal.tools])
+        return ValidationResult(validationResult=True, validationFailedReason={})
+
+    @activity.defn(name="agent_toolPlanner")
+    async def mock_planner(input: ToolPromptInput) -> dict:
+        return {"next": "question", "response": "Which products?"}
+
+    @activity.defn(name="mcp_list_tools")
+    async def mock_mcp_list_tools(
+        server_definition: MCPServerDefinition, include_tools=None
+    ):
+        await asyncio.sleep(0.5)
+        return {
+            "server_name": server_definition.name,
+            "success": True,
+            "tools": {
+                "list_products": {
+                    "name": "list_products",
+                    "description": "",
+                    "inputSchema": {},
+                },
+            },
+            "total_available": 1,
+            "filtered_count": 1,
+        }
+
+    async with Worker(
+        client,
+        task_queue=task_queue_name,
+        workflows=[AgentGoalWorkflow],
+        activities=[
+            mock_get_wf_env_vars,
+            mock_validate,
+            mock_planner,
+            mock_mcp_list_tools,
+        ],
+    ):
+        handle = await client.start_workflow(
+            AgentGoalWorkflow.run,
+            combined_input,
+            id=str(uuid.uuid4()),
+            task_queue=task_queue_name,
+        )
+        for _ in range(50):
+            if validated_tools:
+                break
+            await asyncio.sleep(0.1)
+        await handle.signal(AgentGoalWorkflow.end_chat)
+        await handle.result()
+
+    assert validated_tools == [["list_products"]]
+
+
 @pytest.mark.asyncio
 async def test_mcp_tool_execution_flow(client: Client):
     """MCP tool execution should pass server_definition to activity."""
@@ -0,0 +1,48 @@
+from unittest.mock import patch
+
+import pytest
+
+from shared.prompt_prevalidation import is_trivially_valid
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "yes",
+        "Yes, go ahead!",
+        "OK",
+        "no thanks",
+        "bob.johnson@emailzzz.com",
+        "my email is bob.johnson@emailzzz.com",
+        "Dec 1 through Dec 5",
+        "2025-03-01",
+        "102",
+        "$250",
+    ],
+)
+def test_short_affirmative_and_data_replies_are_accepted(prompt):
+    assert is_trivially_valid(prompt)
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "",
+        "I want to go to Paris",
+        "no, book the other one",
+        "Yes, address is 123 Main St Phoenix, AZ",
+        "I'd like to move $500 from savings",
+        "May I have a cat?",
+    ],
+)
+def test_ambiguous_replies_go_to_the_llm(prompt):
+    assert not is_trivially_valid(prompt)
+
+
+def test_classifiers_decide_what_the_rules_dont():
+    def classify(prompt):
+        return True if prompt == "San Francisco" else None
+
+    with patch("shared.prompt_prevalidation.PREVALIDATION_CLASSIFIERS", [classify]):
+        assert is_trivially_valid("San Francisco")
+        assert not is_trivially_valid("Melbourne")
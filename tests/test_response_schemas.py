@@ -0,0 +1,44 @@
+from dataclasses import dataclass
+from typing import Literal, Optional
+
+from models.response_schemas import (
+    RESPONSE_SCHEMAS,
+    TOOL_DATA_SCHEMA,
+    VALIDATION_SCHEMA,
+    json_schema_for,
+)
+
+
+def test_tool_data_schema_omits_workflow_fields():
+    schema = RESPONSE_SCHEMAS[TOOL_DATA_SCHEMA]
+
+    assert set(schema["properties"]) == {"next", "tool", "args", "response"}
+    assert schema["properties"]["next"]["enum"] == [
+        "confirm",
+        "question",
+        "pick-new-goal",
+        "done",
+    ]
+    assert schema["required"] == ["next", "response"]
+
+
+def test_validation_schema_matches_validation_result():
+    schema = RESPONSE_SCHEMAS[VALIDATION_SCHEMA]
+
+    assert schema["properties"] == {
+        "validationResult": {"type": "boolean"},
+        "validationFailedReason": {"type": "object"},
+    }
+
+
+def test_dataclass_fields_without_defaults_are_required():
+    @dataclass
+    class Reply:
+        kind: Literal["a", "b"]
+        count: int
+        note: Optional[str] = None
+
+    schema = json_schema_for(Reply)
+
+    assert schema["properties"]["note"] == {"type": "string"}
+    assert schema["required"] == ["kind", "count"]
@@ -0,0 +1,98 @@
+from models.tool_definitions import ToolArgument, ToolDefinition
+from shared.slot_extractors import extract_dates, extract_numbers, fill_missing_args
+
+FUTURE_PTO_CALC = ToolDefinition(
+    name="FuturePTOCalc",
+    description="",
+    arguments=[
+        ToolArgument(name="start_date", type="string", description=""),
+        ToolArgument(name="end_date", type="string", description=""),
+        ToolArgument(name="email", type="string", description=""),
+    ],
+)
+
+
+def test_extract_dates_reads_iso_and_written_dates():
+    dates = extract_dates("from March 14, 2025 to 2025-03-18")
+
+    assert [value for value, _ in dates] == ["2025-03-14", "2025-03-18"]
+
+
+def test_extract_numbers_reads_dollar_amounts():
+    assert [value for value, _ in extract_numbers("$1,250.50 or 3")] == [1250.5, 3]
+
+
+def test_fills_missing_args_from_a_reply_that_only_supplies_them():
+    args = {"start_date": None, "end_date": None, "email": "bob@example.com"}
+
+    filled = fill_missing_args(
+        FUTURE_PTO_CALC, args, "from 2025-06-02 to 2025-06-06 please"
+    )
+
+    assert filled == {
+        "start_date": "2025-06-02",
+        "end_date": "2025-06-06",
+        "email": "bob@example.com",
+    }
+
+
+def test_email_reply_with_filler_words():
+    args = {"start_date": "2025-06-02", "end_date": "2025-06-06", "email": None}
+
+    filled = fill_missing_args(FUTURE_PTO_CALC, args, "Sure, my email is bob@x.io")
+
+    assert filled["email"] == "bob@x.io"
+
+
+def test_ambiguous_or_chatty_replies_are_left_to_the_llm():
+    args = {"start_date": None, "end_date": None, "email": "bob@example.com"}
+
+    # One date for two date arguments
+    assert fill_missing_args(FUTURE_PTO_CALC, args, "2025-06-02") is None
+    # The reply says more than the values asked for
+    assert (
+        fill_missing_args(
+            FUTURE_PTO_CALC, args, "2025-06-02 to 2025-06-06, or maybe later"
+        )
+        is None
+    )
+
+
+def test_arguments_without_an_extractor_need_the_llm():
+    tool = ToolDefinition(
+        name="FindEvents",
+        description="",
+        arguments=[ToolArgument(name="city", type="string", description="")],
+    )
+
+    assert fill_missing_args(tool, {"city": None}, "Melbourne") is None
+
+
+def test_nothing_missing_means_nothing_to_fill():
+    args = {"start_date": "a", "end_date": "b", "email": "c"}
+
+    assert fill_missing_args(FUTURE_PTO_CALC, args, "2025-06-02") is None
+
+
+def test_range_words_that_contradict_the_argument_order_need_the_llm():
+    args = {"start_date": None, "end_date": None, "email": "bob@example.com"}
+
+    assert (
+        fill_missing_args(FUTURE_PTO_CALC, args, "until 2025-03-18 from 2025-03-14")
+        is None
+    )
+    assert fill_missing_args(FUTURE_PTO_CALC, args, "2025-03-18 to 2025-03-14") is None
+
+
+def test_signs_and_other_stray_characters_need_the_llm():
+    tool = ToolDefinition(
+        name="FinMoveMoney",
+        description="",
+        arguments=[ToolArgument(name="amount", type="string", description="")],
+    )
+
+    assert fill_missing_args(tool, {"amount": None}, "-500") is None
+    assert fill_missing_args(tool, {"amount": None}, "500 + 20") is None
+    assert fill_missing_args(tool, {"amount": None}, "$500, please!") == {
+        "amount": "500"
+    }
@@ -0,0 +1,31 @@
+import subprocess
+import sys
+
+import pytest
+
+
+def loaded_modules(statement: str, modules: list[str]) -> list[str]:
+    code = (
+        f"import sys; {statement}; print(*[m for m in {modules!r} if m in sys.modules])"
+    )
+    return subprocess.check_output([sys.executable, "-c", code]).decode().split()
+
+
+def test_api_does_not_load_worker_code():
+    loaded = loaded_modules(
+        "import api.main",
+        ["litellm", "mcp", "pandas", "activities.tool_activities", "workflows"],
+    )
+    assert loaded == []
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import activities.tool_activities",
+        "import workflows.agent_goal_workflow",
+        "import shared.mcp_client_manager",
+    ],
+)
+def test_worker_modules_defer_heavy_imports(statement):
+    assert loaded_modules(statement, ["litellm", "mcp", "pandas"]) == []
@@ -1,11 +1,16 @@
+import dataclasses
 import json
 import os
+import time
+from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from temporalio.client import Client
+from temporalio.exceptions import ApplicationError
 from temporalio.testing import ActivityEnvironment
 
+from activities.activity_errors import RATE_LIMITED_ERROR
 from activities.tool_activities import (
     MCPServerDefinition,
     ToolActivities,
@@ -18,6 +23,9 @@ from models.data_types import (
     ValidationInput,
     ValidationResult,
 )
+from models.response_schemas import RESPONSE_SCHEMAS, TOOL_DATA_SCHEMA
+from shared.json_repair import TruncatedJSONError
+from shared.llm_profiles import VALIDATION_PROFILE, LLMProfile
 
 
 class TestToolActivities:
@@ -57,6 +65,7 @@ class TestToolActivities:
 
             # Verify the mock was called with correct parameters
             mock_planner.assert_called_once()
+            assert mock_planner.call_args[0][0].llm_profile == VALIDATION_PROFILE
 
     @pytest.mark.asyncio
     async def test_agent_validatePrompt_invalid_prompt(
@@ -108,7 +117,9 @@ class TestToolActivities:
             '{"next": "confirm", "tool": "TestTool", "response": "Test response"}'
         )
 
-        with patch("activities.tool_activities.completion") as mock_completion:
+        with patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
             mock_completion.return_value = mock_response
 
             activity_env = ActivityEnvironment()
@@ -122,7 +133,7 @@ class TestToolActivities:
             assert result["response"] == "Test response"
 
             # Verify completion was called with correct parameters
-            mock_completion.assert_called_once()
+            mock_completion.assert_awaited_once()
             call_args = mock_completion.call_args[1]
             assert call_args["model"] == self.tool_activities.llm_model
             assert len(call_args["messages"]) == 2
@@ -146,7 +157,9 @@ class TestToolActivities:
                 0
             ].message.content = '{"next": "done", "response": "Test"}'
 
-            with patch("activities.tool_activities.completion") as mock_completion:
+            with patch(
+                "activities.tool_activities.acompletion", new_callable=AsyncMock
+            ) as mock_completion:
                 mock_completion.return_value = mock_response
 
                 activity_env = ActivityEnvironment()
@@ -157,6 +170,332 @@ class TestToolActivities:
                 assert "base_url" in call_args
                 assert call_args["base_url"] == "https://custom.endpoint.com"
 
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_enforces_response_schema(self):
+        """Test agent_toolPlanner asks for the named schema when supported."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt",
+            context_instructions="Test context instructions",
+            response_schema=TOOL_DATA_SCHEMA,
+        )
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"next": "done", "response": "Hi"}'
+
+        with patch(
+            "activities.tool_activities.supported_response_format",
+            return_value="json_schema",
+        ), patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.return_value = mock_response
+
+            activity_env = ActivityEnvironment()
+            await activity_env.run(self.tool_activities.agent_toolPlanner, prompt_input)
+
+            response_format = mock_completion.call_args[1]["response_format"]
+            assert response_format["type"] == "json_schema"
+            assert (
+                response_format["json_schema"]["schema"]
+                == RESPONSE_SCHEMAS[TOOL_DATA_SCHEMA]
+            )
+
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_falls_back_when_response_format_rejected(self):
+        """Test agent_toolPlanner retries without response_format if rejected."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt",
+            context_instructions="Test context instructions",
+            response_schema=TOOL_DATA_SCHEMA,
+        )
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"next": "done", "response": "Hi"}'
+
+        with patch.dict(os.environ, {"LLM_RESPONSE_FORMAT": "json_object"}), patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            tool_activities = ToolActivities()
+            rejected = Exception(
+                "Invalid parameter: 'response_format' is not supported"
+            )
+            rejected.status_code = 400
+            mock_completion.side_effect = [rejected, mock_response]
+
+            activity_env = ActivityEnvironment()
+            result = await activity_env.run(
+                tool_activities.agent_toolPlanner, prompt_input
+            )
+
+            assert result["next"] == "done"
+            first_call, second_call = mock_completion.call_args_list
+            assert first_call[1]["response_format"] == {"type": "json_object"}
+            assert "response_format" not in second_call[1]
+            assert tool_activities.get_response_format_mode() == "off"
+
+    @pytest.mark.asyncio
+    async def test_response_format_is_kept_when_a_server_error_mentions_it(self):
+        """Test only a 400 naming response_format disables it."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt",
+            context_instructions="Test context instructions",
+            response_schema=TOOL_DATA_SCHEMA,
+        )
+        unavailable = Exception("Upstream error for request with response_format")
+        unavailable.status_code = 503
+
+        with patch.dict(os.environ, {"LLM_RESPONSE_FORMAT": "json_object"}), patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            tool_activities = ToolActivities()
+            mock_completion.side_effect = unavailable
+
+            activity_env = ActivityEnvironment()
+            with pytest.raises(ApplicationError):
+                await activity_env.run(tool_activities.agent_toolPlanner, prompt_input)
+
+            assert mock_completion.call_count == 1
+            assert tool_activities.get_response_format_mode() == "json_object"
+
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_repairs_json_locally(self):
+        """Test agent_toolPlanner repairs JSON wrapped in prose without a retry."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt",
+            context_instructions="Test context instructions",
+            response_schema=TOOL_DATA_SCHEMA,
+        )
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[
+            0
+        ].message.content = 'Here you go: {"next": "done", "response": "Bye",}'
+
+        with patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.return_value = mock_response
+
+            activity_env = ActivityEnvironment()
+            result = await activity_env.run(
+                self.tool_activities.agent_toolPlanner, prompt_input
+            )
+
+            assert result == {"next": "done", "response": "Bye"}
+            mock_completion.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_repairs_json_with_follow_up_call(self):
+        """Test agent_toolPlanner sends only the bad reply for repair."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt",
+            context_instructions="Test context instructions",
+            response_schema=TOOL_DATA_SCHEMA,
+        )
+
+        bad_response = MagicMock()
+        bad_response.choices = [MagicMock()]
+        bad_response.choices[0].message.content = '{"next": "done"}'
+        fixed_response = MagicMock()
+        fixed_response.choices = [MagicMock()]
+        fixed_response.choices[
+            0
+        ].message.content = '{"next": "done", "response": "Bye"}'
+
+        with patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.side_effect = [bad_response, fixed_response]
+
+            activity_env = ActivityEnvironment()
+            result = await activity_env.run(
+                self.tool_activities.agent_toolPlanner, prompt_input
+            )
+
+            assert result == {"next": "done", "response": "Bye"}
+            repair_messages = mock_completion.call_args_list[1][1]["messages"]
+            assert "Test prompt" not in str(repair_messages)
+            assert "Test context instructions" not in str(repair_messages)
+            assert '{"next": "done"}' in repair_messages[1]["content"]
+
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_retries_truncated_json(self):
+        """Test a cut off plan is neither completed nor sent for repair."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt",
+            context_instructions="Test context instructions",
+            response_schema=TOOL_DATA_SCHEMA,
+        )
+
+        truncated_response = MagicMock()
+        truncated_response.choices = [MagicMock()]
+        truncated_response.choices[0].message.content = (
+            '{"next": "confirm", "tool": "FinMoveMoney", "response": "Moving", '
+            '"args": {"accountkey": "bob@x.com", "amount": 10'
+        )
+
+        with patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.return_value = truncated_response
+
+            activity_env = ActivityEnvironment()
+            with pytest.raises(TruncatedJSONError):
+                await activity_env.run(
+                    self.tool_activities.agent_toolPlanner, prompt_input
+                )
+
+            assert mock_completion.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_uses_llm_profile(self):
+        """Test agent_toolPlanner calls the model and settings of its profile."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt",
+            context_instructions="Test context instructions",
+            llm_profile="fast",
+        )
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"next": "done", "response": "Hi"}'
+
+        profiles = {
+            "fast": LLMProfile(
+                model="openai/gpt-4o-mini",
+                api_key_env="FAST_LLM_KEY",
+                max_tokens=300,
+                temperature=0.0,
+                timeout=5.0,
+            )
+        }
+        with patch.dict("shared.llm_profiles.LLM_PROFILES", profiles), patch.dict(
+            os.environ, {"FAST_LLM_KEY": "fast-key"}
+        ), patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.return_value = mock_response
+
+            activity_env = ActivityEnvironment()
+            await activity_env.run(self.tool_activities.agent_toolPlanner, prompt_input)
+
+            call_args = mock_completion.call_args[1]
+            assert call_args["model"] == "openai/gpt-4o-mini"
+            assert call_args["api_key"] == "fast-key"
+            assert call_args["max_tokens"] == 300
+            assert call_args["temperature"] == 0.0
+            assert call_args["timeout"] == 5.0
+
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_fails_over_to_fallback_profile(self):
+        """Test agent_toolPlanner moves to a fallback provider on a 5xx."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt", context_instructions="Test context instructions"
+        )
+
+        mock_response = MagicMock()
+        mock_response.choices = [MagicMock()]
+        mock_response.choices[0].message.content = '{"next": "done", "response": "Hi"}'
+        unavailable = Exception("Service unavailable")
+        unavailable.status_code = 503
+
+        profiles = {
+            "planner": LLMProfile(model="openai/gpt-4o", fallbacks=("backup",)),
+            "backup": LLMProfile(model="anthropic/claude-3-5-sonnet-20240620"),
+        }
+        with patch.dict("shared.llm_profiles.LLM_PROFILES", profiles), patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.side_effect = [unavailable, mock_response]
+
+            activity_env = ActivityEnvironment()
+            result = await activity_env.run(
+                self.tool_activities.agent_toolPlanner, prompt_input
+            )
+
+            assert result["next"] == "done"
+            models = [call[1]["model"] for call in mock_completion.call_args_list]
+            assert models == ["openai/gpt-4o", "anthropic/claude-3-5-sonnet-20240620"]
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_call_pauses_the_model_for_retry_after(self):
+        """Test a 429's Retry-After holds later calls to the same model."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt", context_instructions="Test context instructions"
+        )
+        rate_limited = Exception("Rate limit reached")
+        rate_limited.status_code = 429
+        rate_limited.litellm_response_headers = {"retry-after": "20"}
+
+        profiles = {"planner": LLMProfile(model="openai/gpt-4o")}
+        with patch.dict("shared.llm_profiles.LLM_PROFILES", profiles), patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.side_effect = rate_limited
+
+            activity_env = ActivityEnvironment()
+            with pytest.raises(Exception, match="Rate limit reached"):
+                await activity_env.run(
+                    self.tool_activities.agent_toolPlanner, prompt_input
+                )
+
+        store = self.tool_activities.llm_rate_limiter.store
+        paused_for = store.buckets["openai/gpt-4o:requests"].paused_until - time.time()
+        assert 19 < paused_for <= 20
+
+    @pytest.mark.asyncio
+    async def test_rate_limit_wait_past_the_timeout_is_retried_after_it(self):
+        """Test a limiter wait longer than the activity has left isn't sat out."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt", context_instructions="Test context instructions"
+        )
+        await self.tool_activities.llm_rate_limiter.pause("openai/gpt-4o", 60)
+
+        profiles = {"planner": LLMProfile(model="openai/gpt-4o")}
+        with patch.dict("shared.llm_profiles.LLM_PROFILES", profiles), patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            activity_env = ActivityEnvironment()
+            activity_env.info = dataclasses.replace(
+                activity_env.info,
+                started_time=datetime.now(timezone.utc),
+                start_to_close_timeout=timedelta(seconds=20),
+            )
+            with pytest.raises(ApplicationError) as error:
+                await activity_env.run(
+                    self.tool_activities.agent_toolPlanner, prompt_input
+                )
+
+        assert error.value.type == RATE_LIMITED_ERROR
+        assert 59 < error.value.next_retry_delay.total_seconds() <= 60
+        mock_completion.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_invalid_request_is_not_retried(self):
+        """Test agent_toolPlanner fails a request the provider rejects for good."""
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt", context_instructions="Test context instructions"
+        )
+        unauthorized = Exception("Invalid API key")
+        unauthorized.status_code = 401
+
+        with patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
+            mock_completion.side_effect = unauthorized
+
+            activity_env = ActivityEnvironment()
+            with pytest.raises(ApplicationError) as error:
+                await activity_env.run(
+                    self.tool_activities.agent_toolPlanner, prompt_input
+                )
+
+        assert error.value.non_retryable
+        assert error.value.type == "InvalidRequest"
+
     @pytest.mark.asyncio
     async def test_agent_toolPlanner_json_parsing_error(self):
         """Test agent_toolPlanner handles JSON parsing errors."""
@@ -169,7 +508,9 @@ class TestToolActivities:
         mock_response.choices = [MagicMock()]
         mock_response.choices[0].message.content = "Invalid JSON response"
 
-        with patch("activities.tool_activities.completion") as mock_completion:
+        with patch(
+            "activities.tool_activities.acompletion", new_callable=AsyncMock
+        ) as mock_completion:
             mock_completion.return_value = mock_response
 
             activity_env = ActivityEnvironment()
@@ -178,6 +519,45 @@ class TestToolActivities:
                     self.tool_activities.agent_toolPlanner, prompt_input
                 )
 
+    @pytest.mark.asyncio
+    async def test_agent_toolPlanner_cancellation_aborts_llm_request(self):
+        """Test cancelling agent_toolPlanner heartbeats and aborts the request."""
+        import asyncio
+
+        prompt_input = ToolPromptInput(
+            prompt="Test prompt", context_instructions="Test context instructions"
+        )
+        request_started = asyncio.Event()
+        request_cancelled = asyncio.Event()
+
+        async def slow_completion(**kwargs):
+            request_started.set()
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                request_cancelled.set()
+                raise
+
+        heartbeats = []
+        activity_env = ActivityEnvironment()
+        activity_env.on_heartbeat = lambda *details: heartbeats.append(details)
+
+        with patch(
+            "activities.tool_activities.acompletion", side_effect=slow_completion
+        ), patch("activities.tool_activities.LLM_HEARTBEAT_INTERVAL_SECONDS", 0.01):
+            run = asyncio.create_task(
+                activity_env.run(self.tool_activities.agent_toolPlanner, prompt_input)
+            )
+            await request_started.wait()
+            await asyncio.sleep(0.05)
+            activity_env.cancel()
+
+            with pytest.raises(asyncio.CancelledError):
+                await run
+
+        assert request_cancelled.is_set()
+        assert heartbeats
+
     @pytest.mark.asyncio
     async def test_get_wf_env_vars_default_values(self):
         """Test get_wf_env_vars with default values."""
@@ -275,6 +655,29 @@ class TestDynamicToolActivity:
             assert isinstance(result, dict)
             assert result["result"] == "Handled test_value"
 
+    @pytest.mark.asyncio
+    async def test_dynamic_tool_activity_bad_args_are_not_retried(self):
+        """Test a handler rejecting its arguments fails without retrying."""
+        mock_info = MagicMock()
+        mock_info.activity_type = "TestTool"
+
+        mock_payload_converter = MagicMock()
+        mock_payload = MagicMock()
+        mock_payload_converter.from_payload.return_value = {}
+
+        def mock_handler(args):
+            return {"result": args["test_arg"]}
+
+        with patch("temporalio.activity.info", return_value=mock_info), patch(
+            "temporalio.activity.payload_converter", return_value=mock_payload_converter
+        ), patch("tools.get_handler", return_value=mock_handler):
+            activity_env = ActivityEnvironment()
+            with pytest.raises(ApplicationError) as error:
+                await activity_env.run(dynamic_tool_activity, [mock_payload])
+
+        assert error.value.non_retryable
+        assert "test_arg" in error.value.message
+
     @pytest.mark.asyncio
     async def test_dynamic_tool_activity_async_handler(self):
         """Test dynamic tool activity with asynchronous handler."""
@@ -301,6 +704,106 @@ class TestDynamicToolActivity:
             assert result["async_result"] == "Async handled async_test"
 
 
+class TestToolHandlerExecutors:
+    """Test cases for running sync tool handlers off the event loop."""
+
+    @pytest.fixture
+    def registered_tool(self):
+        """Register a throwaway tool handler and clean it up afterwards."""
+        import tools
+        from activities.tool_activities import shutdown_tool_executors
+
+        def register(handler, **spec_kwargs):
+            tools.TOOL_HANDLERS["ExecutorTestTool"] = tools.ToolHandlerSpec(
+                "executor_test", handler.__name__, **spec_kwargs
+            )
+            tools._loaded_handlers["ExecutorTestTool"] = handler
+
+        yield register
+        tools.TOOL_HANDLERS.pop("ExecutorTestTool", None)
+        tools._loaded_handlers.pop("ExecutorTestTool", None)
+        shutdown_tool_executors()
+
+    @pytest.mark.asyncio
+    async def test_sync_handler_runs_on_worker_thread(self, registered_tool):
+        import threading
+
+        from activities.tool_activities import run_tool_handler
+
+        def handler(args):
+            return {"thread": threading.current_thread().name}
+
+        registered_tool(handler)
+        result = await run_tool_handler("ExecutorTestTool", {})
+        assert result["thread"] != threading.current_thread().name
+
+    @pytest.mark.asyncio
+    async def test_inline_handler_runs_on_event_loop(self, registered_tool):
+        import threading
+
+        from activities.tool_activities import run_tool_handler
+        from tools import INLINE
+
+        def handler(args):
+            return {"thread": threading.current_thread().name}
+
+        registered_tool(handler, executor=INLINE)
+        result = await run_tool_handler("ExecutorTestTool", {})
+        assert result["thread"] == threading.current_thread().name
+
+    @pytest.mark.asyncio
+    async def test_max_concurrency_bounds_dedicated_pool(self, registered_tool):
+        import asyncio
+        import threading
+        import time
+
+        from activities.tool_activities import run_tool_handler
+
+        lock = threading.Lock()
+        running = 0
+        peak = 0
+
+        def handler(args):
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            time.sleep(0.05)
+            with lock:
+                running -= 1
+            return {}
+
+        registered_tool(handler, max_concurrency=2)
+        await asyncio.gather(
+            *(run_tool_handler("ExecutorTestTool", {}) for _ in range(6))
+        )
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_handler_module_is_imported_off_the_event_loop(self, registered_tool):
+        import threading
+
+        import tools
+        from activities.tool_activities import run_tool_handler
+
+        imported_on = []
+
+        def handler(args):
+            return {}
+
+        def import_handler(tool_name):
+            imported_on.append(threading.current_thread().name)
+            return handler
+
+        registered_tool(handler)
+        tools._loaded_handlers.pop("ExecutorTestTool")
+        with patch("tools.get_handler", side_effect=import_handler):
+            await run_tool_handler("ExecutorTestTool", {})
+
+        assert imported_on != [threading.current_thread().name]
+        assert len(imported_on) == 1
+
+
 class TestToolActivitiesIntegration:
     """Integration tests for ToolActivities in a real Temporal environment."""
 
@@ -372,7 +875,11 @@ class TestEdgeCases:
             0
         ].message.content = '{"next": "done", "response": "Processed long prompt"}'
 
-        with patch("activities.tool_activities.completion", return_value=mock_response):
+        with patch(
+            "activities.tool_activities.acompletion",
+            new_callable=AsyncMock,
+            return_value=mock_response,
+        ):
             activity_env = ActivityEnvironment()
             result = await activity_env.run(
                 self.tool_activities.agent_toolPlanner, tool_prompt_input
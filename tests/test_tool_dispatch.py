@@ -0,0 +1,41 @@
+import subprocess
+import sys
+
+import pytest
+
+import tools
+from tools import NATIVE_TOOL_NAMES, TOOL_HANDLERS, get_handler, is_native_tool
+
+
+@pytest.mark.parametrize("tool_name", sorted(TOOL_HANDLERS))
+def test_every_registered_tool_resolves(tool_name):
+    handler = get_handler(tool_name)
+    assert callable(handler)
+    assert handler.__name__ == TOOL_HANDLERS[tool_name].attr
+
+
+def test_get_handler_unknown_tool_raises():
+    with pytest.raises(ValueError, match="Unknown tool"):
+        get_handler("NotARealTool")
+
+
+def test_get_handler_caches_resolved_handler():
+    first = get_handler("GiveHint")
+    assert tools._loaded_handlers["GiveHint"] is first
+    assert get_handler("GiveHint") is first
+
+
+def test_native_tool_set_matches_registry():
+    assert NATIVE_TOOL_NAMES == set(TOOL_HANDLERS)
+    assert is_native_tool("AddToCart")
+    assert not is_native_tool("list_products")
+
+
+def test_importing_tools_does_not_load_tool_modules():
+    code = (
+        "import sys, tools; "
+        "print(any(m.startswith('tools.') for m in sys.modules), "
+        "'pandas' in sys.modules, 'requests' in sys.modules)"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code]).decode().split()
+    assert output == ["False", "False", "False"]
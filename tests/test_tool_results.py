@@ -0,0 +1,111 @@
+import json
+from dataclasses import replace
+
+from goals.ecommerce import goal_ecomm_list_orders
+from prompts.agent_prompt_generators import (
+    generate_genai_prompt,
+    generate_tool_completion_prompt,
+)
+from shared.tool_results import project_history, project_tool_result, render_tool_result
+from tools.ecommerce.list_orders import list_orders
+from workflows.workflow_helpers import format_history
+
+ORDERS = {
+    "tool": "ListOrders",
+    "orders": [
+        {
+            "id": str(order_id),
+            "summary": "Paper",
+            "email": "foggy.nelson@nelsonmurdock.com",
+            "status": "shipped",
+            "order_date": "2025-04-03",
+            "last_update": "2025-04-06",
+        }
+        for order_id in range(25)
+    ],
+}
+
+
+def test_list_items_keep_only_the_declared_fields():
+    projected = project_tool_result("ListOrders", ORDERS)
+
+    assert projected["tool"] == "ListOrders"
+    assert projected["orders"][0] == {
+        "id": "0",
+        "summary": "Paper",
+        "status": "shipped",
+        "order_date": "2025-04-03",
+    }
+    assert len(projected["orders"]) == 21
+    assert projected["orders"][-1] == "... 5 more not shown"
+
+
+def test_top_level_fields_and_long_strings_are_cut():
+    result = {
+        "tool": "SearchFlights",
+        "error": None,
+        "origin": "SFO",
+        "data": {"itineraries": []},
+        "results": [],
+    }
+    assert project_tool_result("SearchFlights", result) == {
+        "tool": "SearchFlights",
+        "error": None,
+        "origin": "SFO",
+        "results": [],
+    }
+
+    events = {"tool": "FindEvents", "events": [{"description": "x" * 200}]}
+    description = project_tool_result("FindEvents", events)["events"][0]
+    assert description["description"] == "x" * 160 + "... (40 more characters)"
+
+
+def test_mcp_json_text_is_parsed_before_projecting():
+    products = [
+        {"id": "prod_1", "name": "Gold Plan", "images": [], "metadata": {}},
+        {"id": "prod_2", "name": "Silver Plan", "images": [], "metadata": {}},
+    ]
+    result = {
+        "tool": "list_products",
+        "success": True,
+        "content": [json.dumps(products)],
+    }
+
+    assert project_tool_result("list_products", result)["content"] == [
+        [{"id": "prod_1", "name": "Gold Plan"}, {"id": "prod_2", "name": "Silver Plan"}]
+    ]
+
+
+def test_tools_without_a_projection_are_unchanged():
+    result = {"tool": "CurrentPTO", "num_hours": 40}
+
+    assert project_tool_result("CurrentPTO", result) is result
+    assert render_tool_result("CurrentPTO", result) == str(result)
+
+
+def test_prompts_use_projected_results_and_history_keeps_them_whole():
+    result = {**list_orders({"email_address": "matt.murdock@nelsonmurdock.com"})}
+    result["tool"] = "ListOrders"
+    history = {
+        "messages": [
+            {"actor": "user", "response": "list my orders"},
+            {"actor": "tool_result", "response": result},
+        ]
+    }
+
+    projected = project_history(history)
+    completion_prompt = generate_tool_completion_prompt("ListOrders", result)
+    planner_prompt = generate_genai_prompt(
+        _goal(), history, multi_goal_mode=False, raw_json=None
+    )
+
+    assert projected["messages"][0] is history["messages"][0]
+    assert history["messages"][1]["response"] is result
+    for prompt in (completion_prompt, planner_prompt, format_history(history)):
+        assert "Red Sunglasses" in prompt
+        assert "matt.murdock@nelsonmurdock.com" not in prompt
+
+
+def _goal():
+    # The goal's example conversation mentions the email itself
+    return replace(goal_ecomm_list_orders, example_conversation_history="")
@@ -0,0 +1,148 @@
+from dataclasses import replace
+
+import tools.tool_registry as tool_registry
+from goals.stripe_mcp import goal_mcp_stripe
+from models.tool_definitions import AgentGoal, ToolArgument, ToolDefinition
+from prompts.agent_prompt_generators import generate_genai_prompt
+from shared.tool_retrieval import ToolIndex, select_prompt_tools, tokenize
+
+
+def tool(name, description, *arguments):
+    return ToolDefinition(
+        name=name,
+        description=description,
+        arguments=[ToolArgument(arg, "string", arg) for arg in arguments],
+    )
+
+
+TOOLS = [
+    tool("list_customers", "List customers in the Stripe account", "email"),
+    tool("create_customer", "Create a new customer", "name", "email"),
+    tool("list_products", "List the products for sale", "limit"),
+    tool("create_invoice", "Create an invoice for a customer", "customer"),
+    tool("create_invoice_item", "Add an item to an invoice", "invoice", "price"),
+    tool("finalize_invoice", "Finalize an invoice so it can be paid", "invoice"),
+    tool("list_prices", "List the prices of a product", "product"),
+    tool("create_refund", "Refund a payment", "payment_intent"),
+    tool("ListAgents", "List the agents that can help"),
+]
+
+GOAL = AgentGoal(
+    id="goal_test",
+    category_tag="test",
+    agent_name="Test",
+    agent_friendly_description="Test",
+    tools=TOOLS,
+    max_prompt_tools=2,
+)
+
+
+def history(*messages):
+    return {
+        "messages": [{"actor": actor, "response": text} for actor, text in messages]
+    }
+
+
+def names(tools):
+    return [tool.name for tool in tools]
+
+
+def test_tokenize_splits_names_and_folds_plurals():
+    assert tokenize("listCustomers") == ["list", "customer"]
+    assert tokenize("create_invoice_item") == ["create", "invoice", "item"]
+    assert tokenize("What are the prices?") == ["price"]
+
+
+def test_index_ranks_the_matching_tools_first():
+    index = ToolIndex(TOOLS)
+
+    assert names(index.top("I need a refund for my payment", 2)) == ["create_refund"]
+    assert names(index.top("what products do you sell", 1)) == ["list_products"]
+    assert index.top("hello there", 3) == []
+
+
+def test_goals_without_a_limit_describe_every_tool():
+    goal = replace(GOAL, max_prompt_tools=None)
+
+    assert select_prompt_tools(goal, history(("user", "refund"))) == TOOLS
+
+
+def test_selection_keeps_recent_tools_and_the_next_one_in_sequence():
+    conversation = history(
+        ("user", "please refund my last payment"),
+        ("agent", {"tool": "create_invoice", "response": "Creating it."}),
+        ("tool_result", {"tool": "create_invoice", "id": "in_1"}),
+    )
+
+    selected = select_prompt_tools(GOAL, conversation)
+
+    # Matches the query, was just used, comes next in the goal's list, and
+    # ListAgents is always kept
+    assert names(selected) == [
+        "create_invoice",
+        "create_invoice_item",
+        "create_refund",
+        "ListAgents",
+    ]
+
+
+def test_selection_falls_back_to_every_tool_when_nothing_matches():
+    assert select_prompt_tools(GOAL, history(("user", "hello"))) == TOOLS
+
+
+def test_planner_prompt_describes_only_the_selected_tools():
+    prompt = generate_genai_prompt(
+        GOAL,
+        history(("user", "What products do you have?")),
+        multi_goal_mode=False,
+    )
+
+    assert "Tool name: list_products" in prompt
+    assert "Tool name: create_refund" not in prompt
+
+
+def test_stripe_goal_in_multi_goal_mode_keeps_its_sequence_and_list_agents():
+    # MCP tools as loaded for the Stripe goal, plus the ListAgents tool
+    # goals/__init__.py appends to every goal in multi-goal mode
+    mcp_tools = [tool for tool in TOOLS if tool.name != "ListAgents"] + [
+        tool(f"retrieve_object_{number}", "Retrieve a Stripe object", "id")
+        for number in range(20)
+    ]
+    goal = replace(
+        goal_mcp_stripe,
+        tools=mcp_tools + [tool_registry.list_agents_tool],
+        description="Invoice the customer: 1. list_products 2. list_prices "
+        "3. create_invoice 4. create_invoice_item 5. finalize_invoice",
+    )
+
+    selected = names(select_prompt_tools(goal, history(("user", "refund me"))))
+
+    assert selected == [
+        "list_products",
+        "create_invoice",
+        "create_invoice_item",
+        "finalize_invoice",
+        "list_prices",
+        "create_refund",
+        "ListAgents",
+    ]
+
+
+def test_mcp_header_counts_only_the_listed_tools():
+    mcp_tools = [tool for tool in TOOLS if tool.name != "ListAgents"]
+    goal = replace(goal_mcp_stripe, tools=mcp_tools, max_prompt_tools=2)
+    mcp_tools_info = {
+        "success": True,
+        "server_name": "stripe",
+        "tools": {tool.name: {"description": tool.description} for tool in mcp_tools},
+    }
+
+    conversation = history(("user", "What products do you have?"))
+
+    prompt = generate_genai_prompt(
+        goal, conversation, multi_goal_mode=False, mcp_tools_info=mcp_tools_info
+    )
+
+    listed = len(select_prompt_tools(goal, conversation))
+    assert f"({listed} of 8 tools; only those relevant" in prompt
+    assert "(8 tools)" not in prompt
@@ -0,0 +1,82 @@
+from datetime import timedelta
+
+import pytest
+
+from shared.config import TEMPORAL_LEGACY_TASK_QUEUE
+from shared.tool_routing import (
+    DEFAULT_TOOL_ROUTE,
+    ToolRetry,
+    ToolRoute,
+    get_tool_route,
+    load_tool_routes,
+    parse_tool_route,
+)
+
+
+def test_default_route_options():
+    route = get_tool_route("SomeUnroutedTool")
+    assert route == DEFAULT_TOOL_ROUTE
+    assert route.task_queue is None
+    assert route.start_to_close_timeout == timedelta(seconds=12)
+    assert route.schedule_to_close_timeout == timedelta(minutes=30)
+    policy = route.retry.to_retry_policy()
+    assert policy.initial_interval == timedelta(seconds=1)
+    assert policy.backoff_coefficient == 2
+    assert policy.maximum_interval == timedelta(seconds=30)
+    assert policy.maximum_attempts == 0
+
+
+def test_train_tools_routed_to_legacy_queue():
+    assert get_tool_route("SearchTrains").task_queue == TEMPORAL_LEGACY_TASK_QUEUE
+    assert get_tool_route("BookTrains").task_queue == TEMPORAL_LEGACY_TASK_QUEUE
+
+
+def test_load_tool_routes_overlays_file(tmp_path):
+    routing_file = tmp_path / "routes.yaml"
+    routing_file.write_text(
+        """
+FinMoveMoney:
+  task_queue: agent-task-queue-money
+  start_to_close_timeout: 30
+  retry:
+    backoff_coefficient: 2
+    maximum_attempts: 5
+SearchTrains:
+  schedule_to_close_timeout: 60
+"""
+    )
+
+    routes = load_tool_routes(str(routing_file))
+
+    assert routes["FinMoveMoney"] == ToolRoute(
+        task_queue="agent-task-queue-money",
+        start_to_close_timeout=timedelta(seconds=30),
+        retry=ToolRetry(backoff_coefficient=2.0, maximum_attempts=5),
+    )
+    # Entries for built-in routes only override the fields they set
+    assert routes["SearchTrains"].task_queue == TEMPORAL_LEGACY_TASK_QUEUE
+    assert routes["SearchTrains"].schedule_to_close_timeout == timedelta(seconds=60)
+    assert routes["BookTrains"] == get_tool_route("BookTrains")
+
+
+def test_parse_tool_route_rejects_unknown_settings():
+    with pytest.raises(ValueError, match="Unknown tool route settings"):
+        parse_tool_route({"queue": "typo"}, DEFAULT_TOOL_ROUTE)
+
+
+def test_in_memory_tools_run_as_local_activities():
+    from tools import INLINE, TOOL_HANDLERS
+
+    inline_tools = {
+        name for name, spec in TOOL_HANDLERS.items() if spec.executor == INLINE
+    }
+    assert inline_tools
+    for tool_name in inline_tools:
+        assert get_tool_route(tool_name).local, tool_name
+    assert not get_tool_route("SearchFlights").local
+
+
+def test_local_route_cannot_target_another_task_queue():
+    assert parse_tool_route({"local": True}, DEFAULT_TOOL_ROUTE).local
+    with pytest.raises(ValueError, match="both local and task_queue"):
+        parse_tool_route({"local": True, "task_queue": "elsewhere"}, DEFAULT_TOOL_ROUTE)
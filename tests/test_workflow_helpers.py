@@ -1,3 +1,5 @@
+from collections import deque
+
 import pytest
 
 from models.tool_definitions import (
@@ -6,7 +8,12 @@ from models.tool_definitions import (
     ToolArgument,
     ToolDefinition,
 )
-from workflows.workflow_helpers import is_mcp_tool
+from workflows.workflow_helpers import (
+    fallback_summary,
+    fill_missing_args_locally,
+    is_mcp_tool,
+    pop_queued_user_prompts,
+)
 
 
 def make_goal(with_mcp: bool) -> AgentGoal:
@@ -34,3 +41,69 @@ def test_is_mcp_tool_recognizes_native():
 def test_is_mcp_tool_recognizes_mcp():
     goal = make_goal(True)
     assert is_mcp_tool("list_products", goal)
+
+
+def is_user_prompt(prompt: str) -> bool:
+    return not prompt.startswith("###")
+
+
+def test_pop_queued_user_prompts_stops_at_llm_prompt():
+    queue = deque(["second", "third", "### tool result", "fourth"])
+    assert pop_queued_user_prompts(queue, is_user_prompt) == ["second", "third"]
+    assert list(queue) == ["### tool result", "fourth"]
+
+
+def test_pop_queued_user_prompts_leading_llm_prompt():
+    queue = deque(["### tool result", "next"])
+    assert pop_queued_user_prompts(queue, is_user_prompt) == []
+    assert list(queue) == ["### tool result", "next"]
+
+
+def test_fill_missing_args_locally_answers_an_argument_question():
+    goal = make_goal(False)
+    goal.tools = [
+        ToolDefinition(
+            name="GetOrder",
+            description="",
+            arguments=[ToolArgument(name="order_id", type="string", description="")],
+        )
+    ]
+    question = {
+        "next": "question",
+        "tool": "GetOrder",
+        "args": {"order_id": None},
+        "response": "What's your order ID?",
+    }
+
+    tool_data = fill_missing_args_locally(goal, question, "It's order 102")
+
+    assert tool_data["next"] == "confirm"
+    assert tool_data["tool"] == "GetOrder"
+    assert tool_data["args"] == {"order_id": "102"}
+    # Not an argument question, or an unknown tool
+    assert (
+        fill_missing_args_locally(goal, {**question, "next": "confirm"}, "102") is None
+    )
+    assert fill_missing_args_locally(goal, {**question, "tool": "Other"}, "102") is None
+
+
+def test_fallback_summary_starts_at_the_last_summary():
+    history = {
+        "messages": [
+            {"actor": "user", "response": "old question"},
+            {"actor": "conversation_summary", "response": "user asked about PTO"},
+            {"actor": "user", "response": "book Friday off"},
+        ]
+    }
+
+    summary = fallback_summary(history)
+
+    assert "old question" not in summary
+    assert "user asked about PTO" in summary
+    assert "book Friday off" in summary
+
+
+def test_fallback_summary_without_a_summary_keeps_the_whole_history():
+    history = {"messages": [{"actor": "user", "response": "hello"}]}
+
+    assert "hello" in fallback_summary(history)
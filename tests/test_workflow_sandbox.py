@@ -0,0 +1,74 @@
+import subprocess
+import sys
+import uuid
+
+from temporalio.api.common.v1 import Payloads, WorkflowType
+from temporalio.api.enums.v1 import EventType
+from temporalio.api.history.v1 import (
+    HistoryEvent,
+    WorkflowExecutionStartedEventAttributes,
+    WorkflowTaskScheduledEventAttributes,
+    WorkflowTaskStartedEventAttributes,
+)
+from temporalio.api.taskqueue.v1 import TaskQueue
+from temporalio.client import WorkflowHistory
+from temporalio.converter import DataConverter
+from temporalio.worker import Replayer
+
+from workflows.agent_goal_workflow import AgentGoalWorkflow
+from workflows.sandbox import WORKFLOW_PASSTHROUGH_MODULES, create_workflow_runner
+
+
+def first_turn_history(combined_input) -> WorkflowHistory:
+    task_queue = TaskQueue(name="test")
+    payloads = DataConverter.default.payload_converter.to_payloads([combined_input])
+    events = [
+        HistoryEvent(
+            event_id=1,
+            event_type=EventType.EVENT_TYPE_WORKFLOW_EXECUTION_STARTED,
+            workflow_execution_started_event_attributes=WorkflowExecutionStartedEventAttributes(
+                workflow_type=WorkflowType(name="AgentGoalWorkflow"),
+                task_queue=task_queue,
+                input=Payloads(payloads=payloads),
+                original_execution_run_id=str(uuid.uuid4()),
+            ),
+        ),
+        HistoryEvent(
+            event_id=2,
+            event_type=EventType.EVENT_TYPE_WORKFLOW_TASK_SCHEDULED,
+            workflow_task_scheduled_event_attributes=WorkflowTaskScheduledEventAttributes(
+                task_queue=task_queue
+            ),
+        ),
+        HistoryEvent(
+            event_id=3,
+            event_type=EventType.EVENT_TYPE_WORKFLOW_TASK_STARTED,
+            workflow_task_started_event_attributes=WorkflowTaskStartedEventAttributes(
+                scheduled_event_id=2
+            ),
+        ),
+    ]
+    for event in events:
+        event.event_time.GetCurrentTime()
+    return WorkflowHistory(str(uuid.uuid4()), events)
+
+
+async def test_first_turn_replays_with_curated_runner(sample_combined_input):
+    replayer = Replayer(
+        workflows=[AgentGoalWorkflow], workflow_runner=create_workflow_runner()
+    )
+    result = await replayer.replay_workflow(first_turn_history(sample_combined_input))
+    assert result.replay_failure is None
+
+
+def test_workflow_module_does_not_import_worker_code():
+    code = (
+        "import sys; import workflows.agent_goal_workflow; "
+        "print(*[m for m in sys.modules "
+        "if m.startswith(('activities', 'shared.mcp_client_manager'))])"
+    )
+    assert subprocess.check_output([sys.executable, "-c", code]).decode().split() == []
+
+
+def test_workflows_package_is_not_passed_through():
+    assert not any(m.startswith("workflows") for m in WORKFLOW_PASSTHROUGH_MODULES)
@@ -1,73 +1,105 @@
-from .change_goal import change_goal
-from .create_invoice import create_invoice
-from .ecommerce.get_order import get_order
-from .ecommerce.list_orders import list_orders
-from .ecommerce.track_package import track_package
-from .fin.check_account_valid import check_account_valid
-from .fin.get_account_balances import get_account_balance
-from .fin.move_money import move_money
-from .fin.submit_loan_application import submit_loan_application
-from .find_events import find_events
-from .food.add_to_cart import add_to_cart
-from .give_hint import give_hint
-from .guess_location import guess_location
-from .hr.book_pto import book_pto
-from .hr.checkpaybankstatus import checkpaybankstatus
-from .hr.current_pto import current_pto
-from .hr.future_pto_calc import future_pto_calc
-from .list_agents import list_agents
-from .search_fixtures import search_fixtures
-from .search_flights import search_flights
-from .search_trains import book_trains, search_trains
-from .transfer_control import transfer_control
-
-
-def get_handler(tool_name: str):
-    if tool_name == "SearchFixtures":
-        return search_fixtures
-    if tool_name == "SearchFlights":
-        return search_flights
-    if tool_name == "SearchTrains":
-        return search_trains
-    if tool_name == "BookTrains":
-        return book_trains
-    if tool_name == "CreateInvoice":
-        return create_invoice
-    if tool_name == "FindEvents":
-        return find_events
-    if tool_name == "ListAgents":
-        return list_agents
-    if tool_name == "ChangeGoal":
-        return change_goal
-    if tool_name == "TransferControl":
-        return transfer_control
-    if tool_name == "CurrentPTO":
-        return current_pto
-    if tool_name == "BookPTO":
-        return book_pto
-    if tool_name == "FuturePTOCalc":
-        return future_pto_calc
-    if tool_name == "CheckPayBankStatus":
-        return checkpaybankstatus
-    if tool_name == "FinCheckAccountIsValid":
-        return check_account_valid
-    if tool_name == "FinCheckAccountBalance":
-        return get_account_balance
-    if tool_name == "FinMoveMoney":
-        return move_money
-    if tool_name == "FinCheckAccountSubmitLoanApproval":
-        return submit_loan_application
-    if tool_name == "GetOrder":
-        return get_order
-    if tool_name == "TrackPackage":
-        return track_package
-    if tool_name == "ListOrders":
-        return list_orders
-    if tool_name == "GiveHint":
-        return give_hint
-    if tool_name == "GuessLocation":
-        return guess_location
-    if tool_name == "AddToCart":
-        return add_to_cart
-
-    raise ValueError(f"Unknown tool: {tool_name}")
+import importlib
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Optional
+
+# How a synchronous handler is run by dynamic_tool_activity. Async handlers are
+# always awaited on the worker's event loop.
+THREAD = "thread"  # on a worker thread pool, for anything that blocks
+INLINE = "inline"  # directly on the event loop, for trivial in-memory tools
+
+
+@dataclass(frozen=True)
+class ToolHandlerSpec:
+    """Where a native tool's handler lives, relative to this package, and how
+    the worker should run it.
+
+    max_concurrency gives the tool its own thread pool of that size, so a
+    rate-limited or slow upstream can't take over the shared pool.
+    """
+
+    module: str
+    attr: str
+    executor: str = THREAD
+    max_concurrency: Optional[int] = None
+
+
+# Tool name -> handler location. Handler modules are imported on first use so
+# that heavy dependencies (pandas, requests, stripe, ...) are only loaded by
+# processes that actually run those tools.
+TOOL_HANDLERS: Dict[str, ToolHandlerSpec] = {
+    # football-data.org's free tier is rate limited; its own small pool keeps
+    # slow or throttled calls from holding the shared one. This caps
+    # concurrent calls only, it doesn't enforce the 10 requests/minute.
+    "SearchFixtures": ToolHandlerSpec(
+        ".search_fixtures", "search_fixtures", max_concurrency=2
+    ),
+    # RapidAPI flight search, blocking http.client
+    "SearchFlights": ToolHandlerSpec(
+        ".search_flights", "search_flights", max_concurrency=4
+    ),
+    "SearchTrains": ToolHandlerSpec(".search_trains", "search_trains"),
+    "BookTrains": ToolHandlerSpec(".search_trains", "book_trains"),
+    # Stripe SDK calls are blocking
+    "CreateInvoice": ToolHandlerSpec(
+        ".create_invoice", "create_invoice", max_concurrency=8
+    ),
+    "FindEvents": ToolHandlerSpec(".find_events", "find_events"),
+    "ListAgents": ToolHandlerSpec(".list_agents", "list_agents", executor=INLINE),
+    "ChangeGoal": ToolHandlerSpec(".change_goal", "change_goal", executor=INLINE),
+    "TransferControl": ToolHandlerSpec(
+        ".transfer_control", "transfer_control", executor=INLINE
+    ),
+    "CurrentPTO": ToolHandlerSpec(".hr.current_pto", "current_pto"),
+    "BookPTO": ToolHandlerSpec(".hr.book_pto", "book_pto", executor=INLINE),
+    "FuturePTOCalc": ToolHandlerSpec(".hr.future_pto_calc", "future_pto_calc"),
+    "CheckPayBankStatus": ToolHandlerSpec(
+        ".hr.checkpaybankstatus", "checkpaybankstatus", executor=INLINE
+    ),
+    "FinCheckAccountIsValid": ToolHandlerSpec(
+        ".fin.check_account_valid", "check_account_valid"
+    ),
+    "FinCheckAccountBalance": ToolHandlerSpec(
+        ".fin.get_account_balances", "get_account_balance"
+    ),
+    "FinMoveMoney": ToolHandlerSpec(".fin.move_money", "move_money"),
+    "FinCheckAccountSubmitLoanApproval": ToolHandlerSpec(
+        ".fin.submit_loan_application", "submit_loan_application"
+    ),
+    "GetOrder": ToolHandlerSpec(".ecommerce.get_order", "get_order"),
+    "TrackPackage": ToolHandlerSpec(".ecommerce.track_package", "track_package"),
+    "ListOrders": ToolHandlerSpec(".ecommerce.list_orders", "list_orders"),
+    "GiveHint": ToolHandlerSpec(".give_hint", "give_hint", executor=INLINE),
+    "GuessLocation": ToolHandlerSpec(
+        ".guess_location", "guess_location", executor=INLINE
+    ),
+    "AddToCart": ToolHandlerSpec(".food.add_to_cart", "add_to_cart", executor=INLINE),
+}
+
+NATIVE_TOOL_NAMES: FrozenSet[str] = frozenset(TOOL_HANDLERS)
+
+_loaded_handlers: Dict[str, Callable] = {}
+
+
+def is_native_tool(tool_name: str) -> bool:
+    """Return True if the tool is implemented in this package (not via MCP)."""
+    return tool_name in NATIVE_TOOL_NAMES
+
+
+def loaded_handler(tool_name: str) -> Optional[Callable]:
+    """The tool's handler if its module has been imported already."""
+    return _loaded_handlers.get(tool_name)
+
+
+def get_handler(tool_name: str) -> Callable:
+    handler = _loaded_handlers.get(tool_name)
+    if handler is not None:
+        return handler
+
+    spec = TOOL_HANDLERS.get(tool_name)
+    if spec is None:
+        raise ValueError(f"Unknown tool: {tool_name}")
+
+    module = importlib.import_module(spec.module, __name__)
+    handler = getattr(module, spec.attr)
+    _loaded_handlers[tool_name] = handler
+    return handler
@@ -2,11 +2,12 @@ import json
 from datetime import date, datetime
 from pathlib import Path
 
-import pandas
 from dateutil.relativedelta import relativedelta
 
 
 def future_pto_calc(args: dict) -> dict:
+    import pandas
+
     file_path = (
         Path(__file__).resolve().parent.parent / "data" / "employee_pto_data.json"
     )
@@ -1,42 +1,83 @@
+import asyncio
 from collections import deque
 from datetime import timedelta
-from typing import Any, Deque, Dict, List, Optional, TypedDict, Union
+from typing import Any, Deque, Dict, List, Optional, Union
 
 from temporalio import workflow
-from temporalio.common import RetryPolicy
+from temporalio.exceptions import ActivityError
 
+from goals import goal_list
 from models.data_types import (
+    AgentGoalWorkflowParams,
+    CombinedInput,
     ConversationHistory,
     EnvLookupInput,
     EnvLookupOutput,
-    NextStep,
+    ToolData,
+    ToolPromptInput,
     ValidationInput,
+    ValidationResult,
 )
+from models.response_schemas import TOOL_DATA_SCHEMA
 from models.tool_definitions import AgentGoal
+from prompts.agent_prompt_generators import generate_genai_prompt
+from shared.goal_routing import AGENT_SELECTION_CATEGORY, routable_goals, route_goal
+from shared.llm_profiles import PLANNER_PROFILE, llm_profile_for
+from shared.prompt_prevalidation import is_trivially_valid
+from shared.tool_results import project_history
+from tools.tool_registry import create_mcp_tool_definitions
 from workflows import workflow_helpers as helpers
 from workflows.workflow_helpers import (
+    ENV_LOOKUP_ACTIVITY,
+    ENV_LOOKUP_RETRY_POLICY,
+    LLM_ACTIVITY_HEARTBEAT_TIMEOUT,
     LLM_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
     LLM_ACTIVITY_START_TO_CLOSE_TIMEOUT,
+    LLM_RETRY_POLICY,
+    LLM_TASK_QUEUE,
+    MCP_LIST_TOOLS_ACTIVITY,
+    MCP_LIST_TOOLS_RETRY_POLICY,
+    TOOL_PLANNER_ACTIVITY,
+    VALIDATE_PROMPT_ACTIVITY,
 )
 
-with workflow.unsafe.imports_passed_through():
-    from activities.tool_activities import ToolActivities, mcp_list_tools
-    from goals import goal_list
-    from models.data_types import CombinedInput, ToolPromptInput
-    from prompts.agent_prompt_generators import generate_genai_prompt
-    from tools.tool_registry import create_mcp_tool_definitions
+# This module only contains deterministic workflow code. Activities are
+# scheduled by name, and the modules imported above are passed through the
+# sandbox by the runner configured in workflows/sandbox.py.
 
 # Constants
 MAX_TURNS_BEFORE_CONTINUE = 250
-
-
-# ToolData as part of the workflow is what's accessible to the UI - see LLMResponse.jsx for example
-class ToolData(TypedDict, total=False):
-    next: NextStep
-    tool: str
-    args: Dict[str, Any]
-    response: str
-    force_confirm: bool = True
+# Workflows started before queued user prompts were coalesced handled them
+# one at a time; replay them that way.
+COALESCE_USER_PROMPTS_PATCH = "coalesce-user-prompts"
+# Workflows started before LLM activities could be cancelled let superseded
+# ones run to completion; replay them that way.
+CANCEL_SUPERSEDED_LLM_ACTIVITIES_PATCH = "cancel-superseded-llm-activities"
+# Workflows started before idle sessions hibernated waited for input without
+# a timer; replay them that way.
+IDLE_HIBERNATION_PATCH = "idle-session-hibernation"
+# Workflows started before a pending tool confirmation kept the session open
+# could hibernate while waiting for it; replay them that way.
+HOLD_PENDING_CONFIRMATION_PATCH = "hold-pending-confirmation"
+# Workflows started before LLM activities failed fast on invalid requests
+# failed the whole workflow on an LLM activity failure; replay them that way.
+SURFACE_FAILED_LLM_TURNS_PATCH = "surface-failed-llm-turns"
+# Workflows started before missing tool arguments were filled locally sent
+# every reply through validation and planning; replay them that way.
+LOCAL_SLOT_FILLING_PATCH = "local-slot-filling"
+# Workflows started before short replies skipped LLM validation validated
+# every user prompt; replay them that way.
+LOCAL_PREVALIDATION_PATCH = "local-prompt-prevalidation"
+# Workflows started before requests were routed straight to their goal went
+# through the agent selection LLM turns; replay them that way.
+DIRECT_GOAL_ROUTING_PATCH = "direct-goal-routing"
+# run_llm_activity result for a turn whose LLM request can never succeed
+FAILED_LLM_TURN = "failed-llm-turn"
+FAILED_LLM_TURN_MESSAGE = {
+    "next": "question",
+    "response": "Sorry, I couldn't process that request. Please try rephrasing "
+    "it, or try again later.",
+}
 
 
 @workflow.defn
@@ -60,7 +101,14 @@ class AgentGoalWorkflow:
         self.multi_goal_mode: bool = (
             False  # set from env file in activity lookup_wf_env_settings
         )
+        # set from env file in activity lookup_wf_env_settings
+        self.goal_categories: Optional[List[str]] = None
         self.mcp_tools_info: Optional[dict] = None  # stores complete MCP tools result
+        # user prompt whose LLM pass was cancelled by newer input; it is
+        # answered together with that input
+        self.superseded_prompt: Optional[str] = None
+        # set once the session completed after being idle, see hibernate()
+        self.hibernated: bool = False
 
     # see ../api/main.py#temporal_client.start_workflow() for how the input parameters are set
     @workflow.run
@@ -94,10 +142,19 @@ class AgentGoalWorkflow:
         #   - calling the LLM through activities to determine next steps and prompts
         #   - executing the selected tools via activities
         while True:
-            # wait indefinitely for input from signals - user_prompt, end_chat, or confirm as defined below
-            await workflow.wait_condition(
-                lambda: bool(self.prompt_queue) or self.chat_ended or self.confirmed
-            )
+            # wait for input from signals - user_prompt, end_chat, or confirm as defined below.
+            # Sessions idle for longer than the goal allows hibernate so they
+            # don't hold a worker cache slot, unless a tool is waiting for
+            # the user's confirmation.
+            try:
+                await workflow.wait_condition(
+                    lambda: bool(self.prompt_queue)
+                    or self.chat_ended
+                    or self.confirmed,
+                    timeout=self.idle_timeout(waiting_for_confirm),
+                )
+            except asyncio.TimeoutError:
+                return await self.hibernate()
 
             # handle chat should end. When chat ends, push conversation history to workflow results.
             if self.chat_should_end():
@@ -116,59 +173,117 @@ class AgentGoalWorkflow:
                     f"workflow step: processing message on the prompt queue, message is {prompt}"
                 )
 
+                tool_data: Optional[ToolData] = None
+
                 # Validate user-provided prompts
                 if self.is_user_prompt(prompt):
                     self.add_message("user", prompt)
 
-                    # Validate the prompt before proceeding
-                    validation_input = ValidationInput(
-                        prompt=prompt,
-                        conversation_history=self.conversation_history,
-                        agent_goal=self.goal,
-                    )
-                    validation_result = await workflow.execute_activity_method(
-                        ToolActivities.agent_validatePrompt,
-                        args=[validation_input],
-                        schedule_to_close_timeout=LLM_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
-                        start_to_close_timeout=LLM_ACTIVITY_START_TO_CLOSE_TIMEOUT,
-                        retry_policy=RetryPolicy(
-                            initial_interval=timedelta(seconds=5), backoff_coefficient=1
-                        ),
-                    )
-
-                    # If validation fails, provide that feedback to the user - i.e., "your words make no sense, puny human" end this iteration of processing
-                    if not validation_result.validationResult:
-                        workflow.logger.warning(
-                            f"Prompt validation failed: {validation_result.validationFailedReason}"
+                    # Messages the user sent while the agent was busy are
+                    # answered together rather than one LLM round each
+                    if (
+                        self.goal.coalesce_user_prompts
+                        and self.prompt_queue
+                        and self.is_user_prompt(self.prompt_queue[0])
+                        and workflow.patched(COALESCE_USER_PROMPTS_PATCH)
+                    ):
+                        queued_prompts = helpers.pop_queued_user_prompts(
+                            self.prompt_queue, self.is_user_prompt
                         )
-                        self.add_message(
-                            "agent", validation_result.validationFailedReason
+                        for queued_prompt in queued_prompts:
+                            self.add_message("user", queued_prompt)
+                        prompt = "\n".join([prompt, *queued_prompts])
+                        workflow.logger.info(
+                            f"Coalesced {len(queued_prompts) + 1} queued user prompts"
                         )
-                        continue
 
-                # If valid, proceed with generating the context and prompt
-                context_instructions = generate_genai_prompt(
-                    agent_goal=self.goal,
-                    conversation_history=self.conversation_history,
-                    multi_goal_mode=self.multi_goal_mode,
-                    raw_json=self.tool_data,
-                    mcp_tools_info=self.mcp_tools_info,
-                )
+                    if self.superseded_prompt:
+                        prompt = f"{self.superseded_prompt}\n{prompt}"
+                        self.superseded_prompt = None
 
-                prompt_input = ToolPromptInput(
-                    prompt=prompt, context_instructions=context_instructions
-                )
+                    # While choosing an agent, a request that clearly matches
+                    # one goes straight to it. The match stands in for
+                    # validation, and the new goal plans the request.
+                    routed = self.route_to_goal(prompt)
 
-                # connect to LLM and execute to get next steps
-                tool_data = await workflow.execute_activity_method(
-                    ToolActivities.agent_toolPlanner,
-                    prompt_input,
-                    schedule_to_close_timeout=LLM_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
-                    start_to_close_timeout=LLM_ACTIVITY_START_TO_CLOSE_TIMEOUT,
-                    retry_policy=RetryPolicy(
-                        initial_interval=timedelta(seconds=5), backoff_coefficient=1
-                    ),
-                )
+                    # Replies that just supply the arguments the agent asked
+                    # for are answered without validation or planning
+                    if self.goal.local_slot_filling and workflow.patched(
+                        LOCAL_SLOT_FILLING_PATCH
+                    ):
+                        tool_data = helpers.fill_missing_args_locally(
+                            self.goal, self.tool_data, prompt
+                        )
+                        if tool_data is not None:
+                            workflow.logger.info(
+                                f"Filled arguments for {tool_data['tool']} locally"
+                            )
+
+                    if (
+                        tool_data is None
+                        and not routed
+                        and not self.prevalidate(prompt)
+                    ):
+                        # Validate the prompt before proceeding
+                        validation_input = ValidationInput(
+                            prompt=prompt,
+                            conversation_history=project_history(
+                                self.conversation_history
+                            ),
+                            agent_goal=self.goal,
+                        )
+                        validation_result = await self.run_llm_activity(
+                            VALIDATE_PROMPT_ACTIVITY,
+                            validation_input,
+                            ValidationResult,
+                            supersedable=True,
+                        )
+                        if validation_result is None:
+                            self.superseded_prompt = prompt
+                            continue
+                        if validation_result == FAILED_LLM_TURN:
+                            continue
+
+                        # If validation fails, provide that feedback to the user - i.e., "your words make no sense, puny human" end this iteration of processing
+                        if not validation_result.validationResult:
+                            workflow.logger.warning(
+                                f"Prompt validation failed: {validation_result.validationFailedReason}"
+                            )
+                            self.add_message(
+                                "agent", validation_result.validationFailedReason
+                            )
+                            continue
+
+                if tool_data is None:
+                    # If valid, proceed with generating the context and prompt
+                    context_instructions = generate_genai_prompt(
+                        agent_goal=self.goal,
+                        conversation_history=self.conversation_history,
+                        multi_goal_mode=self.multi_goal_mode,
+                        raw_json=self.tool_data,
+                        mcp_tools_info=self.mcp_tools_info,
+                    )
+
+                    prompt_input = ToolPromptInput(
+                        prompt=prompt,
+                        context_instructions=context_instructions,
+                        response_schema=TOOL_DATA_SCHEMA,
+                        llm_profile=llm_profile_for(self.goal, PLANNER_PROFILE),
+                    )
+
+                    # connect to LLM and execute to get next steps
+                    tool_data = await self.run_llm_activity(
+                        TOOL_PLANNER_ACTIVITY,
+                        prompt_input,
+                        dict,
+                        supersedable=self.is_user_prompt(prompt),
+                    )
+                    if tool_data is None:
+                        if self.is_user_prompt(prompt):
+                            self.superseded_prompt = prompt
+                        continue
+                    if tool_data == FAILED_LLM_TURN:
+                        continue
 
                 tool_data["force_confirm"] = self.show_tool_args_confirmation
                 self.tool_data = tool_data
@@ -220,6 +335,11 @@ class AgentGoalWorkflow:
                     self.goal,
                     MAX_TURNS_BEFORE_CONTINUE,
                     self.add_message,
+                    env_settings=EnvLookupOutput(
+                        show_confirm=self.show_tool_args_confirmation,
+                        multi_goal_mode=self.multi_goal_mode,
+                        goal_categories=self.goal_categories,
+                    ),
                 )
 
     # Signal that comes from api/main.py via a post to /send-prompt
@@ -276,6 +396,24 @@ class AgentGoalWorkflow:
         Used only for continue as new of the workflow."""
         return self.conversation_summary
 
+    @workflow.query
+    def get_resume_input(self) -> Optional[CombinedInput]:
+        """Query handler to retrieve the input that resumes a hibernated session.
+        Returns None unless the session hibernated after being idle."""
+        if not self.hibernated:
+            return None
+        return CombinedInput(
+            tool_params=AgentGoalWorkflowParams(
+                conversation_summary=self.conversation_summary
+            ),
+            agent_goal=self.goal,
+            env_settings=EnvLookupOutput(
+                show_confirm=self.show_tool_args_confirmation,
+                multi_goal_mode=self.multi_goal_mode,
+                goal_categories=self.goal_categories,
+            ),
+        )
+
     @workflow.query
     def get_latest_tool_data(self) -> Optional[ToolData]:
         """Query handler to retrieve the latest tool data response if available."""
@@ -339,22 +477,152 @@ class AgentGoalWorkflow:
         else:
             return True
 
-    # look up env settings in an activity so they're part of history
+    def prevalidate(self, prompt: str) -> bool:
+        """Whether a user prompt is trivially valid, so LLM validation can be
+        skipped. Counted in agent_prompt_prevalidations for the hit rate."""
+        if (
+            not self.goal.local_prevalidation
+            or self.tool_data is None
+            or not workflow.patched(LOCAL_PREVALIDATION_PATCH)
+        ):
+            return False
+        accepted = is_trivially_valid(prompt)
+        workflow.metric_meter().create_counter(
+            "agent_prompt_prevalidations",
+            "User prompts checked locally before LLM validation",
+        ).add(1, {"accepted": accepted})
+        return accepted
+
+    def route_to_goal(self, prompt: str) -> bool:
+        """Switch to the goal a user prompt clearly asks for while the agent
+        is being chosen, skipping the ListAgents and ChangeGoal turns.
+        Counted in agent_goal_routings for the hit rate."""
+        if (
+            self.goal.category_tag != AGENT_SELECTION_CATEGORY
+            or not self.goal.direct_goal_routing
+            or not workflow.patched(DIRECT_GOAL_ROUTING_PATCH)
+        ):
+            return False
+        goal = route_goal(prompt, routable_goals(goal_list, self.goal_categories))
+        workflow.metric_meter().create_counter(
+            "agent_goal_routings",
+            "User prompts routed locally while choosing an agent",
+        ).add(1, {"routed": goal is not None})
+        if goal is None:
+            return False
+
+        self.change_goal(goal.id)
+        # The selection goal's last plan means nothing to the new goal
+        self.tool_data = None
+        # Recorded like a ChangeGoal run, so the planner sees the switch
+        self.add_message("tool_result", {"tool": "ChangeGoal", "new_goal": goal.id})
+        return True
+
+    def idle_timeout(self, waiting_for_confirm: bool) -> Optional[timedelta]:
+        if not self.goal.idle_timeout_minutes or not workflow.patched(
+            IDLE_HIBERNATION_PATCH
+        ):
+            return None
+        # A summary can't carry the pending tool call, so the session stays
+        # open until it is confirmed or the chat ends
+        if waiting_for_confirm and workflow.patched(HOLD_PENDING_CONFIRMATION_PATCH):
+            return None
+        return timedelta(minutes=self.goal.idle_timeout_minutes)
+
+    async def hibernate(self) -> str:
+        """Summarize the idle session and complete the workflow.
+
+        api/main.py reads get_resume_input() when the next prompt arrives and
+        starts a new run from the summary.
+        """
+        workflow.logger.info(
+            f"No input for {self.goal.idle_timeout_minutes} minutes, hibernating"
+        )
+        if any(
+            message["actor"] != "conversation_summary"
+            for message in self.conversation_history["messages"]
+        ):
+            self.conversation_summary = await helpers.summarize_conversation(
+                self.conversation_history, self.goal
+            )
+            self.add_message("conversation_summary", self.conversation_summary)
+        self.hibernated = True
+        return str(self.conversation_history)
+
+    def has_queued_user_prompt(self) -> bool:
+        return any(self.is_user_prompt(prompt) for prompt in self.prompt_queue)
+
+    async def run_llm_activity(
+        self, activity_name: str, arg: Any, result_type: type, supersedable: bool
+    ) -> Any:
+        """Run an LLM activity, cancelling it if its result would be wasted.
+
+        The activity is cancelled when the chat ends or, if supersedable and
+        the goal coalesces user prompts, when a newer user prompt arrives.
+        Returns None if it was cancelled, and FAILED_LLM_TURN after telling
+        the user if it failed with a non-retryable error.
+        """
+        handle = workflow.start_activity(
+            activity_name,
+            arg,
+            result_type=result_type,
+            task_queue=LLM_TASK_QUEUE,
+            schedule_to_close_timeout=LLM_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
+            start_to_close_timeout=LLM_ACTIVITY_START_TO_CLOSE_TIMEOUT,
+            heartbeat_timeout=LLM_ACTIVITY_HEARTBEAT_TIMEOUT,
+            retry_policy=LLM_RETRY_POLICY,
+        )
+        supersedable = supersedable and self.goal.coalesce_user_prompts
+        await workflow.wait_condition(
+            lambda: handle.done()
+            or self.chat_ended
+            or (supersedable and self.has_queued_user_prompt())
+        )
+        if handle.done() or not workflow.patched(
+            CANCEL_SUPERSEDED_LLM_ACTIVITIES_PATCH
+        ):
+            try:
+                return await handle
+            except ActivityError as e:
+                if not helpers.is_non_retryable_failure(e) or not workflow.patched(
+                    SURFACE_FAILED_LLM_TURNS_PATCH
+                ):
+                    raise
+                workflow.logger.error(f"{activity_name} failed: {e.cause}")
+                self.add_message("agent", FAILED_LLM_TURN_MESSAGE)
+                return FAILED_LLM_TURN
+
+        workflow.logger.info(f"Cancelling superseded {activity_name} activity")
+        handle.cancel()
+        try:
+            await handle
+        except ActivityError:
+            pass
+        return None
+
+    # use env settings resolved by the starter, or look them up in an activity
+    # so they're part of history
     async def lookup_wf_env_settings(self, combined_input: CombinedInput) -> None:
+        if combined_input.env_settings:
+            self.show_tool_args_confirmation = combined_input.env_settings.show_confirm
+            self.multi_goal_mode = combined_input.env_settings.multi_goal_mode
+            self.goal_categories = combined_input.env_settings.goal_categories
+            return
+
         env_lookup_input = EnvLookupInput(
             show_confirm_env_var_name="SHOW_CONFIRM",
             show_confirm_default=True,
         )
-        env_output: EnvLookupOutput = await workflow.execute_activity_method(
-            ToolActivities.get_wf_env_vars,
+        env_output: EnvLookupOutput = await workflow.execute_activity(
+            ENV_LOOKUP_ACTIVITY,
             env_lookup_input,
+            result_type=EnvLookupOutput,
             start_to_close_timeout=LLM_ACTIVITY_START_TO_CLOSE_TIMEOUT,
-            retry_policy=RetryPolicy(
-                initial_interval=timedelta(seconds=5), backoff_coefficient=1
-            ),
+            retry_policy=ENV_LOOKUP_RETRY_POLICY,
         )
         self.show_tool_args_confirmation = env_output.show_confirm
         self.multi_goal_mode = env_output.multi_goal_mode
+        self.goal_categories = env_output.goal_categories
 
     # execute the tool - return False if we're not waiting for confirm anymore (always the case if it works successfully)
     #
@@ -421,12 +689,11 @@ class AgentGoalWorkflow:
 
         # Call the MCP list tools activity
         mcp_tools_result = await workflow.execute_activity(
-            mcp_list_tools,
+            MCP_LIST_TOOLS_ACTIVITY,
             args=[self.goal.mcp_server_definition, include_tools],
+            result_type=dict,
             start_to_close_timeout=LLM_ACTIVITY_START_TO_CLOSE_TIMEOUT,
-            retry_policy=RetryPolicy(
-                initial_interval=timedelta(seconds=5), backoff_coefficient=1
-            ),
+            retry_policy=MCP_LIST_TOOLS_RETRY_POLICY,
             summary=f"{self.goal.mcp_server_definition.name}",
         )
 
@@ -0,0 +1,33 @@
+from temporalio.worker.workflow_sandbox import (
+    SandboxedWorkflowRunner,
+    SandboxRestrictions,
+)
+
+# Modules the workflow uses that are deterministic and side-effect free once
+# imported: goal and tool definitions, data types and prompt builders. Passing
+# them through means they are imported once per worker instead of being
+# re-imported and re-validated for every workflow instantiation or replay.
+# Workflow code itself (the workflows package) stays sandboxed.
+WORKFLOW_PASSTHROUGH_MODULES = (
+    "goals",
+    "models",
+    "prompts",
+    "shared.config",
+    "shared.goal_routing",
+    "shared.llm_profiles",
+    "shared.prompt_prevalidation",
+    "shared.slot_extractors",
+    "shared.tool_results",
+    "shared.tool_retrieval",
+    "shared.tool_routing",
+    "tools",
+)
+
+
+def create_workflow_runner() -> SandboxedWorkflowRunner:
+    """Sandboxed runner with the agent's curated passthrough configuration."""
+    return SandboxedWorkflowRunner(
+        restrictions=SandboxRestrictions.default.with_passthrough_modules(
+            *WORKFLOW_PASSTHROUGH_MODULES
+        )
+    )
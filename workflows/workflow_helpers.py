@@ -1,23 +1,81 @@
 from datetime import timedelta
-from typing import Any, Deque, Dict
+from typing import Any, Callable, Deque, Dict, List, Optional
 
 from temporalio import workflow
 from temporalio.common import RetryPolicy
-from temporalio.exceptions import ActivityError
+from temporalio.exceptions import ActivityError, ApplicationError
 
-from models.data_types import ConversationHistory, ToolPromptInput
+from models.data_types import (
+    ConversationHistory,
+    EnvLookupOutput,
+    ToolData,
+    ToolPromptInput,
+)
 from models.tool_definitions import AgentGoal, ToolDefinition
 from prompts.agent_prompt_generators import (
     generate_missing_args_prompt,
     generate_tool_completion_prompt,
 )
-from shared.config import TEMPORAL_LEGACY_TASK_QUEUE
+from shared.config import TEMPORAL_LLM_TASK_QUEUE
+from shared.llm_profiles import SUMMARY_PROFILE, llm_profile_for
+from shared.slot_extractors import fill_missing_args
+from shared.tool_results import project_history
+from shared.tool_routing import get_tool_route
+from tools import is_native_tool
 
-# Constants from original file
-TOOL_ACTIVITY_START_TO_CLOSE_TIMEOUT = timedelta(seconds=12)
-TOOL_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT = timedelta(minutes=30)
+# Constants from original file. Tool activity timeouts and retries come from
+# the routing table in shared/tool_routing.py.
 LLM_ACTIVITY_START_TO_CLOSE_TIMEOUT = timedelta(seconds=20)
 LLM_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT = timedelta(minutes=30)
+# LLM activities heartbeat while their request is in flight, so a cancel
+# from the workflow reaches them within roughly this long.
+LLM_ACTIVITY_HEARTBEAT_TIMEOUT = timedelta(seconds=5)
+
+# Retry policies per activity type. Activities classify their failures (see
+# activities/activity_errors.py): bad requests are non-retryable, transient
+# errors and rate limits set their own jittered delays, so these policies
+# only pace the rest, e.g. an LLM reply that wasn't valid JSON. Tool retries
+# come from the routing table.
+LLM_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=1),
+    backoff_coefficient=2,
+    maximum_interval=timedelta(seconds=20),
+)
+ENV_LOOKUP_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=1),
+    backoff_coefficient=2,
+    maximum_interval=timedelta(seconds=10),
+)
+MCP_LIST_TOOLS_RETRY_POLICY = RetryPolicy(
+    initial_interval=timedelta(seconds=1),
+    backoff_coefficient=2,
+    maximum_interval=timedelta(seconds=10),
+)
+
+# Workflows started before tools could run as local activities scheduled
+# every tool as a regular activity; replay them that way.
+LOCAL_TOOL_ACTIVITIES_PATCH = "local-tool-activities"
+# Workflows started before summaries fell back to the raw history failed
+# when the summary request was rejected; replay them that way.
+SUMMARY_FALLBACK_PATCH = "summary-fallback"
+
+# Activity type names. The workflow schedules activities by name so that it
+# never imports worker-side code (LLM client, MCP client, tool handlers).
+VALIDATE_PROMPT_ACTIVITY = "agent_validatePrompt"
+TOOL_PLANNER_ACTIVITY = "agent_toolPlanner"
+ENV_LOOKUP_ACTIVITY = "get_wf_env_vars"
+MCP_LIST_TOOLS_ACTIVITY = "mcp_list_tools"
+
+# LLM activities run on a dedicated queue when one is configured, so slow LLM
+# calls don't compete for slots with tool calls and workflow tasks. None keeps
+# them on the workflow's own task queue.
+LLM_TASK_QUEUE = TEMPORAL_LLM_TASK_QUEUE or None
+
+
+def is_non_retryable_failure(error: ActivityError) -> bool:
+    """Whether an activity failed without retrying because retries can't help,
+    e.g. the LLM provider rejected the request as invalid."""
+    return isinstance(error.cause, ApplicationError) and error.cause.non_retryable
 
 
 def is_mcp_tool(tool_name: str, goal: AgentGoal) -> bool:
@@ -25,15 +83,9 @@ def is_mcp_tool(tool_name: str, goal: AgentGoal) -> bool:
     if not goal.mcp_server_definition:
         return False
 
-    # Native tools are registered with tools.get_handler. If lookup succeeds,
-    # the tool should execute locally; otherwise treat it as MCP-provided.
-    from tools import get_handler
-
-    try:
-        get_handler(tool_name)
-        return False
-    except ValueError:
-        return True
+    # Native tools are registered in tools.TOOL_HANDLERS; anything else on an
+    # MCP-enabled goal is provided by the MCP server.
+    return not is_native_tool(tool_name)
 
 
 async def handle_tool_execution(
@@ -46,6 +98,7 @@ async def handle_tool_execution(
 ) -> None:
     """Execute a tool after confirmation and handle its result."""
     workflow.logger.info(f"Confirmed. Proceeding with tool: {current_tool}")
+    route = get_tool_route(current_tool)
 
     try:
         # Check if this is an MCP tool
@@ -66,30 +119,30 @@ async def handle_tool_execution(
             dynamic_result = await workflow.execute_activity(
                 current_tool,
                 mcp_args,
-                schedule_to_close_timeout=TOOL_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
-                start_to_close_timeout=TOOL_ACTIVITY_START_TO_CLOSE_TIMEOUT,
-                retry_policy=RetryPolicy(
-                    initial_interval=timedelta(seconds=5), backoff_coefficient=1
-                ),
+                task_queue=route.task_queue,
+                schedule_to_close_timeout=route.schedule_to_close_timeout,
+                start_to_close_timeout=route.start_to_close_timeout,
+                retry_policy=route.retry.to_retry_policy(),
                 summary=f"{goal.mcp_server_definition.name} (MCP Tool)",
             )
+        elif route.local and workflow.patched(LOCAL_TOOL_ACTIVITIES_PATCH):
+            # Cheap in-process tools skip the task queue round trip
+            dynamic_result = await workflow.execute_local_activity(
+                current_tool,
+                tool_data["args"],
+                schedule_to_close_timeout=route.schedule_to_close_timeout,
+                start_to_close_timeout=route.start_to_close_timeout,
+                retry_policy=route.retry.to_retry_policy(),
+            )
         else:
             # Handle regular tools
-            task_queue = (
-                TEMPORAL_LEGACY_TASK_QUEUE
-                if current_tool in ["SearchTrains", "BookTrains"]
-                else None
-            )
-
             dynamic_result = await workflow.execute_activity(
                 current_tool,
                 tool_data["args"],
-                task_queue=task_queue,
-                schedule_to_close_timeout=TOOL_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
-                start_to_close_timeout=TOOL_ACTIVITY_START_TO_CLOSE_TIMEOUT,
-                retry_policy=RetryPolicy(
-                    initial_interval=timedelta(seconds=5), backoff_coefficient=1
-                ),
+                task_queue=route.task_queue,
+                schedule_to_close_timeout=route.schedule_to_close_timeout,
+                start_to_close_timeout=route.start_to_close_timeout,
+                retry_policy=route.retry.to_retry_policy(),
             )
 
         dynamic_result["tool"] = current_tool
@@ -103,6 +156,19 @@ async def handle_tool_execution(
     prompt_queue.append(generate_tool_completion_prompt(current_tool, dynamic_result))
 
 
+def pop_queued_user_prompts(
+    prompt_queue: Deque[str], is_user_prompt: Callable[[str], bool]
+) -> List[str]:
+    """Pop the user prompts waiting at the front of the queue.
+
+    Stops at the first LLM-tagged prompt so those keep their place in order.
+    """
+    prompts = []
+    while prompt_queue and is_user_prompt(prompt_queue[0]):
+        prompts.append(prompt_queue.popleft())
+    return prompts
+
+
 async def handle_missing_args(
     current_tool: str,
     args: Dict[str, Any],
@@ -123,9 +189,40 @@ async def handle_missing_args(
     return False
 
 
+def fill_missing_args_locally(
+    goal: AgentGoal, tool_data: Optional[ToolData], reply: str
+) -> Optional[ToolData]:
+    """Planner-style tool data for the user's reply to a question about a
+    tool's missing arguments, if they can all be read off the reply.
+
+    Returns None when the last planner step wasn't such a question or the
+    reply needs the LLM, e.g. because it says more than the values asked for.
+    """
+    if not tool_data or tool_data.get("next") != "question":
+        return None
+    tool = next(
+        (tool for tool in goal.tools if tool.name == tool_data.get("tool")), None
+    )
+    if tool is None:
+        return None
+
+    args = fill_missing_args(tool, tool_data.get("args") or {}, reply)
+    if args is None:
+        return None
+    return {
+        "next": "confirm",
+        "tool": tool.name,
+        "args": args,
+        "response": f"Thanks, that's everything I need for {tool.name}.",
+    }
+
+
 def format_history(conversation_history: ConversationHistory) -> str:
     """Format the conversation history into a single string."""
-    return " ".join(str(msg["response"]) for msg in conversation_history["messages"])
+    return " ".join(
+        str(msg["response"])
+        for msg in project_history(conversation_history)["messages"]
+    )
 
 
 def prompt_with_history(
@@ -142,25 +239,66 @@ def prompt_with_history(
     return (context_instructions, prompt)
 
 
+async def summarize_conversation(
+    conversation_history: ConversationHistory, agent_goal: AgentGoal
+) -> str:
+    """Ask the LLM for a short plain text summary of the conversation.
+
+    If the LLM request can never succeed (e.g. the provider rejects it), the
+    summary is the conversation since its last summary instead, so the
+    session carries on rather than failing.
+    """
+    summary_context, summary_prompt = prompt_summary_with_history(conversation_history)
+    summary_input = ToolPromptInput(
+        prompt=summary_prompt,
+        context_instructions=summary_context,
+        llm_profile=llm_profile_for(agent_goal, SUMMARY_PROFILE),
+    )
+    try:
+        summary = await workflow.execute_activity(
+            TOOL_PLANNER_ACTIVITY,
+            summary_input,
+            result_type=dict,
+            task_queue=LLM_TASK_QUEUE,
+            schedule_to_close_timeout=LLM_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
+            retry_policy=LLM_RETRY_POLICY,
+        )
+    except ActivityError as e:
+        if not is_non_retryable_failure(e) or not workflow.patched(
+            SUMMARY_FALLBACK_PATCH
+        ):
+            raise
+        workflow.logger.warning(f"Summary failed, keeping the history instead: {e}")
+        return fallback_summary(conversation_history)
+    return str(summary.get("summary", summary))
+
+
+def fallback_summary(conversation_history: ConversationHistory) -> str:
+    """The last summary and the messages after it, as plain text."""
+    messages = conversation_history["messages"]
+    start = max(
+        (
+            position
+            for position, message in enumerate(messages)
+            if message["actor"] == "conversation_summary"
+        ),
+        default=0,
+    )
+    return format_history({"messages": messages[start:]})
+
+
 async def continue_as_new_if_needed(
     conversation_history: ConversationHistory,
     prompt_queue: Deque[str],
     agent_goal: Any,
     max_turns: int,
     add_message_callback: callable,
+    env_settings: Optional[EnvLookupOutput] = None,
 ) -> None:
     """Handle workflow continuation if message limit is reached."""
     if len(conversation_history["messages"]) >= max_turns:
-        summary_context, summary_prompt = prompt_summary_with_history(
-            conversation_history
-        )
-        summary_input = ToolPromptInput(
-            prompt=summary_prompt, context_instructions=summary_context
-        )
-        conversation_summary = await workflow.start_activity_method(
-            "ToolActivities.agent_toolPlanner",
-            summary_input,
-            schedule_to_close_timeout=LLM_ACTIVITY_SCHEDULE_TO_CLOSE_TIMEOUT,
+        conversation_summary = await summarize_conversation(
+            conversation_history, agent_goal
         )
         workflow.logger.info(f"Continuing as new after {max_turns} turns.")
         add_message_callback("conversation_summary", conversation_summary)
@@ -172,6 +310,7 @@ async def continue_as_new_if_needed(
                         "prompt_queue": prompt_queue,
                     },
                     "agent_goal": agent_goal,
+                    "env_settings": env_settings,
                 }
             ]
         )